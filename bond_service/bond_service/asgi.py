@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bond_service.settings.base')
 
-application = get_asgi_application()
+# As django.core.asgi.get_asgi_application, with a handler that reads streaming responses in a thread
+django.setup(set_prefix=False)
+
+from bond_service_api.handlers import StreamingASGIHandler  # noqa: E402
+
+application = StreamingASGIHandler()
@@ -91,6 +91,137 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# REDIS_URL is required when the API runs in more than one process: without it every process
+# has its own local memory caches, and the version counters (see versions.py) are not shared
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'responses',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'responses',
+        },
+    }
+
+
+# ISIN validation cache
+
+ISIN_CACHE_ALIAS = 'default'
+ISIN_CACHE_MAXSIZE = int(os.getenv('ISIN_CACHE_MAXSIZE', 10000))
+ISIN_CACHE_POSITIVE_TTL = int(os.getenv('ISIN_CACHE_POSITIVE_TTL', 60 * 60 * 24))
+ISIN_CACHE_NEGATIVE_TTL = int(os.getenv('ISIN_CACHE_NEGATIVE_TTL', 60 * 10))
+
+
+# ISIN registry
+
+ISIN_REGISTRY_BACKEND = os.getenv('ISIN_REGISTRY_BACKEND', 'bond_service_api.isin_registry.SnapshotISINRegistry')
+ISIN_REGISTRY_SNAPSHOT_PATH = os.getenv('ISIN_REGISTRY_SNAPSHOT_PATH', os.path.join(BASE_DIR, 'isin_snapshot.txt'))
+ISIN_REGISTRY_SOURCE_URL = os.getenv('ISIN_REGISTRY_SOURCE_URL', 'https://www.cdcp.cz/isbpublicjson/api/VydaneISINy')
+ISIN_REGISTRY_RELOAD_INTERVAL = int(os.getenv('ISIN_REGISTRY_RELOAD_INTERVAL', 60))
+ISIN_NETWORK_FALLBACK = bool(strtobool(os.getenv('ISIN_NETWORK_FALLBACK', 'True')))
+ISIN_DEFER_ON_CDCP_OUTAGE = bool(strtobool(os.getenv('ISIN_DEFER_ON_CDCP_OUTAGE', 'False')))
+
+
+# Central depository (CDCP) API client
+
+CDCP_API_URL = os.getenv('CDCP_API_URL', 'https://www.cdcp.cz/isbpublicjson/api')
+CDCP_CONNECT_TIMEOUT = float(os.getenv('CDCP_CONNECT_TIMEOUT', 3.05))
+CDCP_READ_TIMEOUT = float(os.getenv('CDCP_READ_TIMEOUT', 5))
+CDCP_RETRIES = int(os.getenv('CDCP_RETRIES', 2))
+CDCP_BACKOFF_FACTOR = float(os.getenv('CDCP_BACKOFF_FACTOR', 0.2))
+CDCP_POOL_MAXSIZE = int(os.getenv('CDCP_POOL_MAXSIZE', 10))
+CDCP_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CDCP_BREAKER_FAILURE_THRESHOLD', 5))
+CDCP_BREAKER_RESET_TIMEOUT = float(os.getenv('CDCP_BREAKER_RESET_TIMEOUT', 30))
+
+
+# Login (token endpoint) protection: throttles per client address and per username, stored in the
+# LOGIN_THROTTLE_CACHE_ALIAS cache, the number of password hashes computed at once per process and
+# how long (in seconds) a login waits for one, and the cache of recently verified passwords
+
+LOGIN_THROTTLE_CACHE_ALIAS = 'default'
+LOGIN_IP_THROTTLE_RATE = os.getenv('LOGIN_IP_THROTTLE_RATE', '30/min')
+LOGIN_USERNAME_THROTTLE_RATE = os.getenv('LOGIN_USERNAME_THROTTLE_RATE', '10/min')
+LOGIN_HASHING_CONCURRENCY = int(os.getenv('LOGIN_HASHING_CONCURRENCY', 2))
+LOGIN_HASHING_TIMEOUT = float(os.getenv('LOGIN_HASHING_TIMEOUT', 5))
+LOGIN_VERIFICATION_CACHE_TTL = int(os.getenv('LOGIN_VERIFICATION_CACHE_TTL', 60 * 5))
+LOGIN_VERIFICATION_CACHE_MAXSIZE = int(os.getenv('LOGIN_VERIFICATION_CACHE_MAXSIZE', 10000))
+
+
+# Stateless JWT authentication, building the user from the access token claims. Only whether the
+# user is still active is read from the database, at most once per TTL (in seconds) and process
+
+JWT_STATELESS_AUTH = bool(strtobool(os.getenv('JWT_STATELESS_AUTH', 'False')))
+JWT_ACTIVE_USER_CACHE_TTL = int(os.getenv('JWT_ACTIVE_USER_CACHE_TTL', 30))
+JWT_ACTIVE_USER_CACHE_MAXSIZE = int(os.getenv('JWT_ACTIVE_USER_CACHE_MAXSIZE', 10000))
+
+
+# Read-only fast path of the list and detail endpoints, serving values() rows without the serializers
+
+API_READ_FAST_PATH = bool(strtobool(os.getenv('API_READ_FAST_PATH', 'True')))
+
+
+# Bulk bond import
+
+BOND_IMPORT_BATCH_SIZE = int(os.getenv('BOND_IMPORT_BATCH_SIZE', 500))
+BOND_IMPORT_ISIN_WORKERS = int(os.getenv('BOND_IMPORT_ISIN_WORKERS', 8))
+
+
+# Streaming bond export, the number of bonds fetched from the database and written together
+
+BOND_EXPORT_CHUNK_SIZE = int(os.getenv('BOND_EXPORT_CHUNK_SIZE', 2000))
+
+
+# Portfolio analytics engine, 'float' (float64) or 'decimal' (exact Decimal arithmetic)
+
+PORTFOLIO_ANALYTICS_MODE = os.getenv('PORTFOLIO_ANALYTICS_MODE', 'float')
+
+
+# Version counters of the portfolios (see versions.py), keying the analysis cache and the ETags
+
+DATA_VERSIONS_CACHE_ALIAS = 'default'
+
+
+# ETags, 304 Not Modified responses and the response cache of the read endpoints. They rely on
+# the version counters, so they are enabled by default only with Redis, and the app refuses to
+# start when they are enabled with a local memory cache (see `check_shared_caches`)
+
+API_CONDITIONAL_GET = bool(strtobool(os.getenv('API_CONDITIONAL_GET', str(bool(REDIS_URL)))))
+
+
+# Rendered GET responses of the read endpoints, keyed by their ETag. The timeout can be
+# overridden per view with `response_cache_timeout`, 0 disables the cache
+
+API_RESPONSE_CACHE_ALIAS = 'responses'
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 60 * 5))
+
+
+# Portfolio analysis cache. The entries are keyed by the version counters, so like the conditional
+# GET it is enabled by default only with Redis, and the app refuses to start when it is enabled
+# with a local memory cache (see `check_shared_caches`)
+
+PORTFOLIO_ANALYSIS_CACHE = bool(strtobool(os.getenv('PORTFOLIO_ANALYSIS_CACHE', str(bool(REDIS_URL)))))
+PORTFOLIO_ANALYSIS_CACHE_ALIAS = 'default'
+PORTFOLIO_ANALYSIS_CACHE_TTL = int(os.getenv('PORTFOLIO_ANALYSIS_CACHE_TTL', 60 * 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -101,15 +232,36 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Password verification in bounded hashing slots, with a cache of the recent successful ones
+
+AUTHENTICATION_BACKENDS = [
+    'bond_service_api.backends.CachedPasswordModelBackend',
+]
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'bond_service_api.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'bond_service_api.renderers.FastJSONRenderer',
+        'bond_service_api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'bond_service_api.parsers.FastJSONParser',
+        'bond_service_api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# JSON encoder and decoder of the API, 'orjson' (if installed) or 'stdlib'
+
+API_JSON_BACKEND = os.getenv('API_JSON_BACKEND', 'orjson')
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Bond Service API',
     'DESCRIPTION': 'A service for investing in corporate bonds',
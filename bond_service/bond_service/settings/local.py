@@ -36,6 +36,7 @@ LOGGING = {
 
 
 REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (  # noqa
-    "rest_framework.renderers.JSONRenderer",
+    "bond_service_api.renderers.FastJSONRenderer",
+    "bond_service_api.renderers.MessagePackRenderer",
     "rest_framework.renderers.BrowsableAPIRenderer",
 )
@@ -28,4 +28,7 @@ LOGGING = {
     },
 }
 
-REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ("rest_framework.renderers.JSONRenderer",)  # noqa
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (  # noqa
+    "bond_service_api.renderers.FastJSONRenderer",
+    "bond_service_api.renderers.MessagePackRenderer",
+)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Portfolio, Bond
+from .models import Portfolio, PortfolioSummary, Bond
 
 admin.site.register(Portfolio)
 admin.site.register(Bond)
+admin.site.register(PortfolioSummary)
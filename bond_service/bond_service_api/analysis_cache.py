@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .versions import portfolio_versions
+
+log = logging.getLogger(__name__)
+
+
+class PortfolioAnalysisCache:
+    '''
+    PortfolioAnalysisCache: A cache of the portfolio aggregates used by the portfolio analysis.
+
+    The cached entries are the aggregates (bond count, value and interest rate sums, the nearest
+    maturity bond and the portfolio owner), not the analysis itself, so the day-dependent future
+    value is recomputed from them on every read without touching the database.
+
+    The entries are stored under a key containing the version of the portfolio (see `versions.py`),
+    which is incremented on every change of the portfolio or its bonds, so an entry computed from
+    data read before the change is never returned, even if it is written after the change.
+
+    Errors of the cache backend are logged and treated as a miss, so an unavailable Redis never
+    breaks the analysis. Nothing is cached unless PORTFOLIO_ANALYSIS_CACHE is enabled.
+
+    Attributes:
+        cache_alias (str): The Django cache used, `PORTFOLIO_ANALYSIS_CACHE_ALIAS`.
+        ttl (int): How long (in seconds) an entry is kept, `PORTFOLIO_ANALYSIS_CACHE_TTL`.
+    '''
+    key_prefix = 'portfolio_analysis'
+
+    def __init__(self, cache_alias: str, ttl: int):
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, portfolio_pk: int, version: int) -> str:
+        return f'{self.key_prefix}:{portfolio_pk}:{version}'
+
+    def get_many(self, portfolio_pks: Iterable[int]) -> Tuple[Dict[int, Dict], Dict[int, int]]:
+        '''
+        Returns the cached aggregates of the portfolios and the current versions, which must be
+        passed to `set_many` when the missing aggregates are stored.
+        '''
+        if not settings.PORTFOLIO_ANALYSIS_CACHE:
+            return {}, {}
+        try:
+            versions = portfolio_versions.get_many(portfolio_pks)
+            keys = {self.make_key(pk, version): pk for pk, version in versions.items()}
+            entries = self.cache.get_many(keys)
+        except Exception:
+            log.warning('Portfolio analysis cache is unavailable', exc_info=True)
+            return {}, {}
+        return {keys[key]: aggregates for key, aggregates in entries.items()}, versions
+
+    def set_many(self, aggregates: Dict[int, Dict], versions: Dict[int, int]) -> None:
+        entries = {
+            self.make_key(pk, versions[pk]): portfolio_aggregates
+            for pk, portfolio_aggregates in aggregates.items()
+            if pk in versions
+        }
+        try:
+            self.cache.set_many(entries, self.ttl)
+        except Exception:
+            log.warning('Portfolio analysis cache is unavailable', exc_info=True)
+
+
+portfolio_analysis_cache = PortfolioAnalysisCache(
+    cache_alias=settings.PORTFOLIO_ANALYSIS_CACHE_ALIAS,
+    ttl=settings.PORTFOLIO_ANALYSIS_CACHE_TTL,
+)
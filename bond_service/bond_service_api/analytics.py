@@ -0,0 +1,411 @@
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from .models import Bond
+
+FLOAT_MODE = 'float'
+DECIMAL_MODE = 'decimal'
+DAYS_PER_YEAR = 365.25
+YIELD_TOLERANCE = 1e-12
+YIELD_MAX_ITERATIONS = 50
+
+
+@dataclass
+class BondColumns:
+    '''
+    BondColumns: The bond columns used by the analytics, loaded into NumPy arrays.
+
+    The rows are sorted by portfolio, maturity date and id, so the bonds of every portfolio
+    are contiguous and the first bond of a portfolio is its nearest maturity bond.
+
+    Attributes:
+        portfolio_ids (ndarray): The portfolio id of every bond (int64).
+        bond_ids (ndarray): The bond ids (int64).
+        bond_values (ndarray): The bond values, float64 or Decimal objects in decimal mode.
+        interest_rates (ndarray): The interest rates, float64 or Decimal objects in decimal mode.
+        purchase_dates (ndarray): The purchase dates (datetime64[D]).
+        maturity_dates (ndarray): The maturity dates (datetime64[D]).
+        yields_frequencies (ndarray): The number of coupon payments per year (int64).
+    '''
+    portfolio_ids: np.ndarray
+    bond_ids: np.ndarray
+    bond_values: np.ndarray
+    interest_rates: np.ndarray
+    purchase_dates: np.ndarray
+    maturity_dates: np.ndarray
+    yields_frequencies: np.ndarray
+
+    @classmethod
+    def from_queryset(cls, bonds: QuerySet[Bond], mode: str = FLOAT_MODE) -> 'BondColumns':
+        rows = bonds.order_by('portfolio_id', 'maturity_date', 'pk').values_list(
+            'portfolio_id', 'pk', 'bond_value', 'interest_rate', 'purchase_date', 'maturity_date', 'yields_frequency',
+        )
+        columns = list(zip(*rows)) or [()] * 7
+        number_dtype = object if mode == DECIMAL_MODE else np.float64
+        return cls(
+            portfolio_ids=np.array(columns[0], dtype=np.int64),
+            bond_ids=np.array(columns[1], dtype=np.int64),
+            bond_values=np.array(columns[2], dtype=number_dtype),
+            interest_rates=np.array(columns[3], dtype=number_dtype),
+            purchase_dates=np.array(columns[4], dtype='datetime64[D]'),
+            maturity_dates=np.array(columns[5], dtype='datetime64[D]'),
+            yields_frequencies=np.array(columns[6], dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.bond_ids)
+
+
+@dataclass
+class PortfolioValuation:
+    '''
+    PortfolioValuation: The analysis of many portfolios, one array element per portfolio.
+
+    Attributes:
+        portfolio_ids (ndarray): The analyzed portfolio ids, in ascending order.
+        bonds_count (ndarray): The number of bonds in every portfolio.
+        total_value (ndarray): The total value of all bonds in the portfolio.
+        average_interest_rate (ndarray): The average interest rate of all bonds in the portfolio.
+        nearest_maturity_bond_id (ndarray): The id of the bond with the nearest maturity date.
+        nearest_maturity_date (ndarray): The nearest maturity date.
+        future_value (ndarray): The future value of the portfolio, calculated as in
+                                `analysis_from_aggregates`.
+    '''
+    portfolio_ids: np.ndarray
+    bonds_count: np.ndarray
+    total_value: np.ndarray
+    average_interest_rate: np.ndarray
+    nearest_maturity_bond_id: np.ndarray
+    nearest_maturity_date: np.ndarray
+    future_value: np.ndarray
+
+    def as_dict(self) -> Dict[int, Dict]:
+        return {
+            int(portfolio_id): {
+                'bonds_count': int(self.bonds_count[index]),
+                'total_value': self.total_value[index],
+                'average_interest_rate': self.average_interest_rate[index],
+                'nearest_maturity_bond_id': int(self.nearest_maturity_bond_id[index]),
+                'nearest_maturity_date': self.nearest_maturity_date[index].item(),
+                'future_value': self.future_value[index],
+            }
+            for index, portfolio_id in enumerate(self.portfolio_ids)
+        }
+
+
+@dataclass
+class CouponSchedule:
+    '''
+    CouponSchedule: The coupon and principal payments of many bonds as flat arrays.
+
+    The payments of every bond are contiguous and ordered by date, the principal is added to the
+    last coupon. The dates follow `cashflows.bond_cash_flows`.
+
+    Attributes:
+        bond_index (ndarray): The position of the paying bond in the bond columns.
+        payment_dates (ndarray): The payment dates (datetime64[D]).
+        amounts (ndarray): The paid amounts (float64).
+    '''
+    bond_index: np.ndarray
+    payment_dates: np.ndarray
+    amounts: np.ndarray
+
+
+@dataclass
+class RiskMeasures:
+    '''
+    RiskMeasures: Yield and interest rate risk measures, one array element per bond or portfolio.
+
+    Measures that are not defined (a matured bond, or a portfolio of matured bonds) are NaN.
+
+    Attributes:
+        ids (ndarray): The bond or portfolio ids.
+        present_value (ndarray): The present value of the remaining payments, discounted at the yield.
+        yield_to_maturity (ndarray): The annual yield to maturity in percent, compounded with the coupon frequency.
+        macaulay_duration (ndarray): The Macaulay duration in years.
+        modified_duration (ndarray): The modified duration in years.
+        convexity (ndarray): The convexity in years squared.
+    '''
+    ids: np.ndarray
+    present_value: np.ndarray
+    yield_to_maturity: np.ndarray
+    macaulay_duration: np.ndarray
+    modified_duration: np.ndarray
+    convexity: np.ndarray
+
+    def as_list(self) -> List[Dict]:
+        return [
+            {
+                'id': int(self.ids[index]),
+                'present_value': finite_or_none(self.present_value[index]),
+                'yield_to_maturity': finite_or_none(self.yield_to_maturity[index]),
+                'macaulay_duration': finite_or_none(self.macaulay_duration[index]),
+                'modified_duration': finite_or_none(self.modified_duration[index]),
+                'convexity': finite_or_none(self.convexity[index]),
+            }
+            for index in range(len(self.ids))
+        ]
+
+
+def group_starts(portfolio_ids: np.ndarray) -> np.ndarray:
+    '''
+    Returns the positions where a new portfolio starts in the sorted portfolio ids.
+    '''
+    return np.concatenate(([0], np.flatnonzero(np.diff(portfolio_ids)) + 1))
+
+
+def finite_or_none(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def months_before(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    '''
+    Moves every date back by a number of months, clipping the day to the length of the month
+    like `dateutil.relativedelta` does.
+    '''
+    month = dates.astype('datetime64[M]')
+    day = (dates - month.astype('datetime64[D]')).astype(np.int64)
+    shifted = month - months.astype('timedelta64[M]')
+    month_start = shifted.astype('datetime64[D]')
+    month_length = ((shifted + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+    return month_start + np.minimum(day, month_length - 1)
+
+
+def coupon_schedule(columns: BondColumns) -> CouponSchedule:
+    '''
+    Builds the payment schedule of all bonds without a per-bond Python loop.
+
+    Coupons are paid every 12 / yields_frequency months counting back from the maturity date,
+    the ones after the purchase date are kept.
+
+    Args:
+        columns (BondColumns): The bond columns.
+
+    Returns:
+        CouponSchedule: The payments of all bonds.
+    '''
+    step = 12 // columns.yields_frequencies
+    elapsed_months = (
+        columns.maturity_dates.astype('datetime64[M]') - columns.purchase_dates.astype('datetime64[M]')
+    ).astype(np.int64)
+    periods = np.maximum(elapsed_months // step + 1, 0)
+    for _ in range(2):
+        periods -= (periods > 0) & (months_before(columns.maturity_dates, periods * step) <= columns.purchase_dates)
+    counts = np.where(columns.maturity_dates > columns.purchase_dates, periods + 1, 0)
+    bond_index = np.repeat(np.arange(len(columns)), counts)
+    starts = np.cumsum(counts) - counts
+    period = periods[bond_index] - (np.arange(len(bond_index)) - starts[bond_index])
+    payment_dates = months_before(columns.maturity_dates[bond_index], period * step[bond_index])
+    bond_values = columns.bond_values.astype(np.float64)
+    coupons = np.round(bond_values * columns.interest_rates.astype(np.float64) / 100 / columns.yields_frequencies, 2)
+    amounts = coupons[bond_index] + np.where(period == 0, bond_values[bond_index], 0.0)
+    return CouponSchedule(bond_index=bond_index, payment_dates=payment_dates, amounts=amounts)
+
+
+def solve_yield_to_maturity(
+    schedule: CouponSchedule,
+    prices: np.ndarray,
+    purchase_dates: np.ndarray,
+    frequencies: np.ndarray,
+    initial_yields: np.ndarray,
+) -> np.ndarray:
+    '''
+    Solves the yield to maturity of all bonds at once with Newton's method.
+
+    The yield y of a bond is the rate at which the payments discounted to the purchase date,
+    sum(amount / (1 + y / f) ** (f * t)), equal the price. Every iteration updates all bonds
+    with two weighted `np.bincount` sums, until the largest step is below `YIELD_TOLERANCE`.
+
+    Args:
+        schedule (CouponSchedule): The payments of all bonds.
+        prices (ndarray): The purchase prices.
+        purchase_dates (ndarray): The purchase dates (datetime64[D]).
+        frequencies (ndarray): The number of coupon payments per year.
+        initial_yields (ndarray): The starting yields, as fractions.
+
+    Returns:
+        ndarray: The yields, as fractions, NaN for bonds without payments.
+    '''
+    index = schedule.bond_index
+    years = (schedule.payment_dates - purchase_dates[index]).astype(np.float64) / DAYS_PER_YEAR
+    frequency = frequencies[index].astype(np.float64)
+    yields = initial_yields.astype(np.float64).copy()
+    for _ in range(YIELD_MAX_ITERATIONS):
+        base = 1 + yields[index] / frequency
+        discounted = schedule.amounts * base ** (-frequency * years)
+        present_value = np.bincount(index, discounted, minlength=len(prices))
+        derivative = np.bincount(index, -years * discounted / base, minlength=len(prices))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = (present_value - prices) / derivative
+        yields -= step
+        if not np.nanmax(np.abs(step), initial=0) > YIELD_TOLERANCE:
+            break
+    return yields
+
+
+class PortfolioAnalyticsEngine:
+    '''
+    PortfolioAnalyticsEngine: Values any number of portfolios in one vectorized pass.
+
+    The bonds of all portfolios are grouped with `np.add.reduceat` over the sorted bond
+    columns, so total value, average interest rate, nearest maturity and compounded future
+    value are computed for every portfolio without a per-bond Python loop.
+
+    In 'float' mode everything is computed in float64. In 'decimal' mode the sums are exact
+    Decimals and the future value is computed with Decimal arithmetic per portfolio, so the
+    results are identical to `get_portfolio_analysis`.
+
+    Attributes:
+        mode (str): 'float' or 'decimal', `PORTFOLIO_ANALYTICS_MODE` by default.
+    '''
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = mode or settings.PORTFOLIO_ANALYTICS_MODE
+        if self.mode not in (FLOAT_MODE, DECIMAL_MODE):
+            raise ValueError(f'Unknown analytics mode: {self.mode}')
+
+    def load(self, bonds: QuerySet[Bond]) -> BondColumns:
+        return BondColumns.from_queryset(bonds, mode=self.mode)
+
+    def value(self, columns: BondColumns, today: Optional[date] = None) -> PortfolioValuation:
+        '''
+        Values every portfolio that has bonds in the columns.
+
+        Args:
+            columns (BondColumns): The bond columns, as loaded by `load`.
+            today (date): The date of the valuation, the current date by default.
+
+        Returns:
+            PortfolioValuation: The valuation of every portfolio.
+        '''
+        today = today or timezone.now().date()
+        if not len(columns):
+            return self.empty_valuation()
+        starts = group_starts(columns.portfolio_ids)
+        bonds_count = np.diff(np.append(starts, len(columns)))
+        total_value = np.add.reduceat(columns.bond_values, starts)
+        interest_rate_sum = np.add.reduceat(columns.interest_rates, starts)
+        nearest_maturity_date = columns.maturity_dates[starts]
+        days = (nearest_maturity_date - np.datetime64(today, 'D')).astype(np.int64)
+        if self.mode == DECIMAL_MODE:
+            average_interest_rate, future_value = self.decimal_future_value(
+                total_value, interest_rate_sum, bonds_count, days,
+            )
+        else:
+            average_interest_rate = interest_rate_sum / bonds_count
+            future_value = total_value * (1 + average_interest_rate / 100) ** (days / 365.25)
+        return PortfolioValuation(
+            portfolio_ids=columns.portfolio_ids[starts],
+            bonds_count=bonds_count,
+            total_value=total_value,
+            average_interest_rate=average_interest_rate,
+            nearest_maturity_bond_id=columns.bond_ids[starts],
+            nearest_maturity_date=nearest_maturity_date,
+            future_value=future_value,
+        )
+
+    def decimal_future_value(self, total_value, interest_rate_sum, bonds_count, days):
+        average_interest_rate = np.empty(len(total_value), dtype=object)
+        future_value = np.empty(len(total_value), dtype=object)
+        for index in range(len(total_value)):
+            average_interest_rate[index] = Decimal(interest_rate_sum[index] / int(bonds_count[index]))
+            years = Decimal(int(days[index]) / Decimal(365.25))
+            future_value[index] = Decimal(total_value[index]) * (1 + average_interest_rate[index] / 100) ** years
+        return average_interest_rate, future_value
+
+    def empty_valuation(self) -> PortfolioValuation:
+        number_dtype = object if self.mode == DECIMAL_MODE else np.float64
+        return PortfolioValuation(
+            portfolio_ids=np.array([], dtype=np.int64),
+            bonds_count=np.array([], dtype=np.int64),
+            total_value=np.array([], dtype=number_dtype),
+            average_interest_rate=np.array([], dtype=number_dtype),
+            nearest_maturity_bond_id=np.array([], dtype=np.int64),
+            nearest_maturity_date=np.array([], dtype='datetime64[D]'),
+            future_value=np.array([], dtype=number_dtype),
+        )
+
+    def bond_risk(self, columns: BondColumns, today: Optional[date] = None) -> RiskMeasures:
+        '''
+        Computes the yield to maturity, duration and convexity of every bond.
+
+        The yield is solved from the purchase price (the bond value) and the payment schedule,
+        the duration and convexity are measured at `today` from the remaining payments discounted
+        at that yield. Risk measures are always computed in float64, whatever the mode.
+
+        Args:
+            columns (BondColumns): The bond columns, as loaded by `load`.
+            today (date): The date of the analysis, the current date by default.
+
+        Returns:
+            RiskMeasures: The risk measures of every bond, keyed by the bond ids.
+        '''
+        today = np.datetime64(today or timezone.now().date(), 'D')
+        schedule = coupon_schedule(columns)
+        frequencies = columns.yields_frequencies.astype(np.float64)
+        yields = solve_yield_to_maturity(
+            schedule,
+            prices=columns.bond_values.astype(np.float64),
+            purchase_dates=columns.purchase_dates,
+            frequencies=frequencies,
+            initial_yields=columns.interest_rates.astype(np.float64) / 100,
+        )
+        remaining = schedule.payment_dates > today
+        index = schedule.bond_index[remaining]
+        years = (schedule.payment_dates[remaining] - today).astype(np.float64) / DAYS_PER_YEAR
+        base = 1 + yields / frequencies
+        discounted = schedule.amounts[remaining] * base[index] ** (-frequencies[index] * years)
+        present_value = np.bincount(index, discounted, minlength=len(columns))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            macaulay_duration = np.bincount(index, years * discounted, minlength=len(columns)) / present_value
+            convexity = np.bincount(
+                index, discounted * years * (years + 1 / frequencies[index]), minlength=len(columns),
+            ) / (present_value * base ** 2)
+        return RiskMeasures(
+            ids=columns.bond_ids,
+            present_value=present_value,
+            yield_to_maturity=yields * 100,
+            macaulay_duration=macaulay_duration,
+            modified_duration=macaulay_duration / base,
+            convexity=convexity,
+        )
+
+    def portfolio_risk(self, columns: BondColumns, bond_risk: RiskMeasures) -> RiskMeasures:
+        '''
+        Aggregates the bond risk measures per portfolio, weighted by the present value of the bonds.
+        Matured bonds have no present value, so they don't contribute.
+
+        Args:
+            columns (BondColumns): The bond columns, as loaded by `load`.
+            bond_risk (RiskMeasures): The risk measures of the bonds, as computed by `bond_risk`.
+
+        Returns:
+            RiskMeasures: The risk measures of every portfolio, keyed by the portfolio ids.
+        '''
+        if not len(columns):
+            empty = np.array([], dtype=np.float64)
+            return RiskMeasures(np.array([], dtype=np.int64), empty, empty, empty, empty, empty)
+        starts = group_starts(columns.portfolio_ids)
+        weights = bond_risk.present_value
+        total_weight = np.add.reduceat(weights, starts)
+
+        def weighted_average(values):
+            weighted = np.add.reduceat(np.where(weights > 0, weights * values, 0.0), starts)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return weighted / total_weight
+
+        return RiskMeasures(
+            ids=columns.portfolio_ids[starts],
+            present_value=total_weight,
+            yield_to_maturity=weighted_average(bond_risk.yield_to_maturity),
+            macaulay_duration=weighted_average(bond_risk.macaulay_duration),
+            modified_duration=weighted_average(bond_risk.modified_duration),
+            convexity=weighted_average(bond_risk.convexity),
+        )
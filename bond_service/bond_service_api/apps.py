@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class BondServiceApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bond_service_api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .versions import check_shared_caches
+        check_shared_caches()
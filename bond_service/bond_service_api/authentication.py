@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .isin_cache import LRUCache
+
+# Whether a user exists and is active, by user id
+active_users = LRUCache(maxsize=settings.JWT_ACTIVE_USER_CACHE_MAXSIZE)
+
+
+def is_active_user(user_id: int) -> bool:
+    '''
+    Returns whether the user exists and is active, read from the database at most once per
+    JWT_ACTIVE_USER_CACHE_TTL seconds and process.
+    '''
+    active = active_users.get(user_id)
+    if active is None:
+        active = User.objects.filter(pk=user_id, is_active=True).exists()
+        active_users.set(user_id, active, settings.JWT_ACTIVE_USER_CACHE_TTL)
+    return active
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    '''
+    JWT authentication that, with JWT_STATELESS_AUTH, authenticates requests as a `TokenUser`
+    built from the claims of the access token (user id, username, is_staff and is_superuser, see
+    `MyTokenObtainPairSerializer`) instead of loading the User row on every request. A deleted or
+    deactivated user is rejected once its `is_active_user` entry expires, a change of the staff
+    or superuser status applies to the tokens obtained after it. Tokens without these claims,
+    obtained before they were added, are authenticated with the User row.
+    '''
+
+    def get_user(self, validated_token):
+        if not settings.JWT_STATELESS_AUTH or 'is_superuser' not in validated_token:
+            return JWTAuthentication.get_user(self, validated_token)
+        user = super().get_user(validated_token)
+        if not is_active_user(user.id):
+            raise AuthenticationFailed(_('User not found or inactive'), code='user_inactive')
+        return user
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    '''
+    Documents `ClaimsJWTAuthentication` as the bearer JWT scheme of the API schema.
+    '''
+    target_class = ClaimsJWTAuthentication
@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.utils.crypto import salted_hmac
+
+from .isin_cache import LRUCache
+
+UserModel = get_user_model()
+
+# Bounds the password hash computations (PBKDF2 by default) running at once in the process
+hashing_slots = threading.BoundedSemaphore(settings.LOGIN_HASHING_CONCURRENCY)
+
+# Digests of recently verified passwords, see `get_verification_digest`
+verified_passwords = LRUCache(maxsize=settings.LOGIN_VERIFICATION_CACHE_MAXSIZE)
+
+
+@contextmanager
+def hashing_slot(request=None):
+    '''
+    Waits up to LOGIN_HASHING_TIMEOUT seconds for a free hashing slot, so a burst of logins
+    queues instead of taking the CPU of every worker. If none is freed, the request is marked
+    with `login_busy` and PermissionDenied is raised: Django's `authenticate` stops at it and
+    returns None, so a form login (the admin) fails like a wrong password, and the API login
+    answers with 503 (see `MyTokenObtainPairSerializer`).
+    '''
+    if not hashing_slots.acquire(timeout=settings.LOGIN_HASHING_TIMEOUT):
+        if request is not None:
+            request.login_busy = True
+        raise PermissionDenied('Too many logins in progress.')
+    try:
+        yield
+    finally:
+        hashing_slots.release()
+
+
+def get_verification_digest(user, password: str) -> str:
+    '''
+    Returns an HMAC of the password and the stored password hash (which contains its salt), keyed
+    by SECRET_KEY. It changes with the password, and the password can't be recovered from it.
+    '''
+    return salted_hmac(
+        'bond_service_api.backends.verified_password', f'{user.pk}:{user.password}:{password}', algorithm='sha256',
+    ).hexdigest()
+
+
+class CachedPasswordModelBackend(ModelBackend):
+    '''
+    ModelBackend that verifies passwords in a bounded number of hashing slots (see `hashing_slot`)
+    and remembers the successful verifications for LOGIN_VERIFICATION_CACHE_TTL seconds, so
+    repeated logins of a user skip the hash computation. Wrong passwords are always hashed.
+    '''
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            with hashing_slot(request):
+                UserModel().set_password(password)
+            return None
+        verified = verified_passwords.get(get_verification_digest(user, password), False)
+        if not verified:
+            with hashing_slot(request):
+                verified = user.check_password(password)
+            if verified:
+                # check_password upgrades an outdated hash, so the digest is computed after it
+                verified_passwords.set(
+                    get_verification_digest(user, password), True, settings.LOGIN_VERIFICATION_CACHE_TTL,
+                )
+        if verified and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,130 @@
+import heapq
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from dateutil.relativedelta import relativedelta
+from django.db.models.query import QuerySet
+
+from .models import Bond
+
+COUPON = 'coupon'
+PRINCIPAL = 'principal'
+CENT = Decimal('0.01')
+
+
+class CashFlow(NamedTuple):
+    '''
+    CashFlow: A single projected payment of a bond.
+
+    Attributes:
+        date (date): The payment date.
+        bond_id (int): The id of the paying bond.
+        portfolio_id (int): The id of the portfolio holding the bond.
+        kind (str): 'coupon' or 'principal'.
+        amount (Decimal): The paid amount, rounded to cents.
+    '''
+    date: date
+    bond_id: int
+    portfolio_id: int
+    kind: str
+    amount: Decimal
+
+    def as_dict(self) -> dict:
+        return {
+            'date': self.date.isoformat(),
+            'bond_id': self.bond_id,
+            'portfolio_id': self.portfolio_id,
+            'kind': self.kind,
+            'amount': str(self.amount),
+        }
+
+
+def coupon_periods_after(maturity_date: date, after: date, months: int) -> int:
+    '''
+    Returns the number of coupon periods between `after` (exclusive) and the maturity date,
+    i.e. the largest k such that `maturity_date - k * months` is still after `after`.
+    '''
+    elapsed_months = (maturity_date.year - after.year) * 12 + maturity_date.month - after.month
+    periods = max(elapsed_months // months + 1, 0)
+    while periods and maturity_date - relativedelta(months=periods * months) <= after:
+        periods -= 1
+    return periods
+
+
+def bond_cash_flows(
+    bond: Bond,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Iterator[CashFlow]:
+    '''
+    Lazily generates the coupon and principal payments of a bond in date order.
+
+    The coupon dates are anchored on the maturity date and step back by 12 / yields_frequency
+    months, so the last coupon is paid together with the principal at maturity. Only the coupons
+    after the purchase date are paid. Every coupon pays bond_value * interest_rate / 100 /
+    yields_frequency.
+
+    Args:
+        bond (Bond): The bond.
+        start_date (date): The first payment date to generate (inclusive), the purchase date by default.
+        end_date (date): The last payment date to generate (inclusive), the maturity date by default.
+
+    Yields:
+        CashFlow: The payments of the bond, ordered by date.
+    '''
+    months = 12 // bond.yields_frequency
+    after = bond.purchase_date
+    if start_date is not None:
+        after = max(after, start_date - timedelta(days=1))
+    coupon = (bond.bond_value * bond.interest_rate / 100 / bond.yields_frequency).quantize(CENT)
+    for period in range(coupon_periods_after(bond.maturity_date, after, months), -1, -1):
+        payment_date = bond.maturity_date - relativedelta(months=period * months)
+        if end_date is not None and payment_date > end_date:
+            return
+        if payment_date <= after:
+            continue
+        yield CashFlow(payment_date, bond.pk, bond.portfolio_id, COUPON, coupon)
+    if bond.maturity_date > after:
+        yield CashFlow(bond.maturity_date, bond.pk, bond.portfolio_id, PRINCIPAL, bond.bond_value)
+
+
+def merge_cash_flows(schedules: Iterable[Iterator[CashFlow]]) -> Iterator[CashFlow]:
+    '''
+    Merges bond schedules into one schedule ordered by date, bond and kind (coupon before principal).
+    Only the next payment of every bond is held in memory.
+    '''
+    return heapq.merge(*schedules, key=lambda cash_flow: (cash_flow.date, cash_flow.bond_id, cash_flow.kind))
+
+
+def portfolio_cash_flows(
+    bonds: QuerySet[Bond],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Iterator[CashFlow]:
+    '''
+    Generates the merged payment schedule of the given bonds, usually the bonds of one portfolio.
+
+    Bonds that don't pay anything in the date range are filtered out by the database and the
+    remaining bonds are loaded with only the columns needed for the schedule. The merge needs
+    the next payment of every bond, so all bonds and their schedule generators are held in
+    memory: the cost is O(bonds), only the payments themselves are generated lazily. The bonds
+    are loaded before this function returns, so consuming the schedule doesn't query the database.
+
+    Args:
+        bonds (QuerySet[Bond]): The bonds.
+        start_date (date): The first payment date (inclusive), unlimited by default.
+        end_date (date): The last payment date (inclusive), unlimited by default.
+
+    Yields:
+        CashFlow: The payments of all bonds, ordered by date.
+    '''
+    if start_date is not None:
+        bonds = bonds.filter(maturity_date__gte=start_date)
+    if end_date is not None:
+        bonds = bonds.filter(purchase_date__lt=end_date)
+    bonds = bonds.only(
+        'pk', 'portfolio_id', 'bond_value', 'interest_rate', 'purchase_date', 'maturity_date', 'yields_frequency',
+    ).order_by('pk')
+    schedules = [bond_cash_flows(bond, start_date, end_date) for bond in bonds]
+    return merge_cash_flows(schedules)
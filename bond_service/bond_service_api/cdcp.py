@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+
+class CDCPError(Exception):
+    '''
+    Raised when the central depository API rejects a request.
+    '''
+
+
+class CDCPUnavailable(CDCPError):
+    '''
+    Raised when the central depository API can't be reached or answers with a server error.
+    '''
+
+
+class CircuitBreakerOpen(CDCPUnavailable):
+    '''
+    Raised instead of calling the central depository API while the circuit breaker is open.
+    '''
+
+
+class CircuitBreaker:
+    '''
+    CircuitBreaker: Stops calling a failing service for a while.
+
+    The breaker opens after `failure_threshold` consecutive failures. While it is open,
+    calls are rejected without touching the network. After `reset_timeout` seconds it lets
+    a single trial call through (half-open): a success closes the breaker, a failure opens
+    it again.
+
+    Attributes:
+        failure_threshold (int): The number of consecutive failures that opens the breaker.
+        reset_timeout (float): How long (in seconds) the breaker stays open.
+    '''
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    log.warning('Circuit breaker opened after %d failures', self.failures)
+                self.opened_at = time.monotonic()
+
+
+class CDCPClient:
+    '''
+    CDCPClient: A client of the central depository (CDCP) public API.
+
+    All calls share one keep-alive connection pool, are bounded by connect/read timeouts,
+    are retried with exponential backoff on connection errors and 502/503/504 responses, and
+    go through a circuit breaker.
+
+    Attributes:
+        base_url (str): The URL of the CDCP public JSON API.
+        timeout (tuple): The (connect, read) timeouts in seconds.
+        breaker (CircuitBreaker): The circuit breaker guarding the API.
+    '''
+
+    def __init__(self, base_url: str, connect_timeout: float, read_timeout: float, retries: int,
+                 backoff_factor: float, pool_maxsize: int, breaker: CircuitBreaker):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.breaker = breaker
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self.create_session()
+        return self._session
+
+    def create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def isin_exists(self, isin: str) -> bool:
+        '''
+        Looks the ISIN up in the list of issued ISINs.
+
+        Returns:
+            bool: True if the ISIN is issued, False otherwise.
+
+        Raises:
+            CircuitBreakerOpen: If the breaker is open and the API is not called.
+            CDCPUnavailable: If the API can't be reached or answers with a server error.
+            CDCPError: If the API rejects the request.
+        '''
+        data = self.get('VydaneISINy', params={'isin': isin})
+        return bool(data.get('vydaneisiny'))
+
+    def get(self, endpoint: str, params: dict) -> dict:
+        import requests
+
+        if not self.breaker.allow_request():
+            raise CircuitBreakerOpen('The central depository API is temporarily unavailable.')
+        try:
+            response = self.session.get(f'{self.base_url}/{endpoint}', params=params, timeout=self.timeout)
+        except requests.RequestException as error:
+            self.breaker.record_failure()
+            raise CDCPUnavailable(f'API request error: {error}') from error
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise CDCPUnavailable(f'API request error: {response.status_code}')
+        if not response.ok:
+            self.breaker.record_success()
+            raise CDCPError(f'API request error: {response.status_code}')
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            # E.g. a maintenance page served with 200, the API is not really answering
+            self.breaker.record_failure()
+            raise CDCPUnavailable('API request error: the response is not a JSON object')
+        self.breaker.record_success()
+        return data
+
+
+@lru_cache(maxsize=None)
+def get_cdcp_client() -> CDCPClient:
+    '''
+    Returns the process-wide CDCP client configured by the `CDCP_*` settings.
+    '''
+    return CDCPClient(
+        base_url=settings.CDCP_API_URL,
+        connect_timeout=settings.CDCP_CONNECT_TIMEOUT,
+        read_timeout=settings.CDCP_READ_TIMEOUT,
+        retries=settings.CDCP_RETRIES,
+        backoff_factor=settings.CDCP_BACKOFF_FACTOR,
+        pool_maxsize=settings.CDCP_POOL_MAXSIZE,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.CDCP_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.CDCP_BREAKER_RESET_TIMEOUT,
+        ),
+    )
@@ -0,0 +1,43 @@
+from itertools import islice
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+from .models import Bond
+from .readers import RowEncoder
+from .serializers import BondSerializer
+
+
+class BondExporter:
+    '''
+    BondExporter: Streams bonds as rows with the same fields and values as `BondSerializer`.
+
+    The bonds are read with `values_list` and `iterator(chunk_size=...)`, which uses a server-side
+    cursor, and converted to rows by a `RowEncoder` without building serializer or model instances.
+    Only one chunk of bonds is held in memory, whatever the size of the export.
+
+    Attributes:
+        chunk_size (int): The number of bonds fetched from the database and written together,
+                          `BOND_EXPORT_CHUNK_SIZE` by default.
+    '''
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size or settings.BOND_EXPORT_CHUNK_SIZE
+        self.encoder = RowEncoder(BondSerializer)
+
+    def rows(self, bonds: QuerySet[Bond]) -> Iterator[Dict]:
+        '''
+        Yields the bonds ordered by id as dicts equal to their `BondSerializer` data.
+        '''
+        values = bonds.order_by('pk').values_list(*self.encoder.lookups)
+        for row in values.iterator(chunk_size=self.chunk_size):
+            yield self.encoder.encode(row)
+
+    def stream(self, bonds: QuerySet[Bond], renderer) -> Iterator[str]:
+        '''
+        Yields the bonds encoded by the renderer (see `renderers.py`), one chunk of bonds per item.
+        '''
+        lines = renderer.stream(self.rows(bonds))
+        while chunk := ''.join(islice(lines, self.chunk_size)):
+            yield chunk
@@ -0,0 +1,37 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+
+class StreamingASGIHandler(ASGIHandler):
+    '''
+    StreamingASGIHandler: Django's ASGIHandler that reads streaming responses in a thread.
+
+    Django 4.0 iterates the iterator of a StreamingHttpResponse on the event loop, so a lazy
+    queryset in it (the bond export) fails with SynchronousOnlyOperation, and any blocking step
+    blocks every request of the worker. Here every part is read with `sync_to_async`, in the
+    thread that ran the sync view of the request (the handler runs each request in its own
+    ThreadSensitiveContext), so the iterator keeps the database connection of the view.
+    '''
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        # The same messages as ASGIHandler.send_response
+        response_headers = []
+        for header, value in response.items():
+            if isinstance(header, str):
+                header = header.encode('ascii')
+            if isinstance(value, str):
+                value = value.encode('latin1')
+            response_headers.append((bytes(header), bytes(value)))
+        for c in response.cookies.values():
+            response_headers.append((b'Set-Cookie', c.output(header='').encode('ascii').strip()))
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': response_headers})
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        # StopIteration can't be raised through a future, the end is marked with None
+        while (part := await next_part(parts, None)) is not None:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,173 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .models import Bond, Portfolio
+from .serializers import BondImportSerializer
+from .summaries import add_created_bonds
+from .validators import validate_isin
+from .versions import invalidate_portfolios
+
+log = logging.getLogger(__name__)
+
+Row = Tuple[int, dict]
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def check_isin(isin: str) -> Optional[List[str]]:
+    try:
+        validate_isin(isin)
+    except DjangoValidationError as error:
+        return error.messages
+    return None
+
+
+class BondImporter:
+    '''
+    BondImporter: Imports bonds from an iterable of row dicts.
+
+    Rows are consumed lazily in batches of `BOND_IMPORT_BATCH_SIZE`. For every batch the
+    distinct ISINs are validated concurrently, the uniqueness of names and ISINs and the
+    ownership of the target portfolios are checked with one query each, and the valid rows
+    are inserted with a single `bulk_create` in their own transaction. Invalid rows don't
+    stop the import, they are collected into a per-row error report.
+
+    Attributes:
+        user (User): The user importing the bonds. Bonds can only be imported into
+                     portfolios created by this user.
+        batch_size (int): The number of rows validated and inserted together.
+        isin_workers (int): The number of concurrent ISIN lookups.
+    '''
+
+    def __init__(self, user: User, batch_size: Optional[int] = None, isin_workers: Optional[int] = None):
+        self.user = user
+        self.batch_size = batch_size or settings.BOND_IMPORT_BATCH_SIZE
+        self.isin_workers = isin_workers or settings.BOND_IMPORT_ISIN_WORKERS
+        self.serializer = BondImportSerializer()
+        self.portfolio_owners: Dict[int, int] = {}
+        self.created = 0
+        self.errors: List[Dict] = []
+        self.executor = None
+
+    def run(self, rows: Iterable) -> Dict:
+        '''
+        Imports the rows and returns the import report.
+
+        Returns:
+            Dict: A dictionary with the following keys:
+                - 'created' (int): The number of imported bonds.
+                - 'failed' (int): The number of rejected rows.
+                - 'errors' (list): The errors of the rejected rows, each with the 1-based
+                  'row' number and the 'errors' of its fields.
+        '''
+        with ThreadPoolExecutor(max_workers=self.isin_workers) as executor:
+            self.executor = executor
+            for batch in batched(enumerate(rows, start=1), self.batch_size):
+                self.import_batch(batch)
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def import_batch(self, batch: List[Row]) -> None:
+        validated = []
+        for number, row in batch:
+            try:
+                validated.append((number, self.serializer.run_validation(row)))
+            except ValidationError as error:
+                self.add_error(number, error.detail)
+        isin_errors = self.validate_isins(data['emission_isin'] for _, data in validated)
+        taken_names, taken_isins = self.find_taken(validated)
+        self.load_portfolio_owners(data['portfolio'] for _, data in validated)
+        bonds = []
+        for number, data in validated:
+            errors = self.check_row(data, isin_errors, taken_names, taken_isins)
+            if errors:
+                self.add_error(number, errors)
+                continue
+            taken_names.add(data['emission_name'])
+            taken_isins.add(data['emission_isin'])
+            bonds.append((number, self.build_bond(data)))
+        if bonds:
+            self.insert(bonds)
+
+    def validate_isins(self, isins: Iterable[str]) -> Dict[str, List[str]]:
+        unique_isins = list(set(isins))
+        results = self.executor.map(check_isin, unique_isins)
+        return {isin: errors for isin, errors in zip(unique_isins, results) if errors}
+
+    def find_taken(self, validated: List[Row]) -> Tuple[set, set]:
+        if not validated:
+            return set(), set()
+        names = [data['emission_name'] for _, data in validated]
+        isins = [data['emission_isin'] for _, data in validated]
+        taken = Bond.objects.filter(
+            Q(emission_name__in=names) | Q(emission_isin__in=isins)
+        ).values_list('emission_name', 'emission_isin')
+        taken_names, taken_isins = set(), set()
+        for name, isin in taken:
+            taken_names.add(name)
+            taken_isins.add(isin)
+        return taken_names, taken_isins
+
+    def load_portfolio_owners(self, portfolio_ids: Iterable[int]) -> None:
+        missing = set(portfolio_ids) - self.portfolio_owners.keys()
+        if missing:
+            self.portfolio_owners.update(
+                Portfolio.objects.filter(pk__in=missing).values_list('pk', 'created_by_id')
+            )
+
+    def check_row(self, data: Dict, isin_errors: Dict, taken_names: set, taken_isins: set) -> Dict:
+        errors = {}
+        if data['emission_name'] in taken_names:
+            errors['emission_name'] = ['bond with this emission name already exists.']
+        if data['emission_isin'] in taken_isins:
+            errors['emission_isin'] = ['bond with this emission isin already exists.']
+        elif data['emission_isin'] in isin_errors:
+            errors['emission_isin'] = isin_errors[data['emission_isin']]
+        if self.portfolio_owners.get(data['portfolio']) != self.user.pk:
+            errors['portfolio'] = ['You do not have permission to create a bond in this portfolio.']
+        return errors
+
+    def build_bond(self, data: Dict) -> Bond:
+        fields = dict(data)
+        fields['portfolio_id'] = fields.pop('portfolio')
+        return Bond(**fields)
+
+    def insert(self, bonds: List[Tuple[int, Bond]]) -> None:
+        try:
+            with transaction.atomic():
+                Bond.objects.bulk_create([bond for _, bond in bonds])
+                # bulk_create doesn't send post_save, so the summaries and the cached analysis are updated here
+                add_created_bonds(bond for _, bond in bonds)
+            self.created += len(bonds)
+            invalidate_portfolios(bond.portfolio_id for _, bond in bonds)
+        except IntegrityError:
+            log.warning('Bulk insert of %d bonds failed, inserting them one by one', len(bonds))
+            self.insert_one_by_one(bonds)
+
+    def insert_one_by_one(self, bonds: List[Tuple[int, Bond]]) -> None:
+        for number, bond in bonds:
+            try:
+                with transaction.atomic():
+                    bond.save(force_insert=True)
+                self.created += 1
+            except IntegrityError as error:
+                self.add_error(number, {'non_field_errors': [str(error).strip()]})
+
+    def add_error(self, number: int, errors) -> None:
+        self.errors.append({'row': number, 'errors': errors})
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+log = logging.getLogger(__name__)
+
+
+class LRUCache:
+    '''
+    LRUCache: A thread-safe in-process least-recently-used cache with per-entry expiry.
+
+    Attributes:
+        maxsize (int): The maximum number of entries kept. The least recently used entry
+                       is evicted when the limit is exceeded.
+    '''
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class ISINValidationCache:
+    '''
+    ISINValidationCache: A two-tier cache of ISIN lookup results.
+
+    The first tier is an in-process LRU cache, the second one is the shared Django cache
+    configured by `ISIN_CACHE_ALIAS` (Redis in deployments, local memory otherwise).
+    Both positive (ISIN found) and negative (ISIN not found) results are stored, each with
+    its own TTL. Errors of the shared tier are logged and treated as a miss, so an
+    unavailable Redis never breaks bond validation.
+
+    Attributes:
+        counters (Counter): Hit/miss counters ('local_hit', 'shared_hit', 'miss').
+    '''
+    key_prefix = 'isin_validation'
+
+    def __init__(self, maxsize: int, positive_ttl: int, negative_ttl: int, cache_alias: str):
+        self.local = LRUCache(maxsize)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+        self.counters = Counter()
+        # The bulk importer validates ISINs from a thread pool, Counter updates aren't atomic
+        self._counters_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, isin: str) -> str:
+        return f'{self.key_prefix}:{isin}'
+
+    def get_ttl(self, found: bool) -> int:
+        return self.positive_ttl if found else self.negative_ttl
+
+    def get(self, isin: str) -> Optional[bool]:
+        '''
+        Returns the cached lookup result for the ISIN, or None if it is not cached.
+        '''
+        found = self.local.get(isin)
+        if found is not None:
+            self.count('local_hit', isin)
+            return found
+        try:
+            found = self.shared.get(self.make_key(isin))
+        except Exception:
+            log.warning('Shared ISIN cache is unavailable', exc_info=True)
+            found = None
+        if found is not None:
+            self.count('shared_hit', isin)
+            self.local.set(isin, found, self.get_ttl(found))
+            return found
+        self.count('miss', isin)
+        return None
+
+    def set(self, isin: str, found: bool) -> None:
+        ttl = self.get_ttl(found)
+        self.local.set(isin, found, ttl)
+        try:
+            self.shared.set(self.make_key(isin), found, ttl)
+        except Exception:
+            log.warning('Shared ISIN cache is unavailable', exc_info=True)
+
+    def count(self, event: str, isin: str) -> None:
+        with self._counters_lock:
+            self.counters[event] += 1
+        log.debug('ISIN cache %s for %s', event, isin)
+
+    def stats(self) -> Dict[str, int]:
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {
+            'local_hit': counters.get('local_hit', 0),
+            'shared_hit': counters.get('shared_hit', 0),
+            'miss': counters.get('miss', 0),
+            'local_size': len(self.local),
+        }
+
+    def clear(self) -> None:
+        '''
+        Clears the in-process tier and the counters. The shared tier is left untouched.
+        '''
+        self.local.clear()
+        with self._counters_lock:
+            self.counters.clear()
+
+
+isin_cache = ISINValidationCache(
+    maxsize=settings.ISIN_CACHE_MAXSIZE,
+    positive_ttl=settings.ISIN_CACHE_POSITIVE_TTL,
+    negative_ttl=settings.ISIN_CACHE_NEGATIVE_TTL,
+    cache_alias=settings.ISIN_CACHE_ALIAS,
+)
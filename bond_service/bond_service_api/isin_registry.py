@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+ISIN_RE = re.compile(r'^[A-Z]{2}[A-Z0-9]{9}[0-9]$')
+
+
+def is_valid_isin_checksum(value: str) -> bool:
+    '''
+    Checks the format and the ISO 6166 check digit of an ISIN.
+
+    Letters are expanded to two-digit numbers (A=10 ... Z=35) and the resulting digit string
+    is verified with the Luhn algorithm.
+
+    Args:
+        value (str): The ISIN to check.
+
+    Returns:
+        bool: True if the ISIN is well-formed and its check digit is correct.
+    '''
+    if not isinstance(value, str) or not ISIN_RE.match(value):
+        return False
+    digits = ''.join(str(int(char, 36)) for char in value)
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        number = int(digit)
+        if index % 2:
+            number *= 2
+            if number > 9:
+                number -= 9
+        total += number
+    return total % 10 == 0
+
+
+class BaseISINRegistry:
+    '''
+    BaseISINRegistry: The interface of a local registry of issued ISINs.
+
+    Methods:
+        contains(isin): Returns True if the ISIN is known to be issued, False if it is known
+                        not to be issued and None if the registry has no answer, in which
+                        case the caller may fall back to the central depository API.
+    '''
+
+    def contains(self, isin: str) -> Optional[bool]:
+        raise NotImplementedError
+
+
+class NullISINRegistry(BaseISINRegistry):
+    '''
+    NullISINRegistry: A registry without any data, every lookup goes to the fallback.
+    '''
+
+    def contains(self, isin: str) -> Optional[bool]:
+        return None
+
+
+class SnapshotISINRegistry(BaseISINRegistry):
+    '''
+    SnapshotISINRegistry: A registry backed by a snapshot file of issued ISINs.
+
+    The snapshot is a text file with one ISIN per line, written by the
+    `refresh_isin_snapshot` management command. It is loaded into a frozenset, so a lookup
+    is a single hash probe. The file is reloaded when its modification time changes, the
+    check is done at most once per `reload_interval` seconds. A missing snapshot behaves
+    like an empty one.
+
+    Attributes:
+        path (str): The path of the snapshot file.
+        reload_interval (float): How often (in seconds) the snapshot file is checked for changes.
+    '''
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.path = path or settings.ISIN_REGISTRY_SNAPSHOT_PATH
+        if reload_interval is None:
+            reload_interval = settings.ISIN_REGISTRY_RELOAD_INTERVAL
+        self.reload_interval = reload_interval
+        self.isins: FrozenSet[str] = frozenset()
+        self._mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def contains(self, isin: str) -> Optional[bool]:
+        self.refresh()
+        return True if isin in self.isins else None
+
+    def refresh(self) -> None:
+        if self.is_fresh():
+            return
+        with self._lock:
+            if self.is_fresh():
+                return
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                mtime = None
+            if mtime != self._mtime:
+                self.isins = frozenset(read_snapshot(self.path)) if mtime is not None else frozenset()
+                self._mtime = mtime
+                log.info('Loaded %d ISINs from %s', len(self.isins), self.path)
+            self._checked_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        checked_at = self._checked_at
+        return checked_at is not None and time.monotonic() - checked_at < self.reload_interval
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.isins)
+
+
+def read_snapshot(path: str) -> Iterable[str]:
+    with open(path, encoding='utf-8') as snapshot:
+        for line in snapshot:
+            isin = line.strip()
+            if isin:
+                yield isin
+
+
+def write_snapshot(path: str, isins: Iterable[str]) -> int:
+    '''
+    Atomically replaces the snapshot file with the given ISINs, sorted and deduplicated.
+
+    Returns:
+        int: The number of ISINs written.
+    '''
+    unique_isins = sorted(set(isins))
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as snapshot:
+        snapshot.writelines(f'{isin}\n' for isin in unique_isins)
+    os.replace(temporary_path, path)
+    return len(unique_isins)
+
+
+@lru_cache(maxsize=None)
+def get_isin_registry() -> BaseISINRegistry:
+    '''
+    Returns the registry configured by the `ISIN_REGISTRY_BACKEND` setting.
+    '''
+    return import_string(settings.ISIN_REGISTRY_BACKEND)()
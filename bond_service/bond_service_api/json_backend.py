@@ -0,0 +1,56 @@
+import json
+from typing import Any
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON = 'orjson'
+STDLIB = 'stdlib'
+
+# Datetimes and dates go through DRF's encoder like with the stdlib renderer, e.g. UTC as 'Z'
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def use_orjson() -> bool:
+    '''
+    Returns True if orjson is installed and selected with API_JSON_BACKEND.
+    '''
+    return orjson is not None and settings.API_JSON_BACKEND == ORJSON
+
+
+def dumps(data: Any) -> bytes:
+    '''
+    Encodes the data to compact JSON like DRF's `JSONRenderer` with the default settings:
+    Decimals, dates, querysets, numpy values and other types unknown to orjson are converted by
+    DRF's `JSONEncoder`, so only floats in exponent notation are written differently (1e16
+    instead of 1e+16). Integers out of the 64-bit range fall back to the stdlib encoder.
+    '''
+    if use_orjson():
+        try:
+            return orjson.dumps(data, default=JSONEncoder().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'),
+    ).encode()
+
+
+def loads(data: bytes) -> Any:
+    '''
+    Decodes UTF-8 JSON. Documents orjson can't decode (including invalid ones, for the stdlib
+    error message) are decoded by the stdlib, which rejects NaN and Infinity the same way.
+    '''
+    if use_orjson():
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data, parse_constant=strict_constant)
@@ -0,0 +1,38 @@
+import logging
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+
+from bond_service_api.summaries import rebuild_portfolio_summaries, verify_portfolio_summaries
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the portfolio summaries from the bonds, or verifies that they match the bonds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'verify'], help='What to do with the summaries.')
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            action='append',
+            dest='portfolio_ids',
+            help='Id of a portfolio to process, may be repeated. All portfolios by default.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if options['action'] == 'rebuild':
+            count = rebuild_portfolio_summaries(options['portfolio_ids'])
+            log.info('Rebuilt %d portfolio summaries', count)
+            self.stdout.write(f'Rebuilt {count} portfolio summaries')
+            return
+        differences = verify_portfolio_summaries(options['portfolio_ids'])
+        for difference in differences:
+            self.stderr.write(
+                f'Portfolio {difference["portfolio_id"]}: expected {difference["expected"]}, '
+                f'found {difference["actual"]}'
+            )
+        if differences:
+            raise CommandError(f'{len(differences)} portfolio summaries do not match their bonds.')
+        self.stdout.write('All portfolio summaries match their bonds')
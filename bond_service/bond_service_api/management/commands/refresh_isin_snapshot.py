@@ -0,0 +1,67 @@
+import json
+import logging
+from typing import Any, Iterable, Iterator
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from bond_service_api.isin_registry import is_valid_isin_checksum, write_snapshot
+
+log = logging.getLogger(__name__)
+
+
+def extract_isins(data: Any) -> Iterator[str]:
+    '''
+    Extracts ISINs from a CDCP `VydaneISINy` payload. Entries of the `vydaneisiny` list
+    may be plain strings or objects with an `isin` key.
+    '''
+    entries = data.get('vydaneisiny', []) if isinstance(data, dict) else data
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            entry = entry.get('isin') or entry.get('ISIN')
+        if isinstance(entry, str):
+            yield entry.strip().upper()
+
+
+class Command(BaseCommand):
+    help = 'Downloads the list of issued ISINs and replaces the local ISIN registry snapshot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            default=settings.ISIN_REGISTRY_SOURCE_URL,
+            help='URL of the CDCP issued ISINs API or a path to a local JSON or text file.',
+        )
+        parser.add_argument(
+            '--output',
+            default=settings.ISIN_REGISTRY_SNAPSHOT_PATH,
+            help='Path of the snapshot file to write.',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        source = options['source']
+        if source.startswith(('http://', 'https://')):
+            isins = self.download(source)
+        else:
+            isins = self.read_file(source)
+        valid_isins = [isin for isin in isins if is_valid_isin_checksum(isin)]
+        if not valid_isins:
+            raise CommandError(f'No valid ISINs found in {source}, the snapshot was not replaced.')
+        count = write_snapshot(options['output'], valid_isins)
+        log.info('ISIN snapshot %s refreshed with %d ISINs', options['output'], count)
+        self.stdout.write(f'Saved {count} ISINs to {options["output"]}')
+
+    def download(self, url: str) -> Iterable[str]:
+        import requests
+
+        response = requests.get(url, timeout=(5, 300))
+        if not response.ok:
+            raise CommandError(f'API request error: {response.status_code}')
+        return list(extract_isins(response.json()))
+
+    def read_file(self, path: str) -> Iterable[str]:
+        with open(path, encoding='utf-8') as source:
+            content = source.read()
+        if content.lstrip().startswith(('{', '[')):
+            return list(extract_isins(json.loads(content)))
+        return [line.strip().upper() for line in content.splitlines() if line.strip()]
@@ -0,0 +1,50 @@
+import csv
+import logging
+import time
+from typing import Any
+
+from django.core.management import BaseCommand
+
+from bond_service_api.analytics import PortfolioAnalyticsEngine, FLOAT_MODE, DECIMAL_MODE
+from bond_service_api.models import Bond
+
+log = logging.getLogger(__name__)
+
+COLUMNS = [
+    'portfolio_id',
+    'bonds_count',
+    'total_value',
+    'average_interest_rate',
+    'nearest_maturity_bond_id',
+    'nearest_maturity_date',
+    'future_value',
+]
+
+
+class Command(BaseCommand):
+    help = 'Values every portfolio with the vectorized analytics engine and writes the valuation as CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=[FLOAT_MODE, DECIMAL_MODE], help='The analytics engine mode.')
+        parser.add_argument('--output', help='Path of the CSV file to write, the standard output by default.')
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        started_at = time.monotonic()
+        engine = PortfolioAnalyticsEngine(mode=options['mode'])
+        columns = engine.load(Bond.objects.all())
+        valuation = engine.value(columns)
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                self.write(output, valuation)
+        else:
+            self.write(self.stdout, valuation)
+        log.info(
+            'Valued %d portfolios (%d bonds) in %.2f s',
+            len(valuation.portfolio_ids), len(columns), time.monotonic() - started_at,
+        )
+
+    def write(self, output, valuation) -> None:
+        writer = csv.writer(output, lineterminator='\n')
+        writer.writerow(COLUMNS)
+        for portfolio_id, row in valuation.as_dict().items():
+            writer.writerow([portfolio_id] + [row[column] for column in COLUMNS[1:]])
@@ -0,0 +1,53 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:13
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def create_portfolio_summaries(apps, schema_editor):
+    Portfolio = apps.get_model('bond_service_api', 'Portfolio')
+    PortfolioSummary = apps.get_model('bond_service_api', 'PortfolioSummary')
+    rows = Portfolio.objects.annotate(
+        bonds_count=Count('bonds'),
+        total_value=Coalesce(Sum('bonds__bond_value'), Decimal(0)),
+        interest_rate_sum=Coalesce(Sum('bonds__interest_rate'), Decimal(0)),
+        nearest_maturity_date=Min('bonds__maturity_date'),
+    ).values_list('pk', 'bonds_count', 'total_value', 'interest_rate_sum', 'nearest_maturity_date')
+    PortfolioSummary.objects.bulk_create(
+        [
+            PortfolioSummary(
+                portfolio_id=pk,
+                bonds_count=bonds_count,
+                total_value=total_value,
+                interest_rate_sum=interest_rate_sum,
+                nearest_maturity_date=nearest_maturity_date,
+            )
+            for pk, bonds_count, total_value, interest_rate_sum, nearest_maturity_date in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bond_service_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('portfolio', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='bond_service_api.portfolio')),
+                ('bonds_count', models.PositiveIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=30)),
+                ('interest_rate_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('nearest_maturity_date', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(create_portfolio_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bond_service_api', '0002_portfoliosummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bond',
+            index=models.Index(fields=['maturity_date', 'id'], name='bond_maturity_date_id_idx'),
+        ),
+    ]
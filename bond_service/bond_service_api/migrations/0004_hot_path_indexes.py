@@ -0,0 +1,39 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bond_service_api', '0003_bond_maturity_date_id_idx'),
+    ]
+
+    operations = [
+        # The composite indexes are created before the single column FK indexes they replace are dropped
+        migrations.AddIndex(
+            model_name='bond',
+            index=models.Index(fields=['portfolio', 'id'], name='bond_portfolio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bond',
+            index=models.Index(fields=['portfolio', 'maturity_date', 'id'], include=('bond_value', 'interest_rate', 'purchase_date', 'yields_frequency'), name='bond_portfolio_maturity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['created_by', 'id'], name='portfolio_created_by_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='bond',
+            name='portfolio',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bonds', to='bond_service_api.portfolio'),
+        ),
+        migrations.AlterField(
+            model_name='portfolio',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bond_service_api', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bond',
+            index=models.Index(fields=['interest_rate', 'id'], name='bond_interest_rate_id_idx'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from .validators import validate_isin
 
@@ -35,10 +35,17 @@ class Portfolio(models.Model):
         __str__(): Returns the name of the portfolio as a string representation.
     '''
     name = models.CharField(max_length=255, unique=True, null=False, blank=False)
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed by the composite portfolio_created_by_id_idx
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     created_at = models.DateField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # The portfolios of a user ordered by id, also the first step of the join from bonds to the owner
+            models.Index(fields=['created_by', 'id'], name='portfolio_created_by_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -87,9 +94,58 @@ class Bond(models.Model):
         null=False,
         blank=False
     )
-    portfolio = models.ForeignKey(Portfolio, related_name='bonds', on_delete=models.CASCADE)
+    # Indexed by the composite bond_portfolio_id_idx and bond_portfolio_maturity_idx
+    portfolio = models.ForeignKey(Portfolio, related_name='bonds', on_delete=models.CASCADE, db_index=False)
     created_at = models.DateField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the bond list ordered by maturity date
+            models.Index(fields=['maturity_date', 'id'], name='bond_maturity_date_id_idx'),
+            # The bonds of a portfolio ordered by id: nested bonds, bond lists of a user
+            models.Index(fields=['portfolio', 'id'], name='bond_portfolio_id_idx'),
+            # The bonds of a portfolio ordered by maturity date (nearest maturity bond, maturity filters),
+            # covering the columns read by the analytics engine, the summaries and the cash flows
+            models.Index(
+                fields=['portfolio', 'maturity_date', 'id'],
+                include=['bond_value', 'interest_rate', 'purchase_date', 'yields_frequency'],
+                name='bond_portfolio_maturity_idx',
+            ),
+            # Interest rate range filters of the bond list. The yields frequency has only three
+            # values, so it is filtered on the rows selected by the other indexes instead
+            models.Index(fields=['interest_rate', 'id'], name='bond_interest_rate_id_idx'),
+        ]
+
     def __str__(self):
         return self.emission_name
+
+    def save(self, *args, **kwargs):
+        # The portfolio summary is updated by the post_save signal, in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class PortfolioSummary(models.Model):
+    '''
+    PortfolioSummary: The aggregates of the bonds of a portfolio, maintained incrementally.
+
+    The summary is updated with F-expressions in the same transaction as every bond change
+    (see `summaries.py`), so reading the aggregates doesn't scan the bonds of the portfolio.
+    It can be rebuilt or verified with the `portfolio_summaries` management command.
+
+    Attributes:
+        portfolio (OneToOneField): The summarized portfolio, also the primary key.
+        bonds_count (PositiveIntegerField): The number of bonds in the portfolio.
+        total_value (DecimalField): The sum of the bond values.
+        interest_rate_sum (DecimalField): The sum of the bond interest rates.
+        nearest_maturity_date (DateField): The earliest maturity date, null for an empty portfolio.
+    '''
+    portfolio = models.OneToOneField(Portfolio, primary_key=True, related_name='summary', on_delete=models.CASCADE)
+    bonds_count = models.PositiveIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    interest_rate_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    nearest_maturity_date = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Summary of portfolio {self.portfolio_id}'
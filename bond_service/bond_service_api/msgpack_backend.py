@@ -0,0 +1,40 @@
+from decimal import Decimal
+from typing import Any
+
+import msgpack
+from msgpack import ExtType
+from rest_framework.utils.encoders import JSONEncoder
+
+# The MessagePack extension type of Decimals, packed as their exact string representation
+DECIMAL_EXT_TYPE = 1
+
+
+def encode_default(obj: Any) -> Any:
+    '''
+    Packs Decimals losslessly as the DECIMAL_EXT_TYPE extension, other types unknown to
+    MessagePack (dates, datetimes, querysets, numpy values...) as DRF's `JSONEncoder` does.
+    '''
+    if isinstance(obj, Decimal):
+        return ExtType(DECIMAL_EXT_TYPE, str(obj).encode())
+    return JSONEncoder().default(obj)
+
+
+def decode_ext(code: int, data: bytes) -> Any:
+    if code == DECIMAL_EXT_TYPE:
+        try:
+            return Decimal(data.decode())
+        except (ArithmeticError, UnicodeDecodeError):
+            raise ValueError('Invalid Decimal extension.')
+    return ExtType(code, data)
+
+
+def packb(data: Any) -> bytes:
+    return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
+
+
+def unpackb(data: bytes) -> Any:
+    '''
+    Unpacks a MessagePack document, DECIMAL_EXT_TYPE extensions to Decimals. Maps may have
+    integer keys, like the portfolio ids of the batch analysis.
+    '''
+    return msgpack.unpackb(data, ext_hook=decode_ext, raw=False, strict_map_key=False)
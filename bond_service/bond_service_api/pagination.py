@@ -0,0 +1,86 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    '''
+    KeysetCursorPagination: Cursor (keyset) pagination without a total count.
+
+    Every page is selected with a WHERE condition on the ordering columns of the previous page,
+    so a deep page costs the same as the first one. The ordering is chosen with the `ordering`
+    query parameter among `orderings`, every ordering ends with the primary key so it is unique.
+
+    Attributes:
+        orderings (dict): The allowed orderings, keyed by the `ordering` parameter value. The first
+                          one is the default.
+    '''
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+    orderings = {
+        'pk': ('pk',),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        name = request.query_params.get('ordering', next(iter(self.orderings)))
+        if name not in self.orderings:
+            raise ValidationError({'ordering': [f'Expected one of: {", ".join(self.orderings)}.']})
+        return self.orderings[name]
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': 'ordering',
+            'required': False,
+            'in': 'query',
+            'description': f'Cursor pagination ordering, one of: {", ".join(self.orderings)}.',
+            'schema': {'type': 'string', 'enum': list(self.orderings)},
+        })
+        return parameters
+
+
+class BondCursorPagination(KeysetCursorPagination):
+    orderings = {
+        'pk': ('pk',),
+        'maturity_date': ('maturity_date', 'pk'),
+    }
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    '''
+    OptionalCursorPagination: Limit/offset pagination with an opt-in cursor mode.
+
+    Requests with `pagination=cursor` (or with a `cursor` returned by a previous page) are
+    paginated by the view's `cursor_pagination_class`, other requests keep the default
+    limit/offset pagination with a total count.
+    '''
+    cursor_mode = 'cursor'
+
+    def use_cursor(self, request) -> bool:
+        return (
+            request.query_params.get('pagination') == self.cursor_mode
+            or 'cursor' in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = view.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': 'pagination',
+            'required': False,
+            'in': 'query',
+            'description': "'cursor' for keyset pagination without a total count, ordered by an indexed column.",
+            'schema': {'type': 'string', 'enum': [self.cursor_mode]},
+        })
+        cursor_parameters = view.cursor_pagination_class().get_schema_operation_parameters(view)
+        return parameters + [parameter for parameter in cursor_parameters if parameter['name'] != 'limit']
@@ -0,0 +1,79 @@
+import codecs
+import csv
+from typing import Any, Iterator
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from . import json_backend, msgpack_backend
+
+
+class CSVParser(BaseParser):
+    '''
+    Parses a CSV body with a header row into a lazy iterator of row dicts.
+
+    The body is decoded and parsed line by line while the iterator is consumed,
+    so large uploads are never loaded into memory at once.
+    '''
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None) -> Iterator[dict]:
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return csv.DictReader(codecs.iterdecode(stream, encoding))
+
+
+class JSONLinesParser(BaseParser):
+    '''
+    Parses a JSON Lines body (one JSON document per line) into a lazy iterator.
+
+    Blank lines are skipped. A line that is not valid JSON is yielded as the raw string,
+    so the caller can report it as an invalid row instead of failing the whole body.
+    '''
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None) -> Iterator[Any]:
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self.iter_lines(codecs.iterdecode(stream, encoding))
+
+    def iter_lines(self, lines) -> Iterator[Any]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json_backend.loads(line)
+            except ValueError:
+                yield line
+
+
+class FastJSONParser(JSONParser):
+    '''
+    A `JSONParser` decoding with orjson (see `json_backend.py`). Bodies in other encodings
+    than UTF-8 are decoded by the stock parser.
+    '''
+
+    def parse(self, stream, media_type=None, parser_context=None) -> Any:
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8' or not json_backend.use_orjson():
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return json_backend.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackParser(BaseParser):
+    '''
+    Parses a MessagePack body, Decimal extensions to Decimals (see `msgpack_backend.py`).
+    '''
+    media_type = 'application/x-msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None) -> Any:
+        try:
+            return msgpack_backend.unpackb(stream.read())
+        except ValueError as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
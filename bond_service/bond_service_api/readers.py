@@ -0,0 +1,180 @@
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models.query import QuerySet
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+
+from .serializers import (
+    BondSerializer,
+    PortfolioSerializer,
+    PortfolioSummarySerializer,
+    UsersListSerializer,
+    UserSerializer,
+)
+from .utils import get_portfolio_bonds
+
+Encoder = Callable[[object], object]
+
+
+def get_encoder(field: serializers.Field) -> Optional[Encoder]:
+    '''
+    Returns a function converting a database value to the representation of the serializer
+    field, or None if the value is represented as is.
+    '''
+    if isinstance(field, serializers.DecimalField):
+        return str
+    if isinstance(field, serializers.DateTimeField):
+        return field.to_representation
+    if isinstance(field, serializers.DateField):
+        return lambda value: value.isoformat()
+    return None
+
+
+class RowEncoder:
+    '''
+    RowEncoder: Converts `values_list` rows to the data of a ModelSerializer.
+
+    The lookups and the value encoders are computed once from the serializer fields, so a row is
+    encoded by a single loop over precomputed columns instead of DRF's field by field serialization.
+    Nested serializers and many-to-many fields can't be read from one row, their keys are set
+    to None in the encoded row and filled by the `RowReader`. Only the `fields` of the serializer
+    are encoded if they are given (see `DynamicFieldsModelSerializer`).
+
+    Attributes:
+        lookups (List[str]): The `values_list` lookups of the encoded columns.
+        deferred (List[Tuple[str, serializers.Field]]): The fields filled by the reader.
+    '''
+
+    def __init__(
+        self,
+        serializer_class: type,
+        prefix: str = '',
+        start: int = 0,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        self.lookups: List[str] = []
+        self.deferred: List[Tuple[str, serializers.Field]] = []
+        self.columns: List[Tuple[str, Optional[int], Optional[Encoder]]] = []
+        serializer = serializer_class() if fields is None else serializer_class(fields=fields)
+        for name, field in serializer.fields.items():
+            if isinstance(field, (serializers.BaseSerializer, ManyRelatedField)):
+                self.deferred.append((name, field))
+                self.columns.append((name, None, None))
+                continue
+            self.columns.append((name, start + len(self.lookups), get_encoder(field)))
+            self.lookups.append(prefix + field.source.replace('.', '__'))
+
+    def encode(self, values: Sequence) -> Dict:
+        row = {}
+        for name, index, encode in self.columns:
+            value = None if index is None else values[index]
+            row[name] = value if value is None or encode is None else encode(value)
+        return row
+
+
+class RowReader:
+    '''
+    RowReader: The read-only fast path of the list and detail endpoints.
+
+    `values` turns the queryset of a view into a `values_list` queryset of named rows, which
+    the paginators accept like model instances, and `read` encodes a page of rows to the same
+    data as `serializer_class`. Many-to-many fields are loaded with one query per field for
+    the whole page.
+
+    Attributes:
+        serializer_class (type): The serializer whose output is reproduced, it must accept the
+                                 `fields` argument of `DynamicFieldsModelSerializer` if fields
+                                 are selected.
+        extra_lookups (Tuple[str]): Lookups needed besides the serialized columns, e.g. for
+                                    the cursor pagination.
+    '''
+    serializer_class = None
+    extra_lookups = ('pk',)
+
+    def __init__(self, fields: Optional[Sequence[str]] = None):
+        self.encoder = RowEncoder(self.serializer_class, fields=fields)
+        self.lookups = self.encoder.lookups + [
+            lookup for lookup in self.extra_lookups if lookup not in self.encoder.lookups
+        ]
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        return queryset.values_list(*self.lookups, named=True)
+
+    def read(self, rows: Iterable) -> List[Dict]:
+        rows = list(rows)
+        data = [self.encoder.encode(row) for row in rows]
+        for name, field in self.encoder.deferred:
+            if isinstance(field, ManyRelatedField):
+                self.read_many_related(name, field, rows, data)
+        return data
+
+    def read_many_related(self, name: str, field: ManyRelatedField, rows: List, data: List[Dict]) -> None:
+        model_field = self.serializer_class.Meta.model._meta.get_field(field.source)
+        through = model_field.remote_field.through
+        source_column = f'{model_field.m2m_field_name()}_id'
+        target_column = f'{model_field.m2m_reverse_field_name()}_id'
+        related = through.objects.filter(**{f'{source_column}__in': [row.pk for row in rows]})
+        related_pks: Dict[int, List[int]] = {}
+        for pk, related_pk in related.order_by('pk').values_list(source_column, target_column):
+            related_pks.setdefault(pk, []).append(related_pk)
+        for row, row_data in zip(rows, data):
+            row_data[name] = related_pks.get(row.pk, [])
+
+
+class UsersListRowReader(RowReader):
+    serializer_class = UsersListSerializer
+
+
+class UserRowReader(RowReader):
+    serializer_class = UserSerializer
+
+
+class BondRowReader(RowReader):
+    serializer_class = BondSerializer
+    # The columns of the cursor pagination orderings
+    extra_lookups = ('pk', 'maturity_date')
+
+
+class PortfolioRowReader(RowReader):
+    '''
+    Reads portfolios with their summary (joined in the same row) and their bonds, loaded for
+    the whole page with one query and limited to `bonds_limit` bonds per portfolio. The summary
+    and the bonds are only read if their fields are selected.
+    '''
+    serializer_class = PortfolioSerializer
+
+    def __init__(self, bonds_limit: Optional[int] = None, fields: Optional[Sequence[str]] = None):
+        super().__init__(fields=fields)
+        deferred = {name for name, _ in self.encoder.deferred}
+        self.with_bonds = 'bonds' in deferred
+        self.with_summary = 'summary' in deferred
+        self.bonds_limit = bonds_limit
+        self.bond_reader = BondRowReader()
+        self.summary_encoder = RowEncoder(PortfolioSummarySerializer, prefix='summary__', start=len(self.lookups))
+        if self.with_summary:
+            self.lookups += self.summary_encoder.lookups + ['summary__pk']
+
+    def read(self, rows: Iterable) -> List[Dict]:
+        rows = list(rows)
+        data = super().read(rows)
+        if self.with_bonds:
+            self.read_bonds(rows, data)
+        if self.with_summary:
+            for row, row_data in zip(rows, data):
+                row_data['summary'] = None if row.summary__pk is None else self.summary_encoder.encode(row)
+        return data
+
+    def read_bonds(self, rows: List, data: List[Dict]) -> None:
+        bonds = {}
+        if rows:
+            bond_rows = self.bond_reader.values(get_portfolio_bonds([row.pk for row in rows], limit=self.bonds_limit))
+            bonds = {
+                portfolio_pk: list(portfolio_bonds)
+                for portfolio_pk, portfolio_bonds in groupby(
+                    sorted(self.bond_reader.read(bond_rows), key=lambda bond: bond['portfolio']),
+                    key=lambda bond: bond['portfolio'],
+                )
+            }
+        for row, row_data in zip(rows, data):
+            row_data['bonds'] = bonds.get(row.pk, [])
@@ -0,0 +1,104 @@
+import csv
+import json
+from typing import Iterable, Iterator
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from . import json_backend, msgpack_backend
+from .json_backend import use_orjson
+
+
+class LineBuffer:
+    '''
+    A file-like object returning what is written to it, so `csv.writer` can encode one row at a time.
+    '''
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class JSONLinesRenderer(BaseRenderer):
+    '''
+    Renders a list of dicts as JSON Lines (one JSON document per line). A single dict,
+    e.g. an error response, is rendered as one line.
+
+    `stream` encodes the rows lazily, for a `StreamingHttpResponse`.
+    '''
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows: Iterable[dict]) -> Iterator[str]:
+        for row in rows:
+            yield json.dumps(row) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    '''
+    Renders a list of dicts as CSV with a header row taken from the keys of the first dict.
+    A single dict, e.g. an error response, is rendered as one row.
+
+    `stream` encodes the rows lazily, for a `StreamingHttpResponse`.
+    '''
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.stream(rows)).encode(self.charset)
+
+    def stream(self, rows: Iterable[dict]) -> Iterator[str]:
+        writer = csv.writer(LineBuffer(), lineterminator='\n')
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
+        yield writer.writerow(first_row.keys())
+        yield writer.writerow(first_row.values())
+        for row in rows:
+            yield writer.writerow(row.values())
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''
+    A `JSONRenderer` encoding with orjson (see `json_backend.py`), producing the same JSON as the
+    stock renderer. Indented (e.g. 'application/json; indent=4'), non compact, ASCII-only or
+    non-strict output is rendered by the stock renderer.
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii or not self.strict or not use_orjson():
+            return super().render(data, accepted_media_type, renderer_context)
+        content = json_backend.dumps(data)
+        # Escaped like the stock renderer, so the output is a strict javascript subset
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    '''
+    Renders the data as MessagePack, with Decimals as a lossless extension type
+    (see `msgpack_backend.py`).
+    '''
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        return msgpack_backend.packb(data)
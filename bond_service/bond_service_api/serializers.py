@@ -1,19 +1,38 @@
+from typing import List
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
-from .models import Portfolio, Bond
+from .models import Portfolio, PortfolioSummary, Bond, YieldsFrequencyChoices
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again later.'
+    default_code = 'login_busy'
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
 
+    def validate(self, attrs):
+        try:
+            return super().validate(attrs)
+        except AuthenticationFailed:
+            # No password hashing slot was freed in time, see `backends.hashing_slot`
+            if getattr(self.context.get('request'), 'login_busy', False):
+                raise LoginBusy()
+            raise
+
     @classmethod
     def get_token(cls, user):
         token = super(MyTokenObtainPairSerializer, cls).get_token(user)
 
-        # Add custom claims
+        # Add custom claims, the stateless authentication builds the user from them
         token['username'] = user.username
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
         return token
 
 
@@ -75,24 +94,195 @@ class UserSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class BondSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    '''
+    A ModelSerializer that takes an additional `fields` argument, the names of the fields to
+    serialize (all by default), see `FieldSelectionSerializer`.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class BondSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Bond
         fields = '__all__'
 
 
-class PortfolioSerializer(serializers.ModelSerializer):
-    bonds = BondSerializer(many=True, read_only=True, source='bond_set')
+class BondImportSerializer(serializers.ModelSerializer):
+    '''
+    Validates a single row of a bond import. The ISIN lookup, uniqueness and portfolio
+    permissions are checked once per batch by `BondImporter`, so they are not repeated here.
+    '''
+    portfolio = serializers.IntegerField()
+
+    class Meta:
+        model = Bond
+        fields = [
+            'emission_name',
+            'emission_isin',
+            'bond_value',
+            'interest_rate',
+            'purchase_date',
+            'maturity_date',
+            'yields_frequency',
+            'portfolio',
+        ]
+        extra_kwargs = {
+            'emission_name': {'validators': []},
+            'emission_isin': {'validators': []},
+        }
+
+
+class PortfolioSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PortfolioSummary
+        fields = [
+            'bonds_count',
+            'total_value',
+            'nearest_maturity_date',
+        ]
+
+
+class PortfolioSerializer(DynamicFieldsModelSerializer):
+    bonds = BondSerializer(many=True, read_only=True)
+    summary = PortfolioSummarySerializer(read_only=True)
 
     class Meta:
         model = Portfolio
         fields = [
             'name',
             'bonds',
+            'summary',
             'created_at',
             'updated_at',
         ]
 
 
+class FieldSelectionSerializer(serializers.Serializer):
+    '''
+    Validates the sparse fieldset parameters and resolves them to the names of the response
+    fields. The context must contain the `available` field names and the `expandable` ones,
+    which are only included when listed in `expand` or `fields`.
+    '''
+    fields = serializers.CharField(
+        required=False,
+        help_text='Comma separated response fields, all (except the expandable ones) by default.',
+    )
+    exclude = serializers.CharField(required=False, help_text='Comma separated response fields to leave out.')
+    expand = serializers.CharField(
+        required=False,
+        help_text="Comma separated nested fields to include, e.g. 'bonds' for portfolios.",
+    )
+
+    def split_names(self, value: str, allowed) -> List[str]:
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f'Unknown fields: {", ".join(unknown)}.')
+        return names
+
+    def validate_fields(self, value):
+        return self.split_names(value, self.context['available'])
+
+    def validate_exclude(self, value):
+        return self.split_names(value, self.context['available'])
+
+    def validate_expand(self, value):
+        return self.split_names(value, self.context['expandable'])
+
+    def get_selected_fields(self) -> List[str]:
+        '''
+        Returns the names of the selected fields in the order of the available fields.
+        '''
+        available = self.context['available']
+        selected = set(self.validated_data.get('fields') or set(available) - set(self.context['expandable']))
+        selected -= set(self.validated_data.get('exclude', []))
+        selected |= set(self.validated_data.get('expand', []))
+        return [name for name in available if name in selected]
+
+
+class PortfolioQuerySerializer(serializers.Serializer):
+    bonds_limit = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        help_text='The maximum number of bonds nested per portfolio with expand=bonds (the oldest ones).',
+    )
+
+
+class BondFilterSerializer(serializers.Serializer):
+    portfolio = serializers.IntegerField(required=False, help_text='Only the bonds of this portfolio.')
+    yields_frequency = serializers.ChoiceField(
+        choices=YieldsFrequencyChoices.choices,
+        required=False,
+        help_text='Only the bonds with this yields frequency.',
+    )
+    interest_rate_min = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False, help_text='The minimum interest rate (inclusive).')
+    interest_rate_max = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False, help_text='The maximum interest rate (inclusive).')
+    maturity_date_from = serializers.DateField(
+        required=False, help_text='The earliest maturity date (inclusive).')
+    maturity_date_to = serializers.DateField(
+        required=False, help_text='The latest maturity date (inclusive).')
+
+    def validate(self, attrs):
+        for lower, upper in (('interest_rate_min', 'interest_rate_max'), ('maturity_date_from', 'maturity_date_to')):
+            if attrs.get(lower) is not None and attrs.get(upper) is not None and attrs[lower] > attrs[upper]:
+                raise serializers.ValidationError({
+                    upper: f'Must not be lower than {lower}.'
+                })
+        return attrs
+
+
+class BondMaturingSerializer(serializers.Serializer):
+    start_date = serializers.DateField(help_text='The earliest maturity date (inclusive).')
+    end_date = serializers.DateField(help_text='The latest maturity date (inclusive).')
+
+    def validate(self, attrs):
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must not be before the start date.'
+            })
+        return attrs
+
+
 class PortfolioInvestmentAnalysisSerializer(serializers.Serializer):
     portfolio_pk = serializers.IntegerField()
+    include = serializers.CharField(
+        required=False,
+        help_text="Comma separated optional sections, 'risk' adds the yield to maturity, duration and convexity.",
+    )
+
+
+class PortfolioBatchInvestmentAnalysisSerializer(serializers.Serializer):
+    portfolio_pks = serializers.CharField(
+        required=False,
+        help_text='Comma separated portfolio ids. All accessible portfolios are analyzed if omitted.',
+    )
+
+    def validate_portfolio_pks(self, value):
+        try:
+            return [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError('Expected a comma separated list of portfolio ids.')
+
+
+class PortfolioCashFlowsSerializer(serializers.Serializer):
+    portfolio_pk = serializers.IntegerField()
+    start_date = serializers.DateField(required=False, help_text='The first payment date, today by default.')
+    end_date = serializers.DateField(required=False, help_text='The last payment date, unlimited by default.')
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({
+                'end_date': 'End date must not be before the start date.'
+            })
+        return attrs
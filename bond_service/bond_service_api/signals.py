@@ -0,0 +1,114 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Portfolio, PortfolioSummary, Bond
+from .summaries import SUMMARY_FIELDS, get_raw_summary_values, to_summary_values, update_bond
+from .versions import invalidate_portfolios
+
+# The portfolios being deleted by the current thread, their ids mapped to the markers registered
+# with on_commit, see `skip_deleted_portfolio_bonds`
+deleting_portfolios = threading.local()
+
+
+def get_deleting_portfolios() -> dict:
+    if not hasattr(deleting_portfolios, 'markers'):
+        deleting_portfolios.markers = {}
+    return deleting_portfolios.markers
+
+
+def is_being_deleted(portfolio_pk: int, using: str) -> bool:
+    '''
+    Tells if the deletion of the portfolio is in progress: it was started and its marker is still
+    pending in the transaction. A rollback drops the marker, so a failed deletion is forgotten.
+    '''
+    markers = get_deleting_portfolios()
+    marker = markers.get(portfolio_pk)
+    if marker is None:
+        return False
+    if any(func is marker for _, func in transaction.get_connection(using).run_on_commit):
+        return True
+    del markers[portfolio_pk]
+    return False
+
+
+def load_stored_values(bond: Bond) -> tuple:
+    return Bond.objects.filter(pk=bond.pk).values_list(*SUMMARY_FIELDS).first()
+
+
+@receiver(post_init, sender=Bond)
+def remember_loaded_values(sender, instance: Bond, **kwargs):
+    '''
+    Remembers the values a bond was loaded with, so a change can be applied to the portfolio
+    summaries and moving the bond to another portfolio updates both. The raw values are kept,
+    they are only converted when the bond is saved or deleted.
+    '''
+    instance._loaded_values = get_raw_summary_values(instance)
+
+
+@receiver(pre_save, sender=Bond)
+@receiver(pre_delete, sender=Bond)
+def load_deferred_values(sender, instance: Bond, **kwargs):
+    '''
+    Loads the stored values of a bond that was loaded with deferred fields.
+    '''
+    if not instance._state.adding and None in instance._loaded_values:
+        instance._loaded_values = load_stored_values(instance)
+
+
+@receiver(post_save, sender=Bond)
+def update_portfolio_summary(sender, instance: Bond, created: bool, **kwargs):
+    old_values = None if created else to_summary_values(instance._loaded_values)
+    raw_values = get_raw_summary_values(instance)
+    if None in raw_values:
+        raw_values = load_stored_values(instance)
+    new_values = to_summary_values(raw_values)
+    update_bond(old_values, new_values)
+    instance._loaded_values = raw_values
+    invalidate_portfolios(values['portfolio_id'] for values in (old_values, new_values) if values)
+
+
+@receiver(post_delete, sender=Bond)
+def remove_from_portfolio_summary(sender, instance: Bond, using: str, **kwargs):
+    old_values = to_summary_values(instance._loaded_values)
+    if old_values is None or is_being_deleted(old_values['portfolio_id'], using):
+        return
+    update_bond(old_values, None)
+    invalidate_portfolios([old_values['portfolio_id']])
+
+
+@receiver(post_save, sender=Portfolio)
+def create_portfolio_summary(sender, instance: Portfolio, created: bool, **kwargs):
+    if created:
+        PortfolioSummary.objects.create(portfolio=instance)
+    invalidate_portfolios([instance.pk])
+
+
+@receiver(pre_delete, sender=Portfolio)
+def skip_deleted_portfolio_bonds(sender, instance: Portfolio, using: str, **kwargs):
+    '''
+    The bonds of a deleted portfolio are deleted first (cascade). Their summary, which is deleted
+    with the portfolio, is not updated bond by bond: the portfolio is marked as being deleted until
+    its post_delete signal. Django sends the pre_delete signals of all collected objects before
+    deleting any of them.
+
+    The deletion runs in a transaction, the mark is also registered with on_commit: if the deletion
+    fails, the rollback drops it and the bonds deleted later update the summary again.
+    '''
+    markers = get_deleting_portfolios()
+    portfolio_pk = instance.pk
+
+    def marker():
+        if markers.get(portfolio_pk) is marker:
+            del markers[portfolio_pk]
+
+    markers[portfolio_pk] = marker
+    transaction.on_commit(marker, using=using)
+
+
+@receiver(post_delete, sender=Portfolio)
+def invalidate_deleted_portfolio(sender, instance: Portfolio, **kwargs):
+    get_deleting_portfolios().pop(instance.pk, None)
+    invalidate_portfolios([instance.pk])
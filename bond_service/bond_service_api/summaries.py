@@ -0,0 +1,193 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Least
+
+from .models import Portfolio, PortfolioSummary, Bond
+
+# The bond fields the summary is computed from
+SUMMARY_FIELDS = ('portfolio_id', 'bond_value', 'interest_rate', 'maturity_date')
+
+
+def get_raw_summary_values(bond: Bond) -> Tuple:
+    '''
+    Returns the summary fields of a bond as they are set on the instance, None for a deferred
+    field. The values are read from `__dict__` to not load deferred fields, and are not converted,
+    so taking the snapshot of every loaded bond stays cheap.
+    '''
+    return tuple(map(bond.__dict__.get, SUMMARY_FIELDS))
+
+
+def to_summary_values(raw_values: Optional[Tuple]) -> Optional[Dict]:
+    '''
+    Converts the raw summary fields (see `get_raw_summary_values`) to Python values, returns
+    None if any of them is missing.
+    '''
+    if raw_values is None or None in raw_values:
+        return None
+    return {
+        name: Bond._meta.get_field(name).to_python(value)
+        for name, value in zip(SUMMARY_FIELDS, raw_values)
+    }
+
+
+def get_summary_values(bond: Bond) -> Optional[Dict]:
+    '''
+    Returns the summary fields of a bond converted to Python values, or None if any of them is
+    deferred.
+    '''
+    return to_summary_values(get_raw_summary_values(bond))
+
+
+def add_bonds(
+    portfolio_id: int,
+    bonds_count: int,
+    total_value: Decimal,
+    interest_rate_sum: Decimal,
+    nearest_maturity_date: date,
+) -> None:
+    '''
+    Adds bonds to the summary of a portfolio with a single UPDATE, so concurrent changes are
+    not lost. A missing summary is rebuilt from the bonds of the portfolio.
+    '''
+    maturity_date = Value(nearest_maturity_date)
+    updated = PortfolioSummary.objects.filter(portfolio_id=portfolio_id).update(
+        bonds_count=F('bonds_count') + bonds_count,
+        total_value=F('total_value') + total_value,
+        interest_rate_sum=F('interest_rate_sum') + interest_rate_sum,
+        nearest_maturity_date=Least(Coalesce(F('nearest_maturity_date'), maturity_date), maturity_date),
+    )
+    if not updated:
+        rebuild_portfolio_summaries([portfolio_id])
+
+
+def remove_bond(values: Dict) -> None:
+    '''
+    Removes a bond from the summary of its portfolio with a single UPDATE. It must be called after
+    the bond is deleted or moved, because if the bond had the nearest maturity date, the date is
+    recomputed from the remaining bonds. Nothing is done if the summary doesn't exist, e.g. when
+    the portfolio itself is being deleted.
+    '''
+    remaining_maturity_dates = Bond.objects.filter(portfolio_id=OuterRef('portfolio_id')).values('portfolio_id')
+    PortfolioSummary.objects.filter(portfolio_id=values['portfolio_id']).update(
+        bonds_count=F('bonds_count') - 1,
+        total_value=F('total_value') - values['bond_value'],
+        interest_rate_sum=F('interest_rate_sum') - values['interest_rate'],
+        nearest_maturity_date=Case(
+            When(
+                nearest_maturity_date__gte=values['maturity_date'],
+                then=Subquery(remaining_maturity_dates.annotate(date=Min('maturity_date')).values('date')),
+            ),
+            default=F('nearest_maturity_date'),
+        ),
+    )
+
+
+def update_bond(old_values: Optional[Dict], new_values: Optional[Dict]) -> None:
+    '''
+    Applies a bond change to the portfolio summaries: the old values (as returned by
+    `get_summary_values`) are removed and the new ones added. `old_values` is None for
+    a new bond and `new_values` is None for a deleted one.
+    '''
+    if old_values == new_values:
+        return
+    with transaction.atomic():
+        if old_values is not None:
+            remove_bond(old_values)
+        if new_values is not None:
+            add_bonds(
+                new_values['portfolio_id'],
+                1,
+                new_values['bond_value'],
+                new_values['interest_rate'],
+                new_values['maturity_date'],
+            )
+
+
+def add_created_bonds(bonds: Iterable[Bond]) -> None:
+    '''
+    Adds newly created bonds to the portfolio summaries with one UPDATE per portfolio, for bonds
+    created with `bulk_create`, which doesn't send the post_save signal.
+    '''
+    totals: Dict[int, List] = {}
+    for bond in bonds:
+        values = get_summary_values(bond)
+        total = totals.setdefault(values['portfolio_id'], [0, Decimal(0), Decimal(0), values['maturity_date']])
+        total[0] += 1
+        total[1] += values['bond_value']
+        total[2] += values['interest_rate']
+        total[3] = min(total[3], values['maturity_date'])
+    with transaction.atomic():
+        for portfolio_id, total in totals.items():
+            add_bonds(portfolio_id, *total)
+
+
+def compute_portfolio_summaries(portfolio_ids: Optional[Iterable[int]] = None) -> Dict[int, PortfolioSummary]:
+    '''
+    Computes the summaries of the portfolios (all by default) from their bonds, with one grouped query.
+    '''
+    portfolios = Portfolio.objects.all()
+    if portfolio_ids is not None:
+        portfolios = portfolios.filter(pk__in=list(portfolio_ids))
+    rows = portfolios.annotate(
+        bonds_count=Count('bonds'),
+        total_value=Coalesce(Sum('bonds__bond_value'), Decimal(0)),
+        interest_rate_sum=Coalesce(Sum('bonds__interest_rate'), Decimal(0)),
+        nearest_maturity_date=Min('bonds__maturity_date'),
+    ).values_list('pk', 'bonds_count', 'total_value', 'interest_rate_sum', 'nearest_maturity_date')
+    return {
+        pk: PortfolioSummary(
+            portfolio_id=pk,
+            bonds_count=bonds_count,
+            total_value=total_value,
+            interest_rate_sum=interest_rate_sum,
+            nearest_maturity_date=nearest_maturity_date,
+        )
+        for pk, bonds_count, total_value, interest_rate_sum, nearest_maturity_date in rows
+    }
+
+
+def rebuild_portfolio_summaries(portfolio_ids: Optional[Iterable[int]] = None, batch_size: int = 1000) -> int:
+    '''
+    Replaces the summaries of the portfolios (all by default) with summaries computed from their bonds.
+
+    Returns:
+        int: The number of rebuilt summaries.
+    '''
+    with transaction.atomic():
+        summaries = compute_portfolio_summaries(portfolio_ids)
+        PortfolioSummary.objects.filter(portfolio_id__in=list(summaries)).delete()
+        PortfolioSummary.objects.bulk_create(summaries.values(), batch_size=batch_size)
+    return len(summaries)
+
+
+def verify_portfolio_summaries(portfolio_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+    '''
+    Compares the stored summaries of the portfolios (all by default) with summaries computed
+    from their bonds.
+
+    Returns:
+        List[Dict]: The differences, each with the 'portfolio_id', the 'expected' and the 'actual'
+                    summary values (None for a missing summary).
+    '''
+    expected = compute_portfolio_summaries(portfolio_ids)
+    actual = PortfolioSummary.objects.in_bulk(list(expected))
+    differences = []
+    for pk, summary in expected.items():
+        expected_values = summary_values(summary)
+        actual_values = summary_values(actual[pk]) if pk in actual else None
+        if expected_values != actual_values:
+            differences.append({'portfolio_id': pk, 'expected': expected_values, 'actual': actual_values})
+    return differences
+
+
+def summary_values(summary: PortfolioSummary) -> Dict:
+    return {
+        'bonds_count': summary.bonds_count,
+        'total_value': summary.total_value,
+        'interest_rate_sum': summary.interest_rate_sum,
+        'nearest_maturity_date': summary.nearest_maturity_date,
+    }
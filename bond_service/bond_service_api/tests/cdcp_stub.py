@@ -0,0 +1,88 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class CDCPStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        stub: CDCPStub = self.server.stub
+        isin = parse_qs(urlparse(self.path).query).get('isin', [''])[0]
+        stub.calls.append(isin)
+        stub.client_ports.add(self.client_address[1])
+        if stub.latency:
+            time.sleep(stub.latency)
+        fault = stub.next_fault()
+        if fault == 'reset':
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+        if fault == 'html':
+            self.send_body(200, 'text/html', b'<html><body>Maintenance</body></html>')
+            return
+        if fault is not None:
+            self.send_json(fault, {'message': 'Injected fault.'})
+            return
+        found = [{'isin': isin}] if isin in stub.issued else []
+        self.send_json(200, {'vydaneisiny': found})
+
+    def send_json(self, status_code, data):
+        self.send_body(status_code, 'application/json', json.dumps(data).encode())
+
+    def send_body(self, status_code, content_type, body):
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CDCPStub:
+    '''
+    CDCPStub: A local stand-in for the CDCP `VydaneISINy` API with latency and fault injection.
+
+    Attributes:
+        issued (set): ISINs reported as issued.
+        latency (float): Delay (in seconds) before every response.
+        faults (list): Faults for the next requests, consumed one per request. A fault is
+                       an HTTP status code, 'reset' to drop the connection or 'html' for
+                       a 200 HTML page.
+        calls (list): ISINs of all received requests.
+        client_ports (set): Client ports of all received requests, one per used connection.
+    '''
+
+    def __init__(self, issued=()):
+        self.issued = set(issued)
+        self.latency = 0
+        self.faults = []
+        self.calls = []
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), CDCPStubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def next_fault(self):
+        with self._lock:
+            return self.faults.pop(0) if self.faults else None
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
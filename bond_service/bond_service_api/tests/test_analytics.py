@@ -0,0 +1,228 @@
+import io
+import time
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from requests import Response
+from ..analytics import PortfolioAnalyticsEngine, BondColumns, coupon_schedule
+from ..cashflows import bond_cash_flows
+from ..models import Portfolio, Bond
+from ..summaries import rebuild_portfolio_summaries
+from ..utils import get_portfolios_analysis
+
+
+@pytest.fixture
+def portfolios(db, user1: User, portfolio1: Portfolio, portfolio2: Portfolio):
+    portfolio3 = Portfolio.objects.create(name='portfolio3', created_by=user1)
+    bonds = [
+        ('10.00', '7.33', '2031-01-15', 1),
+        ('2500.50', '3.10', '2027-03-01', 4),
+        ('999.99', '11.00', '2027-03-01', 12),
+    ]
+    Bond.objects.bulk_create([
+        Bond(
+            emission_name=f'analytics_bond_{index}',
+            emission_isin=f'ANALYTICS{index:03d}',
+            bond_value=bond_value,
+            interest_rate=interest_rate,
+            purchase_date='2024-07-06',
+            maturity_date=maturity_date,
+            yields_frequency=yields_frequency,
+            portfolio=portfolio3,
+        )
+        for index, (bond_value, interest_rate, maturity_date, yields_frequency) in enumerate(bonds)
+    ])
+    rebuild_portfolio_summaries([portfolio3.pk])
+    Portfolio.objects.create(name='empty_portfolio', created_by=user1)
+    return Portfolio.objects.all()
+
+
+def test_decimal_mode_matches_portfolio_analysis(portfolios):
+    expected = get_portfolios_analysis(portfolios)
+    engine = PortfolioAnalyticsEngine(mode='decimal')
+    valuation = engine.value(engine.load(Bond.objects.all())).as_dict()
+    assert len(valuation) == 3
+    for portfolio_id, analysis in valuation.items():
+        assert analysis['total_value'] == expected[portfolio_id]['total_value']
+        assert analysis['average_interest_rate'] == expected[portfolio_id]['average_interest_rate']
+        assert analysis['future_value'] == expected[portfolio_id]['future_value']
+        assert analysis['nearest_maturity_bond_id'] == expected[portfolio_id]['nearest_maturity_bond']['id']
+
+
+def test_float_mode_matches_portfolio_analysis(portfolios):
+    expected = get_portfolios_analysis(portfolios)
+    engine = PortfolioAnalyticsEngine(mode='float')
+    valuation = engine.value(engine.load(Bond.objects.all())).as_dict()
+    for portfolio_id, analysis in valuation.items():
+        assert analysis['total_value'] == pytest.approx(float(expected[portfolio_id]['total_value']), rel=1e-12)
+        assert analysis['average_interest_rate'] == pytest.approx(
+            float(expected[portfolio_id]['average_interest_rate']), rel=1e-12)
+        assert analysis['future_value'] == pytest.approx(float(expected[portfolio_id]['future_value']), rel=1e-9)
+
+
+def test_nearest_maturity_tie_is_won_by_lowest_id(portfolios):
+    engine = PortfolioAnalyticsEngine(mode='float')
+    portfolio3 = Portfolio.objects.get(name='portfolio3')
+    valuation = engine.value(engine.load(portfolio3.bonds.all()), today=date(2024, 7, 6)).as_dict()
+    nearest = portfolio3.bonds.order_by('maturity_date', 'pk').first()
+    assert valuation[portfolio3.pk]['nearest_maturity_bond_id'] == nearest.pk
+
+
+def test_valuation_of_thousands_of_portfolios_in_one_pass():
+    count = 20000
+    columns = BondColumns(
+        portfolio_ids=np.arange(count, dtype=np.int64) // 4,
+        bond_ids=np.arange(count, dtype=np.int64),
+        bond_values=np.full(count, 100.0),
+        interest_rates=np.full(count, 10.0),
+        purchase_dates=np.full(count, np.datetime64('2024-07-06', 'D')),
+        maturity_dates=np.full(count, np.datetime64('2025-07-06', 'D')),
+        yields_frequencies=np.full(count, 12),
+    )
+    valuation = PortfolioAnalyticsEngine(mode='float').value(columns, today=date(2024, 7, 6))
+    assert len(valuation.portfolio_ids) == count // 4
+    assert valuation.total_value[0] == 400.0
+    assert valuation.future_value[0] == pytest.approx(400.0 * 1.1 ** (365 / 365.25))
+
+
+def test_empty_valuation(db):
+    engine = PortfolioAnalyticsEngine(mode='decimal')
+    valuation = engine.value(engine.load(Bond.objects.none()))
+    assert valuation.as_dict() == {}
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        PortfolioAnalyticsEngine(mode='quad')
+
+
+def test_revalue_portfolios_command(portfolios):
+    output = io.StringIO()
+    call_command('revalue_portfolios', mode='decimal', stdout=output)
+    lines = output.getvalue().splitlines()
+    assert lines[0].startswith('portfolio_id,bonds_count,total_value')
+    assert len(lines) == 4
+    assert Decimal(lines[1].split(',')[2]) == Decimal('200.00')
+
+
+
+def reference_yield(bond: Bond) -> float:
+    cash_flows = [
+        ((cash_flow.date - bond.purchase_date).days / 365.25, float(cash_flow.amount))
+        for cash_flow in bond_cash_flows(bond)
+    ]
+    frequency = bond.yields_frequency
+    low, high = -0.5, 10.0
+    for _ in range(200):
+        rate = (low + high) / 2
+        price = sum(amount / (1 + rate / frequency) ** (frequency * years) for years, amount in cash_flows)
+        low, high = (rate, high) if price > float(bond.bond_value) else (low, rate)
+    return rate * 100
+
+
+def test_yield_to_maturity_matches_scalar_solver(portfolios):
+    engine = PortfolioAnalyticsEngine(mode='float')
+    bonds = Bond.objects.order_by('portfolio_id', 'maturity_date', 'pk')
+    bond_risk = engine.bond_risk(engine.load(bonds), today=date(2024, 7, 6))
+    for bond, yield_to_maturity in zip(bonds, bond_risk.yield_to_maturity):
+        assert yield_to_maturity == pytest.approx(reference_yield(bond), abs=1e-8)
+
+
+def test_duration_and_convexity_of_a_zero_coupon_bond():
+    columns = BondColumns(
+        portfolio_ids=np.array([1]),
+        bond_ids=np.array([1]),
+        bond_values=np.array([1000.0]),
+        interest_rates=np.array([0.0]),
+        purchase_dates=np.array(['2024-01-01'], dtype='datetime64[D]'),
+        maturity_dates=np.array(['2029-01-01'], dtype='datetime64[D]'),
+        yields_frequencies=np.array([1]),
+    )
+    engine = PortfolioAnalyticsEngine(mode='float')
+    bond_risk = engine.bond_risk(columns, today=date(2025, 1, 1))
+    years = (date(2029, 1, 1) - date(2025, 1, 1)).days / 365.25
+    assert bond_risk.yield_to_maturity[0] == pytest.approx(0, abs=1e-12)
+    assert bond_risk.macaulay_duration[0] == pytest.approx(years)
+    assert bond_risk.modified_duration[0] == pytest.approx(years)
+    assert bond_risk.convexity[0] == pytest.approx(years * (years + 1))
+    assert engine.portfolio_risk(columns, bond_risk).as_list()[0]['present_value'] == pytest.approx(1000)
+
+
+def test_matured_bonds_have_no_duration(portfolio1: Portfolio):
+    engine = PortfolioAnalyticsEngine(mode='float')
+    columns = engine.load(portfolio1.bonds.all())
+    bond_risk = engine.bond_risk(columns, today=date(2025, 1, 1))
+    assert all(bond['macaulay_duration'] is None for bond in bond_risk.as_list())
+    assert engine.portfolio_risk(columns, bond_risk).as_list()[0]['convexity'] is None
+
+
+def test_schedule_matches_cash_flow_generator(portfolios):
+    bonds = list(Bond.objects.order_by('portfolio_id', 'maturity_date', 'pk'))
+    schedule = coupon_schedule(PortfolioAnalyticsEngine(mode='float').load(Bond.objects.all()))
+    expected = [
+        (index, cash_flow.date)
+        for index, bond in enumerate(bonds)
+        for cash_flow in bond_cash_flows(bond)
+        if cash_flow.kind == 'coupon'
+    ]
+    assert list(zip(schedule.bond_index.tolist(), schedule.payment_dates.tolist())) == expected
+
+
+@pytest.mark.benchmark
+def test_risk_of_100k_bonds_within_time_budget():
+    count = 100000
+    random = np.random.default_rng(0)
+    purchase_dates = np.datetime64('2024-01-01', 'D') + random.integers(0, 365, count)
+    columns = BondColumns(
+        portfolio_ids=np.sort(random.integers(0, 1000, count)),
+        bond_ids=np.arange(count, dtype=np.int64),
+        bond_values=np.round(random.uniform(100, 10000, count), 2),
+        interest_rates=np.round(random.uniform(0, 15, count), 2),
+        purchase_dates=purchase_dates,
+        maturity_dates=purchase_dates + random.integers(30, 3650, count),
+        yields_frequencies=random.choice([1, 4, 12], count),
+    )
+    engine = PortfolioAnalyticsEngine(mode='float')
+    started = time.perf_counter()
+    bond_risk = engine.bond_risk(columns, today=date(2024, 7, 6))
+    portfolio_risk = engine.portfolio_risk(columns, bond_risk)
+    assert time.perf_counter() - started < 10
+    assert not np.isnan(bond_risk.yield_to_maturity).any()
+    assert len(portfolio_risk.ids) == 1000
+
+
+@pytest.mark.django_db
+def test_user_gets_portfolio_risk_analysis(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    today = timezone.now().date()
+    Bond.objects.create(
+        emission_name='risk_bond',
+        emission_isin='CZ0009013306',
+        bond_value='1000',
+        interest_rate='6',
+        purchase_date=today - timedelta(days=30),
+        maturity_date=today + timedelta(days=3 * 365),
+        yields_frequency=4,
+        portfolio=portfolio1,
+    )
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk, 'include': 'risk'})
+    assert response.status_code == status.HTTP_200_OK
+    risk = response.data['risk']
+    assert len(risk['bonds']) == 3
+    assert risk['yield_to_maturity'] == pytest.approx(6, abs=0.5)
+    assert 0 < risk['modified_duration'] < risk['macaulay_duration'] < 3
+    response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert 'risk' not in response.data
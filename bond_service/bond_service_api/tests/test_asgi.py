@@ -0,0 +1,64 @@
+import json
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from ..models import Portfolio
+from ..serializers import BondSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bond_export_streams_under_asgi(
+    asgi_get,
+    obtain_access_token,
+    user1: User,
+    portfolio1: Portfolio,
+    create_bonds
+):
+    create_bonds(portfolio1, 25)
+    token = obtain_access_token('user1', 'password1')
+    status_code, headers, body = asgi_get(reverse('bond_service_api:bond_export'), token)
+    assert status_code == status.HTTP_200_OK
+    assert headers['content-type'] == 'application/x-ndjson; charset=utf-8'
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    expected = BondSerializer(portfolio1.bonds.order_by('pk'), many=True).data
+    assert rows == json.loads(json.dumps(expected))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cash_flows_stream_under_asgi(
+    asgi_get,
+    obtain_access_token,
+    user1: User,
+    portfolio1: Portfolio
+):
+    token = obtain_access_token('user1', 'password1')
+    status_code, headers, body = asgi_get(reverse('bond_service_api:portfolio_cash_flows'), token, {
+        'portfolio_pk': portfolio1.pk,
+        'start_date': '2024-07-01',
+        'end_date': '2024-12-31',
+    })
+    assert status_code == status.HTTP_200_OK
+    assert headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert [(line['kind'], line['amount']) for line in lines] == [('coupon', '1.25'), ('principal', '100.00')] * 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_analysis_is_served_under_asgi(
+    api_client: APIClient,
+    authenticate_user,
+    asgi_get,
+    obtain_access_token,
+    user1: User,
+    portfolio1: Portfolio
+):
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    data = {'portfolio_pk': portfolio1.pk, 'include': 'risk'}
+    authenticate_user(username='user1', password='password1')
+    expected = api_client.get(analysis_url, data=data).content
+    token = obtain_access_token('user1', 'password1')
+    status_code, headers, body = asgi_get(analysis_url, token, data)
+    assert status_code == status.HTTP_200_OK
+    assert body == expected
@@ -0,0 +1,129 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from ..authentication import active_users
+from ..models import Portfolio, Bond
+
+
+@pytest.mark.django_db
+def test_token_contains_the_user_claims(
+    api_client: APIClient,
+    obtain_access_token,
+    user1: User,
+    admin_user: User
+):
+    token = AccessToken(obtain_access_token(username='admin', password='adminpassword'))
+    assert (token['username'], token['is_staff'], token['is_superuser']) == ('admin', True, True)
+    token = AccessToken(obtain_access_token(username='user1', password='password1'))
+    assert (token['username'], token['is_staff'], token['is_superuser']) == ('user1', False, False)
+
+
+@pytest.mark.django_db
+def test_stateless_auth_skips_the_user_query(
+    api_client: APIClient,
+    authenticate_user,
+    stateless_auth,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    portfolio_url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    authenticate_user(username='user1', password='password1')
+    # The active status of the user, then the portfolio with its summary
+    with django_assert_num_queries(2):
+        response = api_client.get(portfolio_url)
+    assert response.data['name'] == 'portfolio1'
+    with django_assert_num_queries(0):
+        response = api_client.get(portfolio_url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_stateless_auth_keeps_the_permissions(
+    api_client: APIClient,
+    authenticate_user,
+    stateless_auth,
+    user1: User,
+    admin_user: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    assert api_client.get(bonds_url).data['count'] == 2
+    assert api_client.get(reverse('bond_service_api:users')).status_code == status.HTTP_403_FORBIDDEN
+    other_url = reverse('bond_service_api:portfolio_details', args=[portfolio2.pk])
+    assert api_client.get(other_url).status_code == status.HTTP_404_NOT_FOUND
+    authenticate_user(username='admin', password='adminpassword')
+    assert api_client.get(bonds_url).data['count'] == 4
+    assert api_client.get(reverse('bond_service_api:users')).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_stateless_auth_creates_portfolios_and_bonds(
+    api_client: APIClient,
+    authenticate_user,
+    stateless_auth,
+    user1: User
+):
+    authenticate_user(username='user1', password='password1')
+    response = api_client.post(reverse('bond_service_api:portfolio'), data={'name': 'stateless_portfolio'})
+    assert response.status_code == status.HTTP_201_CREATED
+    portfolio = Portfolio.objects.get(name='stateless_portfolio')
+    assert portfolio.created_by == user1
+    response = api_client.post(reverse('bond_service_api:bond'), data={
+        'emission_name': 'stateless_bond',
+        'emission_isin': 'CZ0003551251',
+        'bond_value': '100',
+        'interest_rate': '5',
+        'purchase_date': '2024-07-06',
+        'maturity_date': '2030-08-06',
+        'yields_frequency': 12,
+        'portfolio': portfolio.pk,
+    })
+    assert response.status_code == status.HTTP_201_CREATED
+    assert Bond.objects.get(emission_name='stateless_bond').portfolio == portfolio
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('change', ['deactivate', 'delete'])
+def test_stateless_auth_rejects_inactive_users_once_the_cache_expires(
+    api_client: APIClient,
+    authenticate_user,
+    stateless_auth,
+    user1: User,
+    change: str
+):
+    portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    assert api_client.get(portfolios_url).status_code == status.HTTP_200_OK
+    if change == 'deactivate':
+        user1.is_active = False
+        user1.save()
+    else:
+        user1.delete()
+    assert api_client.get(portfolios_url).status_code == status.HTTP_200_OK
+    active_users.clear()
+    response = api_client.get(portfolios_url)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data['code'] == 'user_inactive'
+
+
+@pytest.mark.django_db
+def test_tokens_without_claims_are_authenticated_with_the_user_row(
+    api_client: APIClient,
+    stateless_auth,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    token = AccessToken.for_user(user1)
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    portfolio_url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    # The user, then the portfolio with its summary
+    with django_assert_num_queries(2):
+        response = api_client.get(portfolio_url)
+    assert response.status_code == status.HTTP_200_OK
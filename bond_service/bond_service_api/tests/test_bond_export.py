@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from ..exporters import BondExporter
+from ..models import Portfolio, Bond
+from ..renderers import JSONLinesRenderer
+from ..serializers import BondSerializer
+
+
+def read_export(response) -> str:
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_user_exports_his_bonds_as_json_lines(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    create_bonds
+):
+    create_bonds(portfolio1, 25)
+    export_url = reverse('bond_service_api:bond_export')
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(export_url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+    rows = [json.loads(line) for line in read_export(response).splitlines()]
+    expected = BondSerializer(portfolio1.bonds.order_by('pk'), many=True).data
+    assert rows == json.loads(json.dumps(expected))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('negotiation', [{'data': {'format': 'csv'}}, {'HTTP_ACCEPT': 'text/csv'}])
+def test_user_exports_his_bonds_as_csv(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    negotiation: dict,
+    create_bonds
+):
+    create_bonds(portfolio1, 25)
+    export_url = reverse('bond_service_api:bond_export')
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(export_url, **negotiation)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    assert response['Content-Disposition'] == 'attachment; filename="bonds.csv"'
+    rows = list(csv.DictReader(io.StringIO(read_export(response))))
+    expected = BondSerializer(portfolio1.bonds.order_by('pk'), many=True).data
+    assert rows == [{name: str(value) for name, value in bond.items()} for bond in expected]
+
+
+@pytest.mark.django_db
+def test_export_applies_bond_filters(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    create_bonds
+):
+    create_bonds(portfolio1, 25)
+    export_url = reverse('bond_service_api:bond_export')
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(export_url, data={'maturity_date_from': '2029-01-01'})
+    rows = [json.loads(line) for line in read_export(response).splitlines()]
+    expected = portfolio1.bonds.filter(maturity_date__gte='2029-01-01').order_by('pk')
+    assert [row['id'] for row in rows] == list(expected.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_export_streams_bonds_in_chunks(
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries,
+    create_bonds
+):
+    create_bonds(portfolio1, 25)
+    exporter = BondExporter(chunk_size=10)
+    with django_assert_num_queries(1):
+        chunks = list(exporter.stream(Bond.objects.all(), JSONLinesRenderer()))
+    assert [chunk.count('\n') for chunk in chunks] == [10, 10, 7]
+
+
+@pytest.mark.django_db
+def test_export_requires_authentication(api_client: APIClient):
+    response = api_client.get(reverse('bond_service_api:bond_export'))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
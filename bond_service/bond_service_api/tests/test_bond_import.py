@@ -0,0 +1,212 @@
+import json
+from decimal import Decimal
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from requests import Response
+from ..isin_registry import get_isin_registry, is_valid_isin_checksum, write_snapshot
+from ..models import Portfolio, Bond
+from ..msgpack_backend import packb, unpackb
+from ..summaries import verify_portfolio_summaries
+
+CSV_HEADER = 'emission_name,emission_isin,bond_value,interest_rate,purchase_date,maturity_date,yields_frequency,portfolio'
+
+
+def make_isins(count):
+    isins = []
+    for number in range(count):
+        base = f'CZ1{number:08d}'
+        isins.append(next(base + str(digit) for digit in range(10) if is_valid_isin_checksum(base + str(digit))))
+    return isins
+
+
+@pytest.fixture
+def issued_isins(settings):
+    def _issued_isins(count):
+        isins = make_isins(count)
+        write_snapshot(settings.ISIN_REGISTRY_SNAPSHOT_PATH, isins)
+        get_isin_registry.cache_clear()
+        return isins
+    return _issued_isins
+
+
+def make_row(name, isin, portfolio):
+    return {
+        'emission_name': name,
+        'emission_isin': isin,
+        'bond_value': '100.00',
+        'interest_rate': '5.50',
+        'purchase_date': '2024-07-06',
+        'maturity_date': '2026-07-06',
+        'yields_frequency': 4,
+        'portfolio': portfolio.pk,
+    }
+
+
+def to_csv(rows):
+    lines = [CSV_HEADER]
+    for row in rows:
+        lines.append(','.join(str(row[column]) for column in CSV_HEADER.split(',')))
+    return '\n'.join(lines) + '\n'
+
+
+def to_json_lines(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+@pytest.mark.django_db
+def test_user_can_import_bonds_from_csv(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    issued_isins
+):
+    isins = issued_isins(3)
+    rows = [make_row(f'import_{index}', isin, portfolio1) for index, isin in enumerate(isins)]
+    import_url = reverse('bond_service_api:bond_import')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.generic('POST', import_url, to_csv(rows), content_type='text/csv')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {'created': 3, 'failed': 0, 'errors': []}
+    assert set(portfolio1.bonds.values_list('emission_isin', flat=True)) >= set(isins)
+
+
+@pytest.mark.django_db
+def test_user_can_import_bonds_from_msgpack(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    issued_isins
+):
+    isins = issued_isins(3)
+    rows = [make_row(f'import_{index}', isin, portfolio1) for index, isin in enumerate(isins)]
+    for row in rows:
+        row['bond_value'] = Decimal('123456789012345678.91')
+    import_url = reverse('bond_service_api:bond_import')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.generic(
+        'POST', import_url, packb(rows), content_type='application/x-msgpack', HTTP_ACCEPT='application/x-msgpack')
+    assert response.status_code == status.HTTP_200_OK
+    assert unpackb(response.content) == {'created': 3, 'failed': 0, 'errors': []}
+    assert set(portfolio1.bonds.filter(emission_isin__in=isins).values_list('bond_value', flat=True)) == {
+        Decimal('123456789012345678.91')
+    }
+
+
+@pytest.mark.django_db
+def test_import_reports_invalid_rows(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    issued_isins
+):
+    isins = issued_isins(4)
+    rows = [
+        make_row('import_ok', isins[0], portfolio1),
+        make_row('import_other_portfolio', isins[1], portfolio2),
+        make_row('bond1_1', isins[2], portfolio1),
+        make_row('import_unknown_isin', 'CZ0001004113', portfolio1),
+        make_row('import_duplicate_isin', isins[0], portfolio1),
+        {'emission_name': 'import_incomplete'},
+    ]
+    body = to_json_lines(rows) + 'not json\n'
+    import_url = reverse('bond_service_api:bond_import')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.generic('POST', import_url, body, content_type='application/x-ndjson')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['created'] == 1
+    assert response.data['failed'] == 6
+    errors = {error['row']: error['errors'] for error in response.data['errors']}
+    assert list(errors) == [2, 3, 4, 5, 6, 7]
+    assert 'portfolio' in errors[2]
+    assert 'emission_name' in errors[3]
+    assert 'emission_isin' in errors[4]
+    assert 'emission_isin' in errors[5]
+    assert 'emission_isin' in errors[6]
+    assert 'non_field_errors' in errors[7]
+    assert Bond.objects.filter(emission_name='import_ok').exists()
+
+
+@pytest.mark.django_db
+def test_import_query_count_does_not_depend_on_row_count(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    issued_isins,
+    settings,
+    django_assert_max_num_queries
+):
+    settings.BOND_IMPORT_BATCH_SIZE = 1000
+    isins = issued_isins(300)
+    rows = [make_row(f'import_{index}', isin, portfolio1) for index, isin in enumerate(isins)]
+    import_url = reverse('bond_service_api:bond_import')
+    authenticate_user(username='user1', password='password1')
+    with django_assert_max_num_queries(10):
+        response: Response = api_client.post(import_url, data=rows, format='json')
+    assert response.data['created'] == 300
+    assert portfolio1.bonds.count() == 302
+
+
+@pytest.mark.django_db
+def test_import_looks_up_each_unknown_isin_once(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    cdcp_stub
+):
+    rows = [make_row(f'import_{index}', 'CZ0009999991', portfolio1) for index in range(3)]
+    import_url = reverse('bond_service_api:bond_import')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.generic('POST', import_url, to_csv(rows), content_type='text/csv')
+    assert response.data['created'] == 1
+    assert response.data['failed'] == 2
+    assert cdcp_stub.calls == ['CZ0009999991']
+
+
+@pytest.mark.django_db
+def test_anonymous_user_cant_import_bonds(api_client: APIClient):
+    import_url = reverse('bond_service_api:bond_import')
+    response: Response = api_client.generic('POST', import_url, CSV_HEADER + '\n', content_type='text/csv')
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_import_updates_portfolio_summary_and_cached_analysis(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    issued_isins
+):
+    rows = [make_row(f'import_{index}', isin, portfolio1) for index, isin in enumerate(issued_isins(2))]
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == 200
+    api_client.post(reverse('bond_service_api:bond_import'), data=rows, format='json')
+    response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == 400
+    assert verify_portfolio_summaries() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('body', [1, 'abc', [1, 2], {'emission_name': 'Bond'}])
+def test_import_rejects_a_body_that_is_not_a_list_of_objects(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    body
+):
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.post(reverse('bond_service_api:bond_import'), data=body, format='json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert portfolio1.bonds.count() == 2
@@ -4,7 +4,9 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from requests import Response
+from django.db import connection
 from django.db.models.query import QuerySet
+from django.test.utils import CaptureQueriesContext
 from ..models import Portfolio, Bond
 
 
@@ -265,3 +267,247 @@ def test_user_cant_delete_bond(
     authenticate_user(username='user1', password='password1')
     response: Response = api_client.delete(bond_url)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ordering', ['pk', 'maturity_date'])
+def test_user_walks_bonds_with_cursor_pagination(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    ordering: str,
+    django_assert_num_queries,
+    create_bonds
+):
+    create_bonds(portfolio1, 53)
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(
+        list_bonds_url, data={'pagination': 'cursor', 'ordering': ordering, 'limit': 10})
+    assert 'count' not in response.data
+    seen = [bond['id'] for bond in response.data['results']]
+    while response.data['next']:
+        with django_assert_num_queries(2):
+            response = api_client.get(response.data['next'])
+        seen.extend(bond['id'] for bond in response.data['results'])
+    expected = portfolio1.bonds.order_by(*(('maturity_date', 'pk') if ordering == 'maturity_date' else ('pk',)))
+    assert seen == list(expected.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_rejects_unknown_ordering(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_bonds_url, data={'pagination': 'cursor', 'ordering': 'bond_value'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('filters, expected', [
+    ({'yields_frequency': 4}, lambda bond: bond.yields_frequency == 4),
+    ({'interest_rate_min': '5', 'interest_rate_max': '7.5'}, lambda bond: 5 <= bond.interest_rate <= 7.5),
+    ({'maturity_date_from': '2027-01-01', 'maturity_date_to': '2028-12-31'},
+     lambda bond: '2027-01-01' <= bond.maturity_date.isoformat() <= '2028-12-31'),
+])
+def test_user_filters_bonds(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    filters: dict,
+    expected,
+    create_bonds
+):
+    create_bonds(portfolio1, 20)
+    for index, bond in enumerate(portfolio1.bonds.all()):
+        bond.interest_rate = index % 10
+        bond.yields_frequency = (1, 4, 12)[index % 3]
+        bond.save()
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_bonds_url, data={**filters, 'limit': 100})
+    assert response.status_code == status.HTTP_200_OK
+    bonds = [bond for bond in portfolio1.bonds.order_by('pk') if expected(bond)]
+    assert bonds
+    assert sorted(bond['id'] for bond in response.data['results']) == [bond.pk for bond in bonds]
+
+
+@pytest.mark.django_db
+def test_user_filters_bonds_by_portfolio(
+    api_client: APIClient,
+    authenticate_user,
+    admin_user: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='admin', password='adminpassword')
+    response: Response = api_client.get(list_bonds_url, data={'portfolio': portfolio2.pk})
+    assert response.status_code == status.HTTP_200_OK
+    assert [bond['id'] for bond in response.data['results']] == list(portfolio2.bonds.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('filters', [
+    {'interest_rate_min': '8', 'interest_rate_max': '2'},
+    {'maturity_date_from': '2030-01-01', 'maturity_date_to': '2029-01-01'},
+    {'yields_frequency': 5},
+])
+def test_bond_list_rejects_invalid_filters(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    filters: dict
+):
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_bonds_url, data=filters)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_user_gets_his_bonds_maturing_between_dates(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    create_bonds
+):
+    create_bonds(portfolio1, 20)
+    maturing_bonds_url = reverse('bond_service_api:bond_maturing')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(
+        maturing_bonds_url, data={'start_date': '2027-01-01', 'end_date': '2028-01-01', 'limit': 100})
+    assert response.status_code == status.HTTP_200_OK
+    expected = Bond.objects.filter(
+        portfolio__created_by=user1, maturity_date__range=('2027-01-01', '2028-01-01')
+    ).order_by('maturity_date', 'pk')
+    assert expected
+    assert [bond['id'] for bond in response.data['results']] == list(expected.values_list('pk', flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('data', [
+    {'start_date': '2027-01-01'},
+    {'start_date': '2028-01-01', 'end_date': '2027-01-01'},
+])
+def test_maturing_bonds_require_a_valid_range(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    data: dict
+):
+    maturing_bonds_url = reverse('bond_service_api:bond_maturing')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(maturing_bonds_url, data=data)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast_path', [True, False])
+def test_user_selects_bond_fields(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    fast_path: bool
+):
+    settings.API_READ_FAST_PATH = fast_path
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(
+        list_bonds_url, data={'fields': 'emission_isin,bond_value,maturity_date'})
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(response.data['results'], key=lambda bond: bond['emission_isin']) == [
+        {'emission_isin': bond.emission_isin, 'bond_value': str(bond.bond_value), 'maturity_date': '2024-08-06'}
+        for bond in portfolio1.bonds.order_by('emission_isin')
+    ]
+    response = api_client.get(
+        reverse('bond_service_api:bond_details', args=[portfolio1.bonds.first().pk]),
+        data={'exclude': 'created_at,updated_at,portfolio,id'},
+    )
+    assert list(response.data) == [
+        'emission_name', 'emission_isin', 'bond_value', 'interest_rate', 'purchase_date', 'maturity_date',
+        'yields_frequency',
+    ]
+
+
+@pytest.mark.django_db
+def test_bond_sparse_fieldset_narrows_the_query(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio
+):
+    settings.API_READ_FAST_PATH = False
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    with CaptureQueriesContext(connection) as queries:
+        response: Response = api_client.get(list_bonds_url, data={'fields': 'emission_isin', 'pagination': 'cursor'})
+    assert response.status_code == status.HTTP_200_OK
+    page_query = queries.captured_queries[-1]['sql']
+    assert 'emission_isin' in page_query
+    assert 'emission_name' not in page_query
+    assert 'interest_rate' not in page_query
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_doesnt_narrow_bond_writes(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    data = {
+        'emission_name': 'sparse_bond',
+        'emission_isin': 'CZ0009013306',
+        'bond_value': '105.00',
+        'interest_rate': '15.00',
+        'purchase_date': '2024-07-06',
+        'maturity_date': '2024-08-06',
+        'yields_frequency': 12,
+        'portfolio': portfolio1.pk
+    }
+    response: Response = api_client.post(f'{list_bonds_url}?fields=emission_isin', data=data)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['bond_value'] == data['bond_value']
+    bond = Bond.objects.get(pk=response.data['id'])
+    assert str(bond.bond_value) == data['bond_value']
+    bond_url = reverse('bond_service_api:bond_details', kwargs={'pk': bond.pk})
+    response = api_client.patch(f'{bond_url}?fields=emission_isin', data={'emission_name': 'patched_bond'})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['emission_name'] == 'patched_bond'
+    bond.refresh_from_db()
+    assert bond.emission_name == 'patched_bond'
+
+
+@pytest.mark.django_db
+def test_user_walks_sparse_bonds_with_cursor_pagination(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    create_bonds
+):
+    create_bonds(portfolio1, 15)
+    list_bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(
+        list_bonds_url, data={'pagination': 'cursor', 'ordering': 'maturity_date', 'limit': 4, 'fields': 'id'})
+    seen = [bond['id'] for bond in response.data['results']]
+    while response.data['next']:
+        response = api_client.get(response.data['next'])
+        seen.extend(bond['id'] for bond in response.data['results'])
+    assert seen == list(portfolio1.bonds.order_by('maturity_date', 'pk').values_list('pk', flat=True))
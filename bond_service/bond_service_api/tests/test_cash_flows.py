@@ -0,0 +1,136 @@
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from types import GeneratorType
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from requests import Response
+from ..cashflows import CashFlow, bond_cash_flows, merge_cash_flows, portfolio_cash_flows
+from ..models import Portfolio, Bond
+
+
+def make_bond(pk, purchase_date, maturity_date, yields_frequency, bond_value='1000.00', interest_rate='5.00'):
+    return Bond(
+        pk=pk,
+        bond_value=Decimal(bond_value),
+        interest_rate=Decimal(interest_rate),
+        purchase_date=purchase_date,
+        maturity_date=maturity_date,
+        yields_frequency=yields_frequency,
+        portfolio_id=1,
+    )
+
+
+def test_quarterly_bond_schedule():
+    bond = make_bond(1, date(2024, 1, 15), date(2025, 1, 15), 4)
+    schedule = bond_cash_flows(bond)
+    assert isinstance(schedule, GeneratorType)
+    assert list(schedule) == [
+        CashFlow(date(2024, 4, 15), 1, 1, 'coupon', Decimal('12.50')),
+        CashFlow(date(2024, 7, 15), 1, 1, 'coupon', Decimal('12.50')),
+        CashFlow(date(2024, 10, 15), 1, 1, 'coupon', Decimal('12.50')),
+        CashFlow(date(2025, 1, 15), 1, 1, 'coupon', Decimal('12.50')),
+        CashFlow(date(2025, 1, 15), 1, 1, 'principal', Decimal('1000.00')),
+    ]
+
+
+def test_coupon_dates_are_anchored_on_maturity():
+    bond = make_bond(1, date(2024, 5, 31), date(2024, 8, 31), 12)
+    assert [cash_flow.date for cash_flow in bond_cash_flows(bond)] == [
+        date(2024, 6, 30), date(2024, 7, 31), date(2024, 8, 31), date(2024, 8, 31),
+    ]
+
+
+def test_bond_schedule_in_date_range():
+    bond = make_bond(1, date(2020, 3, 1), date(2030, 3, 1), 1)
+    schedule = list(bond_cash_flows(bond, start_date=date(2024, 3, 1), end_date=date(2026, 2, 28)))
+    assert [cash_flow.date for cash_flow in schedule] == [date(2024, 3, 1), date(2025, 3, 1)]
+    assert list(bond_cash_flows(bond, start_date=date(2030, 3, 2))) == []
+
+
+def test_merged_schedule_is_ordered_by_date():
+    bonds = [
+        make_bond(1, date(2024, 1, 1), date(2025, 1, 1), 1),
+        make_bond(2, date(2024, 1, 1), date(2024, 7, 1), 4),
+        make_bond(3, date(2024, 1, 1), date(2024, 4, 1), 12),
+    ]
+    schedule = list(merge_cash_flows(bond_cash_flows(bond) for bond in bonds))
+    keys = [(cash_flow.date, cash_flow.bond_id, cash_flow.kind) for cash_flow in schedule]
+    assert keys == sorted(keys)
+    assert len(schedule) == 2 + 3 + 4
+
+
+@pytest.mark.django_db
+def test_portfolio_schedule_skips_bonds_outside_range(portfolio1: Portfolio, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert list(portfolio_cash_flows(portfolio1.bonds.all(), start_date=date(2024, 8, 7))) == []
+
+
+@pytest.mark.django_db
+def test_portfolio_schedule_is_consumed_without_queries(portfolio1: Portfolio, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        cash_flows = portfolio_cash_flows(portfolio1.bonds.all())
+    with django_assert_num_queries(0):
+        assert len(list(cash_flows)) > 0
+
+
+@pytest.mark.django_db
+def test_user_streams_portfolio_cash_flows(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    cash_flows_url = reverse('bond_service_api:portfolio_cash_flows')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(cash_flows_url, data={
+        'portfolio_pk': portfolio1.pk,
+        'start_date': '2024-07-01',
+        'end_date': '2024-12-31',
+    })
+    assert response.status_code == status.HTTP_200_OK
+    assert response['Content-Type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    bond_ids = sorted(portfolio1.bonds.values_list('pk', flat=True))
+    assert lines == [
+        {'date': '2024-08-06', 'bond_id': bond_ids[0], 'portfolio_id': portfolio1.pk, 'kind': 'coupon', 'amount': '1.25'},
+        {'date': '2024-08-06', 'bond_id': bond_ids[0], 'portfolio_id': portfolio1.pk, 'kind': 'principal',
+         'amount': '100.00'},
+        {'date': '2024-08-06', 'bond_id': bond_ids[1], 'portfolio_id': portfolio1.pk, 'kind': 'coupon', 'amount': '1.25'},
+        {'date': '2024-08-06', 'bond_id': bond_ids[1], 'portfolio_id': portfolio1.pk, 'kind': 'principal',
+         'amount': '100.00'},
+    ]
+
+
+@pytest.mark.django_db
+def test_cash_flows_reject_inverted_date_range(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    cash_flows_url = reverse('bond_service_api:portfolio_cash_flows')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(cash_flows_url, data={
+        'portfolio_pk': portfolio1.pk,
+        'start_date': '2024-12-31',
+        'end_date': '2024-07-01',
+    })
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'end_date' in response.data
+
+
+@pytest.mark.django_db
+def test_user_cant_get_others_portfolio_cash_flows(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio2: Portfolio
+):
+    cash_flows_url = reverse('bond_service_api:portfolio_cash_flows')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(cash_flows_url, data={'portfolio_pk': portfolio2.pk})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
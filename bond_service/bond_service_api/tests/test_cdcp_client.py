@@ -0,0 +1,87 @@
+import time
+import pytest
+from django.core.exceptions import ValidationError
+from .. import validators
+from ..cdcp import get_cdcp_client, CDCPUnavailable, CircuitBreaker, CircuitBreakerOpen
+
+
+@pytest.fixture
+def cdcp_client(cdcp_stub, settings):
+    def _cdcp_client(**overrides):
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        get_cdcp_client.cache_clear()
+        return get_cdcp_client()
+    return _cdcp_client
+
+
+def test_connections_are_reused(cdcp_stub, cdcp_client):
+    client = cdcp_client()
+    for _ in range(5):
+        assert client.isin_exists('CZ0009999991') is True
+    assert len(cdcp_stub.calls) == 5
+    assert len(cdcp_stub.client_ports) == 1
+
+
+def test_read_timeout(cdcp_stub, cdcp_client):
+    client = cdcp_client(CDCP_READ_TIMEOUT=0.2, CDCP_RETRIES=0)
+    cdcp_stub.latency = 1
+    started_at = time.monotonic()
+    with pytest.raises(CDCPUnavailable):
+        client.isin_exists('CZ0009999991')
+    assert time.monotonic() - started_at < 1
+
+
+def test_server_errors_are_retried(cdcp_stub, cdcp_client):
+    client = cdcp_client(CDCP_RETRIES=2)
+    cdcp_stub.faults = [503, 'reset']
+    assert client.isin_exists('CZ0009999991') is True
+    assert len(cdcp_stub.calls) == 3
+
+
+def test_breaker_opens_after_consecutive_failures(cdcp_stub, cdcp_client):
+    client = cdcp_client(CDCP_RETRIES=0, CDCP_BREAKER_FAILURE_THRESHOLD=2)
+    cdcp_stub.faults = [500, 500]
+    for _ in range(2):
+        with pytest.raises(CDCPUnavailable):
+            client.isin_exists('CZ0009999991')
+    with pytest.raises(CircuitBreakerOpen):
+        client.isin_exists('CZ0009999991')
+    assert len(cdcp_stub.calls) == 2
+
+
+def test_breaker_lets_one_trial_call_through_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
+    time.sleep(0.05)
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_validation_fails_fast_while_breaker_is_open(cdcp_stub, cdcp_client):
+    client = cdcp_client(CDCP_BREAKER_FAILURE_THRESHOLD=1)
+    client.breaker.record_failure()
+    with pytest.raises(ValidationError):
+        validators.validate_isin('CZ0009999991')
+    assert cdcp_stub.calls == []
+
+
+def test_validation_is_deferred_while_breaker_is_open(cdcp_stub, cdcp_client, settings):
+    settings.ISIN_DEFER_ON_CDCP_OUTAGE = True
+    client = cdcp_client(CDCP_BREAKER_FAILURE_THRESHOLD=1)
+    client.breaker.record_failure()
+    assert validators.validate_isin('CZ0001004113') == 'CZ0001004113'
+    assert cdcp_stub.calls == []
+
+
+def test_non_json_response_is_a_breaker_failure(cdcp_stub, cdcp_client):
+    client = cdcp_client(CDCP_BREAKER_FAILURE_THRESHOLD=1)
+    cdcp_stub.faults = ['html']
+    with pytest.raises(ValidationError):
+        validators.validate_isin('CZ0009999991')
+    assert client.breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,201 @@
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from ..models import Portfolio, Bond
+from ..versions import check_shared_caches
+
+
+def analysis_url(portfolio: Portfolio) -> str:
+    return reverse('bond_service_api:portfolio_investment_analysis') + f'?portfolio_pk={portfolio.pk}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('get_url', [
+    lambda portfolio: reverse('bond_service_api:bond'),
+    lambda portfolio: reverse('bond_service_api:bond_maturing') + '?start_date=2024-01-01&end_date=2024-12-31',
+    lambda portfolio: reverse('bond_service_api:portfolio'),
+    lambda portfolio: reverse('bond_service_api:portfolio_details', args=[portfolio.pk]),
+    analysis_url,
+    lambda portfolio: reverse('bond_service_api:portfolio_investment_analysis_batch'),
+])
+def test_unchanged_response_is_not_modified_without_queries(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries,
+    get_url
+):
+    url = get_url(portfolio1)
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response['ETag']
+    # Only the user of the access token is loaded
+    with django_assert_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response['ETag'] == etag
+    assert response.content == b''
+
+
+@pytest.mark.django_db
+def test_bond_changes_change_the_etags(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    urls = [
+        reverse('bond_service_api:bond'),
+        reverse('bond_service_api:portfolio'),
+        reverse('bond_service_api:portfolio_details', args=[portfolio1.pk]),
+        analysis_url(portfolio1),
+    ]
+    authenticate_user(username='user1', password='password1')
+    etags = [api_client.get(url)['ETag'] for url in urls]
+    bond = portfolio1.bonds.get(emission_name='bond1_1')
+    bond.bond_value = '200'
+    bond.save()
+    for url, etag in zip(urls, etags):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+    etags = [api_client.get(url)['ETag'] for url in urls]
+    bond.delete()
+    assert all(api_client.get(url)['ETag'] != etag for url, etag in zip(urls, etags))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('get_url', [
+    analysis_url,
+    lambda portfolio: reverse('bond_service_api:portfolio_investment_analysis_batch'),
+])
+def test_analysis_etag_changes_with_the_analysis_date(
+    api_client: APIClient,
+    authenticate_user,
+    monkeypatch,
+    user1: User,
+    portfolio1: Portfolio,
+    get_url
+):
+    url = get_url(portfolio1)
+    authenticate_user(username='user1', password='password1')
+    # Past midnight in Prague (TIME_ZONE) but still the previous day in UTC
+    monkeypatch.setattr(timezone, 'now', lambda: datetime(2024, 7, 5, 22, 30, tzinfo=dt_timezone.utc))
+    response = api_client.get(url)
+    etag, content = response['ETag'], response.content
+    monkeypatch.setattr(timezone, 'now', lambda: datetime(2024, 7, 6, 0, 30, tzinfo=dt_timezone.utc))
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response['ETag'] != etag
+    assert response.content != content
+
+
+@pytest.mark.django_db
+def test_other_portfolio_changes_keep_the_portfolio_etag(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    for url in [reverse('bond_service_api:portfolio_details', args=[portfolio1.pk]), analysis_url(portfolio1)]:
+        etag = api_client.get(url)['ETag']
+        Bond.objects.filter(portfolio=portfolio2).first().delete()
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_bond_detail_validators_come_from_updated_at(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    bond = portfolio1.bonds.first()
+    bond_url = reverse('bond_service_api:bond_details', args=[bond.pk])
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(bond_url)
+    etag, last_modified = response['ETag'], response['Last-Modified']
+    with django_assert_num_queries(2):
+        response = api_client.get(bond_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    response = api_client.get(bond_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    bond.interest_rate = '5'
+    bond.save()
+    response = api_client.get(bond_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['interest_rate'] == '5.00'
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_the_user_and_the_representation(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    admin_user: User,
+    portfolio1: Portfolio
+):
+    bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(bonds_url)
+    etag = response['ETag']
+    assert 'Accept' in response['Vary'] and 'Authorization' in response['Vary']
+    response = api_client.get(bonds_url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT='application/x-msgpack')
+    assert response.status_code == status.HTTP_200_OK
+    response = api_client.get(bonds_url, data={'fields': 'emission_name'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    authenticate_user(username='admin', password='adminpassword')
+    response = api_client.get(bonds_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_inaccessible_bond_has_no_validators(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio2: Portfolio
+):
+    bond_url = reverse('bond_service_api:bond_details', args=[portfolio2.bonds.first().pk])
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(bond_url, HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert not response.has_header('ETag')
+
+
+@pytest.mark.django_db
+def test_conditional_get_can_be_disabled(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio
+):
+    settings.API_CONDITIONAL_GET = False
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(reverse('bond_service_api:portfolio'))
+    assert response.status_code == status.HTTP_200_OK
+    assert 'ETag' not in response
+    response = api_client.get(reverse('bond_service_api:portfolio'), HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0]['name'] == 'portfolio1'
+
+
+@pytest.mark.parametrize('setting', ['API_CONDITIONAL_GET', 'PORTFOLIO_ANALYSIS_CACHE'])
+def test_version_caches_require_shared_caches(settings, setting):
+    settings.API_CONDITIONAL_GET = settings.PORTFOLIO_ANALYSIS_CACHE = False
+    check_shared_caches()
+    setattr(settings, setting, True)
+    with pytest.raises(ImproperlyConfigured, match=setting):
+        check_shared_caches()
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.exceptions import ValidationError
+from .. import validators
+from ..isin_cache import isin_cache, LRUCache
+
+
+def test_known_isin_is_looked_up_once(cdcp_stub):
+    for _ in range(5):
+        assert validators.validate_isin('CZ0009999991') == 'CZ0009999991'
+    assert cdcp_stub.calls == ['CZ0009999991']
+    assert isin_cache.stats()['local_hit'] == 4
+    assert isin_cache.stats()['miss'] == 1
+
+
+def test_unknown_isin_is_cached_as_negative(cdcp_stub):
+    for _ in range(3):
+        with pytest.raises(ValidationError):
+            validators.validate_isin('CZ0001004113')
+    assert cdcp_stub.calls == ['CZ0001004113']
+
+
+def test_shared_tier_is_used_when_local_tier_is_empty(cdcp_stub):
+    validators.validate_isin('CZ0009999991')
+    isin_cache.local.clear()
+    validators.validate_isin('CZ0009999991')
+    assert cdcp_stub.calls == ['CZ0009999991']
+    assert isin_cache.stats()['shared_hit'] == 1
+
+
+def test_api_errors_are_not_cached(cdcp_stub):
+    cdcp_stub.faults = [404, 404]
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            validators.validate_isin('CZ0000000005')
+    assert cdcp_stub.calls == ['CZ0000000005', 'CZ0000000005']
+
+
+def test_positive_and_negative_ttls(settings):
+    assert isin_cache.get_ttl(True) == settings.ISIN_CACHE_POSITIVE_TTL
+    assert isin_cache.get_ttl(False) == settings.ISIN_CACHE_NEGATIVE_TTL
+
+
+def test_lru_cache_evicts_least_recently_used_and_expired_entries():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', True, ttl=60)
+    cache.set('b', True, ttl=60)
+    cache.get('a')
+    cache.set('c', True, ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('a') is True
+    cache.set('d', False, ttl=0)
+    assert cache.get('d') is None
+
+
+def test_counters_are_exact_under_concurrent_lookups(cdcp_stub):
+    validators.validate_isin('CZ0009999991')
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: validators.validate_isin('CZ0009999991'), range(2000)))
+    assert isin_cache.stats()['local_hit'] == 2000
+    assert isin_cache.stats()['miss'] == 1
@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command, CommandError
+from .. import validators
+from ..isin_registry import SnapshotISINRegistry, is_valid_isin_checksum, write_snapshot
+
+
+@pytest.mark.parametrize('isin, expected', [
+    ('CZ0003551251', True),
+    ('US0378331005', True),
+    ('CZ0001004113', True),
+    ('CZ0001004115', False),
+    ('cz0003551251', False),
+    ('CZ000355125', False),
+    ('', False),
+    (None, False),
+])
+def test_isin_checksum(isin, expected):
+    assert is_valid_isin_checksum(isin) is expected
+
+
+def test_snapshot_isin_is_validated_locally(cdcp_stub):
+    assert validators.validate_isin('CZ0003551251') == 'CZ0003551251'
+    assert cdcp_stub.calls == []
+
+
+def test_malformed_isin_is_rejected_before_lookup(cdcp_stub):
+    with pytest.raises(ValidationError):
+        validators.validate_isin('CZ0001004115')
+    assert cdcp_stub.calls == []
+
+
+def test_isin_missing_from_snapshot_without_fallback(cdcp_stub, settings):
+    settings.ISIN_NETWORK_FALLBACK = False
+    with pytest.raises(ValidationError):
+        validators.validate_isin('CZ0009999991')
+    assert cdcp_stub.calls == []
+
+
+def test_snapshot_is_reloaded_when_file_changes(tmp_path):
+    snapshot_path = str(tmp_path / 'snapshot.txt')
+    write_snapshot(snapshot_path, ['CZ0003551251'])
+    registry = SnapshotISINRegistry(path=snapshot_path, reload_interval=0)
+    assert registry.contains('CZ0003551251') is True
+    assert registry.contains('CZ0001004113') is None
+    write_snapshot(snapshot_path, ['CZ0003551251', 'CZ0001004113'])
+    os.utime(snapshot_path, (0, 0))
+    assert registry.contains('CZ0001004113') is True
+    assert len(registry) == 2
+
+
+def test_missing_snapshot_behaves_like_empty_one(tmp_path):
+    registry = SnapshotISINRegistry(path=str(tmp_path / 'missing.txt'), reload_interval=0)
+    assert registry.contains('CZ0003551251') is None
+
+
+def test_refresh_isin_snapshot_command(tmp_path):
+    source_path = tmp_path / 'source.json'
+    source_path.write_text(json.dumps({'vydaneisiny': [
+        {'isin': 'CZ0008040318'},
+        {'isin': 'CZ0003551251'},
+        {'isin': 'CZ0003551251'},
+        {'isin': 'CZ0001004115'},
+    ]}))
+    output_path = tmp_path / 'snapshot.txt'
+    call_command('refresh_isin_snapshot', source=str(source_path), output=str(output_path))
+    assert output_path.read_text().split() == ['CZ0003551251', 'CZ0008040318']
+
+
+def test_refresh_isin_snapshot_command_keeps_snapshot_without_valid_isins(tmp_path):
+    source_path = tmp_path / 'source.txt'
+    source_path.write_text('CZ0001004115\n')
+    output_path = tmp_path / 'snapshot.txt'
+    write_snapshot(str(output_path), ['CZ0003551251'])
+    with pytest.raises(CommandError):
+        call_command('refresh_isin_snapshot', source=str(source_path), output=str(output_path))
+    assert output_path.read_text().split() == ['CZ0003551251']
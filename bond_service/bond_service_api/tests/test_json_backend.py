@@ -0,0 +1,99 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+import numpy
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from ..models import Portfolio, Bond
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer
+from ..serializers import BondSerializer
+from ..utils import get_portfolios_analysis
+
+
+@pytest.mark.parametrize('data', [
+    {'decimal': Decimal('1.10'), 'date': datetime.date(2024, 7, 6), 'text': 'a b c "quoted" é\x1b'},
+    {'utc': datetime.datetime(2024, 7, 6, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)},
+    {'naive': datetime.datetime(2024, 7, 6, 12, 30), 'time': datetime.time(8, 15)},
+    {1: 'int key', 'tuple': (1, 2), 'numpy': numpy.float64(0.1), 'big': 2 ** 70},
+    [{'nested': [None, True, 1.5, -3]}],
+])
+def test_fast_renderer_output_equals_stock_renderer(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_fast_renderer_falls_back_for_indented_output():
+    data = {'a': [1, 2]}
+    media_type = 'application/json; indent=4'
+    assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+
+
+def test_stdlib_backend_is_selectable(settings):
+    settings.API_JSON_BACKEND = 'stdlib'
+    data = {'decimal': Decimal('1.10'), 'float': 1e16}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data) == b'{"decimal":1.1,"float":1e+16}'
+
+
+@pytest.mark.django_db
+def test_fast_parser_parses_api_requests(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User
+):
+    authenticate_user(username='user1', password='password1')
+    response = api_client.post(
+        reverse('bond_service_api:portfolio'),
+        data=json.dumps({'name': 'portfolio_é'}),
+        content_type='application/json',
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['name'] == 'portfolio_é'
+    response = api_client.post(reverse('bond_service_api:portfolio'), data='{"name": ', content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data['detail'].startswith('JSON parse error')
+
+
+@pytest.mark.parametrize('body', [b'NaN', b'{"value": Infinity}'])
+def test_fast_parser_rejects_non_finite_numbers(body):
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(body))
+
+
+def get_payloads(bonds_count):
+    return {
+        'bond list': {
+            'count': Bond.objects.count(),
+            'next': None,
+            'previous': None,
+            'results': BondSerializer(Bond.objects.order_by('pk')[:bonds_count], many=True).data,
+        },
+        'analysis': get_portfolios_analysis(Portfolio.objects.all()),
+    }
+
+
+@pytest.mark.django_db
+def test_fast_renderer_renders_api_payloads_like_stock_renderer(user1: User, create_portfolios):
+    create_portfolios(user1, 20, 3, bond_value='1000.25', interest_rate='3.10')
+    for data in get_payloads(60).values():
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_json_renderer_benchmark(user1: User, create_portfolios, best_time):
+    '''
+    Compares the stock and the orjson renderer on a bond list page of 1000 bonds and on
+    the analysis of 1000 portfolios.
+    '''
+    create_portfolios(user1, 1000, 3, bond_value='1000.25', interest_rate='3.10')
+    for data in get_payloads(1000).values():
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        stock_time = best_time(lambda: JSONRenderer().render(data))
+        fast_time = best_time(lambda: FastJSONRenderer().render(data))
+        assert fast_time < stock_time
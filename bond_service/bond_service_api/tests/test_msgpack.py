@@ -0,0 +1,92 @@
+from decimal import Decimal
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from ..models import Portfolio
+from ..msgpack_backend import packb, unpackb
+from ..utils import get_portfolio_analysis
+
+MSGPACK = 'application/x-msgpack'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('negotiation', [{'data': {'format': 'msgpack'}}, {'HTTP_ACCEPT': MSGPACK}])
+def test_bond_and_portfolio_endpoints_render_msgpack(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    negotiation: dict
+):
+    authenticate_user(username='user1', password='password1')
+    for url in [
+        reverse('bond_service_api:bond'),
+        reverse('bond_service_api:bond_details', args=[portfolio1.bonds.first().pk]),
+        reverse('bond_service_api:portfolio'),
+        reverse('bond_service_api:portfolio_details', args=[portfolio1.pk]),
+    ]:
+        expected = api_client.get(url).json()
+        response = api_client.get(url, **negotiation)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == MSGPACK
+        assert unpackb(response.content) == expected
+
+
+@pytest.mark.django_db
+def test_msgpack_analysis_keeps_decimals_exact(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(
+        reverse('bond_service_api:portfolio_investment_analysis'),
+        data={'portfolio_pk': portfolio1.pk},
+        HTTP_ACCEPT=MSGPACK,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = unpackb(response.content)
+    expected = get_portfolio_analysis(portfolio1)
+    assert isinstance(data['average_interest_rate'], Decimal)
+    assert data['average_interest_rate'] == expected['average_interest_rate']
+    assert data['total_value'] == expected['total_value']
+
+
+@pytest.mark.django_db
+def test_user_can_create_bond_from_msgpack(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    body = packb({
+        'emission_name': 'msgpack_bond',
+        'emission_isin': 'CZ0009013306',
+        'bond_value': Decimal('105.10'),
+        'interest_rate': Decimal('15.25'),
+        'purchase_date': '2024-07-06',
+        'maturity_date': '2024-08-06',
+        'yields_frequency': 12,
+        'portfolio': portfolio1.pk,
+    })
+    response = api_client.generic('POST', reverse('bond_service_api:bond'), body, content_type=MSGPACK)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['bond_value'] == '105.10'
+    assert response.data['interest_rate'] == '15.25'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('body', [b'\xc1', b'\x92\x01', b'\xd4\x01\xff'])
+def test_invalid_msgpack_body_is_rejected(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    body: bytes
+):
+    authenticate_user(username='user1', password='password1')
+    response = api_client.generic('POST', reverse('bond_service_api:portfolio'), body, content_type=MSGPACK)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
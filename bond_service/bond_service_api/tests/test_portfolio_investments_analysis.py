@@ -69,3 +69,225 @@ def test_admin_get_portfolio_analysis(
     assert response.data['total_value'] == total_value
     assert response.data['future_value'] == future_value
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_empty_portfolio_analysis(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User
+):
+    portfolio = Portfolio.objects.create(name='empty_portfolio', created_by=user1)
+    list_portfolios_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_portfolios_url, data={'portfolio_pk': portfolio.pk})
+    assert response.data == {'message': 'Portfolio contains no bonds.'}
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('bonds_count', [2, 50, 500])
+def test_portfolio_analysis_query_count_does_not_depend_on_portfolio_size(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    bonds_count: int,
+    django_assert_num_queries,
+    create_bonds
+):
+    create_bonds(portfolio1, bonds_count - 2)
+    list_portfolios_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    with django_assert_num_queries(3):
+        response: Response = api_client.get(list_portfolios_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == Decimal(100 * bonds_count)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_user_gets_analysis_of_all_his_portfolios(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    empty_portfolio = Portfolio.objects.create(name='empty_portfolio', created_by=user1)
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    single_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(batch_url)
+    single_response: Response = api_client.get(single_url, data={'portfolio_pk': portfolio1.pk})
+    assert list(response.data) == [portfolio1.pk, empty_portfolio.pk]
+    assert response.data[portfolio1.pk] == single_response.data
+    assert response.data[empty_portfolio.pk] == {'message': 'Portfolio contains no bonds.'}
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_user_cant_get_batch_analysis_of_others_portfolios(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(batch_url, data={'portfolio_pks': f'{portfolio1.pk},{portfolio2.pk}'})
+    assert 'total_value' in response.data[portfolio1.pk]
+    assert response.data[portfolio2.pk] == {'detail': 'Not found.'}
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_admin_gets_batch_analysis_of_all_portfolios(
+    api_client: APIClient,
+    authenticate_user,
+    admin_user: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    authenticate_user(username='admin', password='adminpassword')
+    response: Response = api_client.get(batch_url)
+    assert list(response.data) == [portfolio1.pk, portfolio2.pk]
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_batch_analysis_rejects_invalid_portfolio_pks(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User
+):
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(batch_url, data={'portfolio_pks': '1,abc'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('portfolios_count', [1, 20])
+def test_batch_analysis_query_count_does_not_depend_on_portfolio_count(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolios_count: int,
+    settings,
+    django_assert_num_queries
+):
+    # The aggregates cache is tested, not the response cache in front of it
+    settings.API_RESPONSE_CACHE_TIMEOUT = 0
+    for index in range(portfolios_count):
+        portfolio = Portfolio.objects.create(name=f'batch_portfolio_{index}', created_by=user1)
+        Bond.objects.create(
+            emission_name=f'batch_bond_{index}',
+            emission_isin=f'BATCH{index:07d}',
+            bond_value='100',
+            interest_rate='10',
+            purchase_date='2024-07-06',
+            maturity_date='2030-08-06',
+            yields_frequency=12,
+            portfolio=portfolio,
+        )
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    authenticate_user(username='user1', password='password1')
+    with django_assert_num_queries(4):
+        response: Response = api_client.get(batch_url)
+    assert len(response.data) == portfolios_count + 1
+    with django_assert_num_queries(2):
+        response: Response = api_client.get(batch_url)
+    assert len(response.data) == portfolios_count + 1
+
+
+@pytest.mark.django_db
+def test_repeated_analysis_is_served_from_cache(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    # The aggregates cache is tested, not the response cache in front of it
+    settings.API_RESPONSE_CACHE_TIMEOUT = 0
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    first_response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    with django_assert_num_queries(1):
+        response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data == first_response.data
+
+
+@pytest.mark.django_db
+def test_analysis_cache_can_be_disabled(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    settings.PORTFOLIO_ANALYSIS_CACHE = False
+    settings.API_CONDITIONAL_GET = False
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    first_response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    with django_assert_num_queries(3):
+        response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data == first_response.data
+
+
+@pytest.mark.django_db
+def test_cached_analysis_is_invalidated_by_bond_changes(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == Decimal('200')
+    bond = Bond.objects.create(
+        emission_name='cached_bond',
+        emission_isin='CZ0009013306',
+        bond_value='300',
+        interest_rate='15',
+        purchase_date='2024-07-06',
+        maturity_date='2024-08-06',
+        yields_frequency=12,
+        portfolio=portfolio1,
+    )
+    response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == Decimal('500')
+    bond.bond_value = Decimal('400')
+    bond.save()
+    response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == Decimal('600')
+    bond.delete()
+    response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.data['total_value'] == Decimal('200')
+
+
+@pytest.mark.django_db
+def test_moving_a_bond_invalidates_both_portfolios(
+    api_client: APIClient,
+    authenticate_user,
+    admin_user: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    batch_url = reverse('bond_service_api:portfolio_investment_analysis_batch')
+    authenticate_user(username='admin', password='adminpassword')
+    response: Response = api_client.get(batch_url)
+    assert response.data[portfolio1.pk]['total_value'] == Decimal('200')
+    bond = Bond.objects.filter(portfolio=portfolio1).only('pk', 'portfolio').first()
+    bond.portfolio = portfolio2
+    bond.save()
+    response = api_client.get(batch_url)
+    assert response.data[portfolio1.pk]['total_value'] == Decimal('100')
+    assert response.data[portfolio2.pk]['total_value'] == Decimal('300')
@@ -0,0 +1,177 @@
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command, CommandError
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from requests import Response
+from ..models import Portfolio, PortfolioSummary, Bond
+from ..summaries import verify_portfolio_summaries
+from ..utils import get_portfolios_analysis
+
+
+def create_bond(portfolio, name, isin, bond_value, maturity_date):
+    return Bond.objects.create(
+        emission_name=name,
+        emission_isin=isin,
+        bond_value=bond_value,
+        interest_rate='5.25',
+        purchase_date='2024-07-06',
+        maturity_date=maturity_date,
+        yields_frequency=4,
+        portfolio=portfolio,
+    )
+
+
+def get_summary(portfolio):
+    return PortfolioSummary.objects.get(portfolio=portfolio)
+
+
+@pytest.mark.django_db
+def test_new_portfolio_has_an_empty_summary(user1: User):
+    portfolio = Portfolio.objects.create(name='empty_portfolio', created_by=user1)
+    summary = get_summary(portfolio)
+    assert summary.bonds_count == 0
+    assert summary.total_value == 0
+    assert summary.nearest_maturity_date is None
+
+
+@pytest.mark.django_db
+def test_summary_follows_bond_changes(portfolio1: Portfolio, portfolio2: Portfolio):
+    bond = create_bond(portfolio1, 'summary_bond', 'CZ0009013306', '50.50', '2024-01-01')
+    summary = get_summary(portfolio1)
+    assert summary.bonds_count == 3
+    assert summary.total_value == Decimal('250.50')
+    assert summary.interest_rate_sum == Decimal('35.25')
+    assert summary.nearest_maturity_date == date(2024, 1, 1)
+
+    bond.bond_value = Decimal('60.50')
+    bond.maturity_date = date(2030, 1, 1)
+    bond.save()
+    summary = get_summary(portfolio1)
+    assert summary.total_value == Decimal('260.50')
+    assert summary.nearest_maturity_date == date(2024, 8, 6)
+
+    bond.portfolio = portfolio2
+    bond.save()
+    assert get_summary(portfolio1).bonds_count == 2
+    assert get_summary(portfolio2).bonds_count == 3
+    assert get_summary(portfolio2).total_value == Decimal('260.50')
+
+    bond.delete()
+    assert verify_portfolio_summaries() == []
+    assert get_summary(portfolio2).total_value == Decimal('200.00')
+
+
+@pytest.mark.django_db
+def test_deleting_the_nearest_bond_recomputes_the_maturity_date(portfolio1: Portfolio):
+    portfolio1.bonds.all().delete()
+    summary = get_summary(portfolio1)
+    assert summary.bonds_count == 0
+    assert summary.nearest_maturity_date is None
+
+
+@pytest.mark.django_db
+def test_summary_of_deferred_bond_changes(portfolio1: Portfolio, portfolio2: Portfolio):
+    bond = Bond.objects.filter(portfolio=portfolio1).only('pk').first()
+    bond.portfolio = portfolio2
+    bond.save()
+    assert verify_portfolio_summaries() == []
+    Bond.objects.filter(portfolio=portfolio2).only('pk').first().delete()
+    assert verify_portfolio_summaries() == []
+
+
+@pytest.mark.django_db
+def test_portfolio_summaries_command(portfolio1: Portfolio, portfolio2: Portfolio):
+    PortfolioSummary.objects.filter(portfolio=portfolio1).update(bonds_count=7)
+    PortfolioSummary.objects.filter(portfolio=portfolio2).delete()
+    with pytest.raises(CommandError):
+        call_command('portfolio_summaries', 'verify', stdout=io.StringIO(), stderr=io.StringIO())
+    output = io.StringIO()
+    call_command('portfolio_summaries', 'rebuild', portfolio_ids=[portfolio1.pk, portfolio2.pk], stdout=output)
+    assert 'Rebuilt 2 portfolio summaries' in output.getvalue()
+    call_command('portfolio_summaries', 'verify', stdout=io.StringIO())
+    assert get_summary(portfolio2).bonds_count == 2
+
+
+@pytest.mark.django_db
+def test_portfolio_list_shows_summary(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_portfolios_url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['results'][0]['summary'] == {
+        'bonds_count': 2,
+        'total_value': '200.00',
+        'nearest_maturity_date': '2024-08-06',
+    }
+
+
+@pytest.mark.django_db
+def test_deleting_a_portfolio_doesnt_update_it_per_bond(
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    django_assert_max_num_queries,
+    create_bonds
+):
+    create_bonds(portfolio1, 200)
+    with django_assert_max_num_queries(6):
+        portfolio1.delete()
+    assert not Bond.objects.filter(portfolio_id=portfolio1.pk).exists()
+    assert not PortfolioSummary.objects.filter(portfolio_id=portfolio1.pk).exists()
+    assert verify_portfolio_summaries() == []
+
+
+@pytest.mark.django_db
+def test_failed_portfolio_deletion_keeps_updating_its_summary(portfolio1: Portfolio):
+    def fail(**kwargs):
+        raise RuntimeError('Deletion failed')
+
+    post_delete.connect(fail, sender=Bond)
+    try:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            portfolio1.delete()
+    finally:
+        post_delete.disconnect(fail, sender=Bond)
+    portfolio1.bonds.get(emission_name='bond1_1').delete()
+    assert PortfolioSummary.objects.get(portfolio=portfolio1).bonds_count == 1
+    assert verify_portfolio_summaries() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('drift', [
+    {'nearest_maturity_date': None},
+    {'nearest_maturity_date': date(2030, 1, 1)},
+])
+def test_analysis_rebuilds_an_inconsistent_summary(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    drift
+):
+    PortfolioSummary.objects.filter(portfolio=portfolio1).update(**drift)
+    authenticate_user(username='user1', password='password1')
+    analysis_url = reverse('bond_service_api:portfolio_investment_analysis')
+    response: Response = api_client.get(analysis_url, data={'portfolio_pk': portfolio1.pk})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['total_value'] == Decimal('200')
+    assert response.data['nearest_maturity_bond']['maturity_date'] == '2024-08-06'
+    assert verify_portfolio_summaries() == []
+
+
+@pytest.mark.django_db
+def test_analysis_rebuilds_a_missing_summary(portfolio1: Portfolio):
+    PortfolioSummary.objects.filter(portfolio=portfolio1).delete()
+    assert get_portfolios_analysis(Portfolio.objects.all())[portfolio1.pk]['total_value'] == Decimal('200')
+    assert verify_portfolio_summaries() == []
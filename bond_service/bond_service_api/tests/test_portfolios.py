@@ -1,10 +1,13 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from requests import Response
 from ..models import Portfolio
+from ..utils import get_portfolio_bonds
 
 
 @pytest.mark.django_db
@@ -181,3 +184,198 @@ def test_user_cant_delete_portfolio(
     authenticate_user(username='user1', password='password1')
     response: Response = api_client.delete(portfolio_url)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_portfolio_lists_its_bonds(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    portfolio_url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(portfolio_url, data={'expand': 'bonds'})
+    assert [bond['emission_name'] for bond in response.data['bonds']] == ['bond1_1', 'bond2_1']
+    response = api_client.get(portfolio_url, data={'expand': 'bonds', 'bonds_limit': 1})
+    assert [bond['emission_name'] for bond in response.data['bonds']] == ['bond1_1']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('limit', [None, 1])
+def test_portfolio_bonds_only_belong_to_the_given_portfolios(
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    limit
+):
+    bonds = get_portfolio_bonds([portfolio1.pk], limit=limit)
+    assert {bond.portfolio_id for bond in bonds} == {portfolio1.pk}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast_path', [True, False])
+@pytest.mark.parametrize('details', [True, False])
+def test_expanded_bonds_only_read_the_users_bonds(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio,
+    create_bonds,
+    fast_path: bool,
+    details: bool
+):
+    settings.API_READ_FAST_PATH = fast_path
+    create_bonds(portfolio2, 50)
+    if details:
+        url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    else:
+        url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    with CaptureQueriesContext(connection) as queries:
+        response: Response = api_client.get(url, data={'expand': 'bonds'})
+    assert response.status_code == status.HTTP_200_OK
+    portfolios = [response.data] if details else response.data['results']
+    assert [bond['emission_name'] for portfolio in portfolios for bond in portfolio['bonds']] == ['bond1_1', 'bond2_1']
+    bond_queries = [query['sql'] for query in queries if 'FROM "bond_service_api_bond"' in query['sql']]
+    assert bond_queries
+    assert all('"bond_service_api_bond"."portfolio_id" IN' in sql for sql in bond_queries)
+
+
+@pytest.mark.django_db
+def test_invalid_bonds_limit(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_portfolios_url, data={'bonds_limit': -1})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('portfolios_count', [10, 100, 1000])
+@pytest.mark.parametrize('bonds_limit', [None, 2])
+def test_portfolio_page_query_count_does_not_depend_on_page_size(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolios_count: int,
+    bonds_limit,
+    django_assert_num_queries,
+    create_bonds
+):
+    portfolios = Portfolio.objects.bulk_create([
+        Portfolio(name=f'page_portfolio_{index}', created_by=user1) for index in range(portfolios_count)
+    ])
+    create_bonds(portfolios, 3)
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    data = {'limit': portfolios_count, 'expand': 'bonds'}
+    if bonds_limit is not None:
+        data['bonds_limit'] = bonds_limit
+    with django_assert_num_queries(4):
+        response: Response = api_client.get(list_portfolios_url, data=data)
+    assert len(response.data['results']) == portfolios_count
+    assert all(len(portfolio['bonds']) == (bonds_limit or 3) for portfolio in response.data['results'])
+
+
+@pytest.mark.django_db
+def test_user_pages_portfolios_with_cursor_pagination(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    Portfolio.objects.bulk_create([
+        Portfolio(name=f'cursor_portfolio_{index}', created_by=user1) for index in range(4)
+    ])
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    with django_assert_num_queries(3):
+        response: Response = api_client.get(
+            list_portfolios_url, data={'pagination': 'cursor', 'limit': 2, 'expand': 'bonds'})
+    assert 'count' not in response.data
+    assert [portfolio['name'] for portfolio in response.data['results']] == ['portfolio1', 'cursor_portfolio_0']
+    response = api_client.get(response.data['next'])
+    assert [portfolio['name'] for portfolio in response.data['results']] == ['cursor_portfolio_1', 'cursor_portfolio_2']
+
+
+@pytest.mark.django_db
+def test_portfolio_bonds_are_only_nested_when_expanded(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    with django_assert_num_queries(3):
+        response: Response = api_client.get(list_portfolios_url)
+    assert list(response.data['results'][0]) == ['name', 'summary', 'created_at', 'updated_at']
+    with django_assert_num_queries(4):
+        response = api_client.get(list_portfolios_url, data={'expand': 'bonds'})
+    assert list(response.data['results'][0]) == ['name', 'bonds', 'summary', 'created_at', 'updated_at']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast_path', [True, False])
+@pytest.mark.parametrize('data, fields', [
+    ({'fields': 'name'}, ['name']),
+    ({'fields': 'name,bonds'}, ['name', 'bonds']),
+    ({'exclude': 'summary,updated_at'}, ['name', 'created_at']),
+    ({'exclude': 'summary', 'expand': 'bonds'}, ['name', 'bonds', 'created_at', 'updated_at']),
+])
+def test_portfolio_sparse_fieldsets(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    fast_path: bool,
+    data: dict,
+    fields: list
+):
+    settings.API_READ_FAST_PATH = fast_path
+    portfolio_url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(portfolio_url, data=data)
+    assert response.status_code == status.HTTP_200_OK
+    assert list(response.data) == fields
+    if 'bonds' in fields:
+        assert len(response.data['bonds']) == 2
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_doesnt_narrow_portfolio_writes(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    portfolio_url = reverse('bond_service_api:portfolio_details', args=[portfolio1.pk])
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.patch(f'{portfolio_url}?fields=summary', data={'name': 'patched_portfolio'})
+    assert response.status_code == status.HTTP_200_OK
+    assert list(response.data) == ['name', 'summary', 'created_at', 'updated_at']
+    portfolio1.refresh_from_db()
+    assert portfolio1.name == 'patched_portfolio'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('data', [{'fields': 'name,owner'}, {'exclude': 'id'}, {'expand': 'summary'}])
+def test_portfolio_rejects_unknown_fields(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    data: dict
+):
+    list_portfolios_url = reverse('bond_service_api:portfolio')
+    authenticate_user(username='user1', password='password1')
+    response: Response = api_client.get(list_portfolios_url, data=data)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
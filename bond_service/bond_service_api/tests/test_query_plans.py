@@ -0,0 +1,154 @@
+import json
+import os
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from ..models import Portfolio, PortfolioSummary, Bond
+
+# The size of the dataset of the benchmark, big enough for the planner to choose the index scans
+SEED_BONDS = int(os.getenv('QUERY_PLAN_SEED_BONDS', 1000000))
+# The size of the dataset checked by default, with sequential scans disabled in the planner
+SMALL_SEED_BONDS = 10000
+
+# Tables that must never be read with a sequential scan by the user facing endpoints
+HOT_TABLES = {Bond._meta.db_table, Portfolio._meta.db_table, PortfolioSummary._meta.db_table}
+# The condition of the nested bonds query, without it the whole table is read through the primary key
+NESTED_BONDS_FILTER = f'"{Bond._meta.db_table}"."portfolio_id" IN'
+
+
+def seed_dataset(seed_bonds):
+    seed_portfolios = seed_bonds // 10
+    seed_users = max(seed_portfolios // 100, 1)
+    bond_table = Bond._meta.db_table
+    portfolio_table = Portfolio._meta.db_table
+    summary_table = PortfolioSummary._meta.db_table
+    user_table = User._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            INSERT INTO {user_table}
+                (password, is_superuser, username, first_name, last_name, email, is_staff, is_active, date_joined)
+            SELECT '!', false, 'seed_user_' || i, '', '', '', false, true, now()
+            FROM generate_series(1, %s) AS i
+        ''', [seed_users])
+        cursor.execute(f'''
+            INSERT INTO {portfolio_table} (name, created_by_id, created_at, updated_at)
+            SELECT 'seed_portfolio_' || i, users.id, now(), now()
+            FROM generate_series(1, %s) AS i
+            JOIN (
+                SELECT id, row_number() OVER (ORDER BY id) - 1 AS position
+                FROM {user_table} WHERE username LIKE 'seed_user_%%'
+            ) AS users ON users.position = i %% %s
+        ''', [seed_portfolios, seed_users])
+        cursor.execute(f'''
+            INSERT INTO {bond_table} (
+                emission_name, emission_isin, bond_value, interest_rate, purchase_date, maturity_date,
+                yields_frequency, portfolio_id, created_at, updated_at
+            )
+            SELECT
+                'seed_bond_' || i, 'SEED' || lpad(i::text, 8, '0'), 100 + i %% 1000, (i %% 2000) / 100.0,
+                date '2024-01-01' + i %% 365, date '2025-01-01' + i %% 3650, (ARRAY[1, 4, 12])[1 + i %% 3],
+                portfolios.id, now(), now()
+            FROM generate_series(1, %s) AS i
+            JOIN (
+                SELECT id, row_number() OVER (ORDER BY id) - 1 AS position
+                FROM {portfolio_table} WHERE name LIKE 'seed_portfolio_%%'
+            ) AS portfolios ON portfolios.position = i %% %s
+        ''', [seed_bonds, seed_portfolios])
+        cursor.execute(f'''
+            INSERT INTO {summary_table}
+                (portfolio_id, bonds_count, total_value, interest_rate_sum, nearest_maturity_date)
+            SELECT portfolio_id, count(*), sum(bond_value), sum(interest_rate), min(maturity_date)
+            FROM {bond_table} WHERE emission_name LIKE 'seed_bond_%%' GROUP BY portfolio_id
+        ''')
+        cursor.execute(f'ANALYZE {user_table}, {portfolio_table}, {bond_table}, {summary_table}')
+
+
+def find_sequential_scans(plan):
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in HOT_TABLES:
+        yield plan['Relation Name']
+    for child in plan.get('Plans', []):
+        yield from find_sequential_scans(child)
+
+
+def explain(sql, seqscan=True):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SET enable_seqscan = {"on" if seqscan else "off"}')
+        try:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute('RESET enable_seqscan')
+    return plan if isinstance(plan, list) else json.loads(plan)
+
+
+def find_endpoint_scans(api_client, portfolio, seqscan=True):
+    '''
+    Requests the user facing endpoints and returns the sequential scans of hot tables in the plans
+    of their queries, as (endpoint, table, sql) tuples. The nested bonds queries (expand=bonds) that
+    are not filtered by portfolio are returned too, their index scan of the whole table is no
+    sequential scan.
+    '''
+    requests = [
+        ('bond', None, {}),
+        ('bond', None, {'pagination': 'cursor'}),
+        ('bond', None, {'pagination': 'cursor', 'ordering': 'maturity_date'}),
+        ('bond', None, {'interest_rate_min': '5', 'interest_rate_max': '6', 'yields_frequency': 12}),
+        ('bond', None, {'maturity_date_from': '2024-08-01', 'maturity_date_to': '2024-08-31'}),
+        ('bond_maturing', None, {'start_date': '2024-08-01', 'end_date': '2024-08-31'}),
+        ('portfolio', None, {}),
+        ('portfolio', None, {'expand': 'bonds'}),
+        ('portfolio', None, {'pagination': 'cursor', 'bonds_limit': 5, 'expand': 'bonds'}),
+        ('portfolio_details', [portfolio.pk], {'expand': 'bonds'}),
+        ('portfolio_investment_analysis', None, {'portfolio_pk': portfolio.pk, 'include': 'risk'}),
+        ('portfolio_investment_analysis_batch', None, {}),
+        ('portfolio_cash_flows', None, {'portfolio_pk': portfolio.pk, 'start_date': '2024-01-01'}),
+    ]
+    scans = []
+    for name, args, data in requests:
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(reverse(f'bond_service_api:{name}', args=args), data=data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        assert response.status_code == status.HTTP_200_OK
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            for plan in explain(sql, seqscan):
+                scans.extend((name, table, sql) for table in find_sequential_scans(plan['Plan']))
+            bond_table = Bond._meta.db_table
+            if data.get('expand') == 'bonds' and f'FROM "{bond_table}"' in sql and NESTED_BONDS_FILTER not in sql:
+                scans.append((name, bond_table, sql))
+    return scans
+
+
+@pytest.mark.django_db
+def test_endpoints_can_read_hot_tables_by_index(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    '''
+    With sequential scans disabled, the planner still plans one for a query that no index can serve.
+    '''
+    seed_dataset(SMALL_SEED_BONDS)
+    authenticate_user(username='user1', password='password1')
+    assert find_endpoint_scans(api_client, portfolio1, seqscan=False) == []
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_endpoints_dont_scan_hot_tables_sequentially(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    seed_dataset(SEED_BONDS)
+    authenticate_user(username='user1', password='password1')
+    assert find_endpoint_scans(api_client, portfolio1) == []
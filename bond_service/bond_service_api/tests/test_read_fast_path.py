@@ -0,0 +1,133 @@
+import pytest
+from django.contrib.auth.models import Group, Permission, User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from ..models import Portfolio, PortfolioSummary, Bond
+from ..readers import BondRowReader, PortfolioRowReader
+from ..serializers import BondSerializer, PortfolioSerializer
+
+
+def get_both_ways(api_client, settings, url, data=None):
+    settings.API_READ_FAST_PATH = False
+    expected = api_client.get(url, data=data)
+    settings.API_READ_FAST_PATH = True
+    response = api_client.get(url, data=data)
+    assert response.status_code == expected.status_code == status.HTTP_200_OK
+    return response.content, expected.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, data', [
+    ('bond', {}),
+    ('bond', {'pagination': 'cursor', 'ordering': 'maturity_date', 'limit': 7}),
+    ('bond', {'yields_frequency': 4}),
+    ('bond_maturing', {'start_date': '2027-01-01', 'end_date': '2029-01-01'}),
+    ('portfolio', {}),
+    ('portfolio', {'pagination': 'cursor', 'bonds_limit': 2, 'expand': 'bonds'}),
+    ('portfolio', {'fields': 'name,summary', 'expand': 'bonds'}),
+    ('bond', {'fields': 'emission_isin,bond_value,maturity_date'}),
+])
+def test_fast_path_lists_are_byte_identical(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    name: str,
+    data: dict,
+    create_portfolios
+):
+    create_portfolios(user1, 3, 5, bond_value='1000.25', interest_rate='3.10')
+    Portfolio.objects.create(name='portfolio_without_bonds', created_by=user1)
+    PortfolioSummary.objects.filter(portfolio=portfolio1).delete()
+    authenticate_user(username='user1', password='password1')
+    fast, expected = get_both_ways(api_client, settings, reverse(f'bond_service_api:{name}'), data)
+    assert fast == expected
+
+
+@pytest.mark.django_db
+def test_fast_path_details_are_byte_identical(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    for url, data in [
+        (reverse('bond_service_api:portfolio_details', args=[portfolio1.pk]), {'expand': 'bonds'}),
+        (reverse('bond_service_api:bond_details', args=[portfolio1.bonds.first().pk]), {'exclude': 'id'}),
+    ]:
+        fast, expected = get_both_ways(api_client, settings, url, data)
+        assert fast == expected
+
+
+@pytest.mark.django_db
+def test_fast_path_users_are_byte_identical(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    admin_user: User,
+    user1: User,
+    user2: User
+):
+    group = Group.objects.create(name='traders')
+    user1.groups.add(group)
+    user1.user_permissions.add(*Permission.objects.order_by('pk')[:3])
+    authenticate_user(username='admin', password='adminpassword')
+    for url in [
+        reverse('bond_service_api:users'),
+        reverse('bond_service_api:user_details', args=[user1.pk]),
+        reverse('bond_service_api:user_details', args=[user2.pk]),
+    ]:
+        fast, expected = get_both_ways(api_client, settings, url)
+        assert fast == expected
+
+
+@pytest.mark.django_db
+def test_fast_path_detail_of_other_users_bond_is_not_found(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio2: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(reverse('bond_service_api:bond_details', args=[portfolio2.bonds.first().pk]))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize('rows', [10, 100, 1000])
+def test_fast_path_benchmark(user1: User, rows: int, create_portfolios, best_time):
+    '''
+    Compares the encoding of a page of bonds and of portfolios (with 5 bonds each) to the
+    JSON body by the serializers and by the row readers, from already loaded rows.
+    '''
+    create_portfolios(user1, rows, 5)
+    renderer = JSONRenderer()
+
+    bonds = list(Bond.objects.order_by('pk')[:rows])
+    bond_reader = BondRowReader()
+    bond_rows = list(bond_reader.values(Bond.objects.order_by('pk'))[:rows])
+    assert renderer.render(BondSerializer(bonds, many=True).data) == renderer.render(bond_reader.read(bond_rows))
+
+    portfolios = list(Portfolio.objects.select_related('summary').prefetch_related('bonds').order_by('pk')[:rows])
+    portfolio_reader = PortfolioRowReader()
+    portfolio_rows = list(portfolio_reader.values(Portfolio.objects.order_by('pk'))[:rows])
+
+    timings = {
+        'bonds': (
+            best_time(lambda: renderer.render(BondSerializer(bonds, many=True).data)),
+            best_time(lambda: renderer.render(bond_reader.read(bond_rows))),
+        ),
+        'portfolios': (
+            best_time(lambda: renderer.render(PortfolioSerializer(portfolios, many=True).data)),
+            # The reader also loads the bonds of the page, the serializer gets them prefetched
+            best_time(lambda: renderer.render(portfolio_reader.read(portfolio_rows))),
+        ),
+    }
+    assert timings['bonds'][1] < timings['bonds'][0]
+    assert timings['portfolios'][1] < timings['portfolios'][0]
@@ -0,0 +1,112 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from ..models import Portfolio
+
+
+def get_urls(portfolio: Portfolio) -> list:
+    return [
+        reverse('bond_service_api:bond'),
+        reverse('bond_service_api:bond_details', args=[portfolio.bonds.first().pk]),
+        reverse('bond_service_api:bond_maturing') + '?start_date=2024-01-01&end_date=2024-12-31',
+        reverse('bond_service_api:portfolio') + '?expand=bonds',
+        reverse('bond_service_api:portfolio_details', args=[portfolio.pk]),
+        reverse('bond_service_api:portfolio_investment_analysis') + f'?portfolio_pk={portfolio.pk}',
+        reverse('bond_service_api:portfolio_investment_analysis_batch'),
+    ]
+
+
+@pytest.mark.django_db
+def test_repeated_reads_are_served_from_the_response_cache(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_max_num_queries
+):
+    authenticate_user(username='user1', password='password1')
+    for url in get_urls(portfolio1):
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        # The user of the access token and the updated_at of the bond detail
+        with django_assert_max_num_queries(2):
+            cached = api_client.get(url)
+        assert cached.status_code == status.HTTP_200_OK
+        assert cached.content == response.content
+        assert cached['Content-Type'] == response['Content-Type']
+        assert cached['ETag'] == response['ETag']
+
+
+@pytest.mark.django_db
+def test_writes_change_the_cached_responses(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    portfolio1: Portfolio
+):
+    authenticate_user(username='user1', password='password1')
+    urls = get_urls(portfolio1)
+    responses = [api_client.get(url) for url in urls]
+    bond = portfolio1.bonds.first()
+    bond.bond_value = '300'
+    bond.save()
+    for url, response in zip(urls, responses):
+        assert api_client.get(url).content != response.content
+
+
+@pytest.mark.django_db
+def test_cached_responses_are_scoped_per_user(
+    api_client: APIClient,
+    authenticate_user,
+    user1: User,
+    admin_user: User,
+    portfolio1: Portfolio,
+    portfolio2: Portfolio
+):
+    bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    assert api_client.get(bonds_url).data['count'] == 2
+    authenticate_user(username='admin', password='adminpassword')
+    assert api_client.get(bonds_url).json()['count'] == 4
+
+
+@pytest.mark.django_db
+def test_response_cache_can_be_disabled(
+    api_client: APIClient,
+    authenticate_user,
+    settings,
+    user1: User,
+    portfolio1: Portfolio,
+    django_assert_num_queries
+):
+    settings.API_RESPONSE_CACHE_TIMEOUT = 0
+    bonds_url = reverse('bond_service_api:bond')
+    authenticate_user(username='user1', password='password1')
+    api_client.get(bonds_url)
+    with django_assert_num_queries(3):
+        response = api_client.get(bonds_url)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_unavailable_response_cache_is_a_miss(
+    api_client: APIClient,
+    authenticate_user,
+    monkeypatch,
+    settings,
+    user1: User,
+    portfolio1: Portfolio
+):
+    def fail(*args, **kwargs):
+        raise ConnectionError('Redis is down')
+
+    cache = caches[settings.API_RESPONSE_CACHE_ALIAS]
+    monkeypatch.setattr(cache, 'get', fail)
+    monkeypatch.setattr(cache, 'set', fail)
+    authenticate_user(username='user1', password='password1')
+    response = api_client.get(reverse('bond_service_api:portfolio_details', args=[portfolio1.pk]))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['name'] == 'portfolio1'
@@ -1,9 +1,13 @@
 import pytest
+from django.contrib.auth.forms import AuthenticationForm
+from django.core.cache import caches
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from requests import Response
+from ..backends import hashing_slots, verified_passwords
+from ..throttling import local_throttle_cache
 
 
 @pytest.mark.django_db
@@ -44,3 +48,117 @@ def test_token_verify(api_client: APIClient, obtain_access_token, user1):
         'token': access_token
     })
     assert response.status_code == status.HTTP_200_OK
+
+
+def login(api_client: APIClient, username: str, password: str, **extra):
+    login_url = reverse('bond_service_api:token_obtain_pair')
+    return api_client.post(login_url, {'username': username, 'password': password}, **extra)
+
+
+@pytest.fixture
+def count_hashing(monkeypatch):
+    '''
+    Counts the password verifications that compute the password hash.
+    '''
+    verified_passwords.clear()
+    calls = []
+    check_password = User.check_password
+
+    def counting_check_password(user, raw_password):
+        calls.append(user.username)
+        return check_password(user, raw_password)
+
+    monkeypatch.setattr(User, 'check_password', counting_check_password)
+    yield calls
+    verified_passwords.clear()
+
+
+@pytest.mark.django_db
+def test_logins_are_throttled_per_username(api_client: APIClient, settings, user1: User, user2: User):
+    settings.LOGIN_USERNAME_THROTTLE_RATE = '2/min'
+    assert login(api_client, 'user1', 'bad_password').status_code == status.HTTP_401_UNAUTHORIZED
+    assert login(api_client, 'user1', 'password1', REMOTE_ADDR='10.0.0.2').status_code == status.HTTP_200_OK
+    response: Response = login(api_client, 'user1', 'password1', REMOTE_ADDR='10.0.0.3')
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert 'Retry-After' in response
+    assert login(api_client, 'user2', 'password2').status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_logins_are_throttled_per_address(api_client: APIClient, settings, user1: User):
+    settings.LOGIN_IP_THROTTLE_RATE = '3/min'
+    for index in range(3):
+        assert login(api_client, f'unknown{index}', 'password').status_code == status.HTTP_401_UNAUTHORIZED
+    assert login(api_client, 'user1', 'password1').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert login(api_client, 'user1', 'password1', REMOTE_ADDR='10.0.0.2').status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_login_throttles_fall_back_to_the_process(api_client: APIClient, monkeypatch, settings, user1: User):
+    def fail(*args, **kwargs):
+        raise ConnectionError('Redis is down')
+
+    settings.LOGIN_USERNAME_THROTTLE_RATE = '1/min'
+    monkeypatch.setattr(caches[settings.LOGIN_THROTTLE_CACHE_ALIAS], 'get', fail)
+    local_throttle_cache.clear()
+    try:
+        assert login(api_client, 'user1', 'password1').status_code == status.HTTP_200_OK
+        assert login(api_client, 'user1', 'password1').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    finally:
+        local_throttle_cache.clear()
+
+
+@pytest.mark.django_db
+def test_successful_verifications_are_cached(api_client: APIClient, count_hashing: list, user1: User):
+    assert login(api_client, 'user1', 'password1').status_code == status.HTTP_200_OK
+    assert login(api_client, 'user1', 'password1').status_code == status.HTTP_200_OK
+    assert count_hashing == ['user1']
+    assert login(api_client, 'user1', 'bad_password').status_code == status.HTTP_401_UNAUTHORIZED
+    assert count_hashing == ['user1', 'user1']
+    user1.set_password('new_password1')
+    user1.save()
+    assert login(api_client, 'user1', 'password1').status_code == status.HTTP_401_UNAUTHORIZED
+    assert login(api_client, 'user1', 'new_password1').status_code == status.HTTP_200_OK
+    user1.is_active = False
+    user1.save()
+    assert login(api_client, 'user1', 'new_password1').status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_login_fails_fast_when_all_hashing_slots_are_busy(
+    api_client: APIClient,
+    count_hashing: list,
+    settings,
+    user1: User
+):
+    settings.LOGIN_HASHING_TIMEOUT = 0
+    acquired = 0
+    while hashing_slots.acquire(blocking=False):
+        acquired += 1
+    try:
+        response: Response = login(api_client, 'user1', 'password1')
+    finally:
+        for _ in range(acquired):
+            hashing_slots.release()
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert count_hashing == []
+    assert login(api_client, 'user1', 'password1').status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_form_login_fails_like_a_wrong_password_when_hashing_slots_are_busy(settings, admin_user: User):
+    '''
+    The admin login form authenticates with the same backend, it must not get an API exception.
+    '''
+    settings.LOGIN_HASHING_TIMEOUT = 0
+    data = {'username': 'admin', 'password': 'adminpassword'}
+    acquired = 0
+    while hashing_slots.acquire(blocking=False):
+        acquired += 1
+    try:
+        form = AuthenticationForm(data=data)
+        assert not form.is_valid()
+    finally:
+        for _ in range(acquired):
+            hashing_slots.release()
+    assert AuthenticationForm(data=data).is_valid()
@@ -0,0 +1,61 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.throttling import SimpleRateThrottle
+
+log = logging.getLogger(__name__)
+
+# Request histories of the login throttles while the shared cache is unavailable
+local_throttle_cache = LocMemCache('login_throttle', {})
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    '''
+    LoginRateThrottle: A throttle of the token endpoint, with the request histories in the
+    LOGIN_THROTTLE_CACHE_ALIAS cache (Redis when configured) so the limit is shared by all
+    processes. If that cache fails, the histories are kept in process instead of failing or
+    letting every login through.
+
+    Attributes:
+        rate_setting (str): The name of the setting with the rate, e.g. '10/min'.
+    '''
+    rate_setting = None
+
+    def get_rate(self):
+        return getattr(settings, self.rate_setting)
+
+    def allow_request(self, request, view):
+        self.cache = caches[settings.LOGIN_THROTTLE_CACHE_ALIAS]
+        try:
+            return super().allow_request(request, view)
+        except Exception:
+            log.warning('Login throttle cache is unavailable, throttling in process', exc_info=True)
+            self.cache = local_throttle_cache
+            return super().allow_request(request, view)
+
+
+class LoginIPThrottle(LoginRateThrottle):
+    scope = 'login_ip'
+    rate_setting = 'LOGIN_IP_THROTTLE_RATE'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(LoginRateThrottle):
+    '''
+    Limits the logins of a username from any address, against credential stuffing spread over
+    many addresses. The username is hashed into the cache key, it can contain any character.
+    '''
+    scope = 'login_username'
+    rate_setting = 'LOGIN_USERNAME_THROTTLE_RATE'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        ident = hashlib.sha256(username.lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -10,7 +10,12 @@ from .views import (
     PortfolioListCreateView,
     PortfolioRetrieveUpdateDestroyView,
     PortfolioInvestmentAnalysisView,
+    PortfolioBatchInvestmentAnalysisView,
+    PortfolioCashFlowsView,
     BondListCreateView,
+    BondMaturingListView,
+    BondBulkImportView,
+    BondExportView,
     BondRetrieveUpdateDestroyView
 )
 
@@ -27,6 +32,12 @@ urlpatterns = [
     path('portfolio/<int:pk>/', PortfolioRetrieveUpdateDestroyView.as_view(), name='portfolio_details'),
     path('portfolio_investment_analysis/', PortfolioInvestmentAnalysisView.as_view(),
          name='portfolio_investment_analysis'),
+    path('portfolio_investment_analysis/batch/', PortfolioBatchInvestmentAnalysisView.as_view(),
+         name='portfolio_investment_analysis_batch'),
+    path('portfolio_cash_flows/', PortfolioCashFlowsView.as_view(), name='portfolio_cash_flows'),
     path('bonds/', BondListCreateView.as_view(), name='bond'),
+    path('bonds/maturing/', BondMaturingListView.as_view(), name='bond_maturing'),
+    path('bonds/import/', BondBulkImportView.as_view(), name='bond_import'),
+    path('bonds/export/', BondExportView.as_view(), name='bond_export'),
     path('bonds/<int:pk>/', BondRetrieveUpdateDestroyView.as_view(), name='bond_details'),
 ]
@@ -1,9 +1,218 @@
+import logging
 from .models import Portfolio, Bond
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
 from django.db.models.query import QuerySet
-from typing import Dict
+from typing import Dict, Iterable, List, Optional
 from django.utils import timezone
 from .serializers import BondSerializer
+from .analytics import FLOAT_MODE, PortfolioAnalyticsEngine
+from .analysis_cache import portfolio_analysis_cache
+from .summaries import rebuild_portfolio_summaries
 from decimal import Decimal
+from datetime import date
+
+log = logging.getLogger(__name__)
+
+# The BondFilterSerializer parameters and the bond lookups they filter on
+BOND_FILTER_LOOKUPS = {
+    'portfolio': 'portfolio_id',
+    'yields_frequency': 'yields_frequency',
+    'interest_rate_min': 'interest_rate__gte',
+    'interest_rate_max': 'interest_rate__lte',
+    'maturity_date_from': 'maturity_date__gte',
+    'maturity_date_to': 'maturity_date__lte',
+}
+
+
+def filter_bonds(bonds: QuerySet[Bond], filters: Dict) -> QuerySet[Bond]:
+    '''
+    Filters the bonds by the validated `BondFilterSerializer` parameters, the missing ones
+    are not applied.
+    '''
+    return bonds.filter(**{
+        BOND_FILTER_LOOKUPS[name]: value
+        for name, value in filters.items()
+        if value is not None
+    })
+
+
+def get_bonds_maturing_between(bonds: QuerySet[Bond], start_date: date, end_date: date) -> QuerySet[Bond]:
+    '''
+    Returns the bonds maturing between the two dates (inclusive), ordered by maturity date.
+    The range is read with an index range scan: bond_maturity_date_id_idx for all bonds,
+    bond_portfolio_maturity_idx for the bonds of given portfolios.
+
+    Args:
+        bonds (QuerySet[Bond]): The bonds to filter, e.g. the bonds visible to a user.
+        start_date (date): The earliest maturity date.
+        end_date (date): The latest maturity date.
+
+    Returns:
+        QuerySet[Bond]: The maturing bonds ordered by maturity date and id.
+    '''
+    return bonds.filter(maturity_date__range=(start_date, end_date)).order_by('maturity_date', 'pk')
+
+
+def get_portfolio_bonds(portfolio_pks: Iterable[int], limit: Optional[int] = None) -> QuerySet[Bond]:
+    '''
+    Returns the bonds of the portfolios ordered by id, at most `limit` bonds per portfolio
+    (the ones with the lowest ids) if a limit is given. The limit is applied by the database
+    with a ROW_NUMBER() window, so the bonds over the limit are never loaded.
+
+    Args:
+        portfolio_pks (Iterable[int]): The portfolio ids.
+        limit (int): The maximum number of bonds per portfolio, unlimited by default.
+
+    Returns:
+        QuerySet[Bond]: The bonds, suitable as a `Prefetch` queryset of `Portfolio.bonds`.
+    '''
+    portfolio_pks = list(portfolio_pks)
+    bonds = Bond.objects.filter(portfolio_id__in=portfolio_pks).order_by('pk')
+    if limit is None:
+        return bonds
+    table = Bond._meta.db_table
+    ranked_bonds = RawSQL(
+        f'''
+        SELECT ranked.id FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY portfolio_id ORDER BY id) AS position
+            FROM {table} WHERE portfolio_id = ANY(%s)
+        ) AS ranked WHERE ranked.position <= %s
+        ''',
+        (portfolio_pks, limit),
+    )
+    return bonds.filter(pk__in=ranked_bonds)
+
+
+def annotate_portfolio_analysis(queryset: QuerySet[Portfolio]) -> QuerySet[Portfolio]:
+    '''
+    Annotates portfolios with the aggregates used by the portfolio analysis, read from their
+    `PortfolioSummary`, so any number of portfolios is analyzed with a single query that doesn't
+    scan their bonds.
+
+    Args:
+        queryset (QuerySet[Portfolio]): The portfolios to annotate.
+
+    Returns:
+        QuerySet[Portfolio]: The portfolios annotated with:
+            - 'bonds_count' (int): The number of bonds in the portfolio.
+            - 'total_value' (Decimal): The sum of the bond values.
+            - 'interest_rate_sum' (Decimal): The sum of the interest rates.
+            - 'nearest_maturity_bond_id' (int): The id of the bond with the earliest maturity date
+              (the lowest id wins a tie), None for an empty portfolio.
+    '''
+    nearest_maturity_bonds = Bond.objects.filter(
+        portfolio=OuterRef('pk'),
+        maturity_date=OuterRef('summary__nearest_maturity_date'),
+    ).order_by('pk')
+    return queryset.annotate(
+        bonds_count=F('summary__bonds_count'),
+        total_value=F('summary__total_value'),
+        interest_rate_sum=F('summary__interest_rate_sum'),
+        nearest_maturity_bond_id=Subquery(nearest_maturity_bonds.values('pk')[:1]),
+    )
+
+
+def load_portfolio_aggregates(portfolios: QuerySet[Portfolio]) -> Dict[int, Dict]:
+    '''
+    Loads the aggregates the portfolio analysis is computed from, with one query for the summaries
+    of all portfolios and one more query for their nearest maturity bonds.
+
+    Args:
+        portfolios (QuerySet[Portfolio]): The portfolios.
+
+    Returns:
+        Dict[int, Dict]: The aggregates of every portfolio keyed by the portfolio id, with the keys:
+            - 'created_by_id' (int): The id of the portfolio owner.
+            - 'bonds_count' (int): The number of bonds in the portfolio.
+            - 'total_value' (Decimal): The sum of the bond values, None for an empty portfolio.
+            - 'interest_rate_sum' (Decimal): The sum of the interest rates, None for an empty portfolio.
+            - 'nearest_maturity_date' (date): The nearest maturity date, None for an empty portfolio.
+            - 'nearest_maturity_bond' (dict): Serialized data of the bond with the nearest maturity date,
+              None for an empty portfolio.
+    '''
+    portfolios = list(annotate_portfolio_analysis(portfolios))
+    nearest_maturity_bonds = Bond.objects.in_bulk(
+        [portfolio.nearest_maturity_bond_id for portfolio in portfolios if portfolio.bonds_count]
+    )
+    # A missing summary, or one with bonds but no nearest maturity bond, has drifted from the
+    # bonds (e.g. after a partial backfill): it is rebuilt and the portfolio is loaded again
+    drifted = [
+        portfolio.pk for portfolio in portfolios
+        if portfolio.bonds_count is None
+        or (portfolio.bonds_count and portfolio.nearest_maturity_bond_id not in nearest_maturity_bonds)
+    ]
+    if drifted:
+        log.warning('Rebuilding the inconsistent summaries of portfolios %s', drifted)
+        rebuild_portfolio_summaries(drifted)
+        rebuilt = {
+            portfolio.pk: portfolio
+            for portfolio in annotate_portfolio_analysis(Portfolio.objects.filter(pk__in=drifted))
+        }
+        portfolios = [rebuilt.get(portfolio.pk, portfolio) for portfolio in portfolios]
+        nearest_maturity_bonds.update(Bond.objects.in_bulk(
+            [portfolio.nearest_maturity_bond_id for portfolio in rebuilt.values() if portfolio.bonds_count]
+        ))
+    aggregates = {}
+    for portfolio in portfolios:
+        aggregates[portfolio.pk] = {
+            'created_by_id': portfolio.created_by_id,
+            'bonds_count': portfolio.bonds_count,
+            'total_value': portfolio.total_value,
+            'interest_rate_sum': portfolio.interest_rate_sum,
+            'nearest_maturity_date': None,
+            'nearest_maturity_bond': None,
+        }
+        nearest_maturity_bond = nearest_maturity_bonds.get(portfolio.nearest_maturity_bond_id)
+        if nearest_maturity_bond:
+            aggregates[portfolio.pk]['nearest_maturity_date'] = nearest_maturity_bond.maturity_date
+            aggregates[portfolio.pk]['nearest_maturity_bond'] = dict(BondSerializer(nearest_maturity_bond).data)
+    return aggregates
+
+
+def get_portfolio_aggregates(portfolio_pks: List[int]) -> Dict[int, Dict]:
+    '''
+    Returns the aggregates of the portfolios (as described in `load_portfolio_aggregates`) from
+    `portfolio_analysis_cache`, the missing ones are loaded and cached. Portfolios that don't
+    exist are left out.
+    '''
+    aggregates, versions = portfolio_analysis_cache.get_many(portfolio_pks)
+    missing = [pk for pk in portfolio_pks if pk not in aggregates]
+    if missing:
+        loaded = load_portfolio_aggregates(Portfolio.objects.filter(pk__in=missing))
+        portfolio_analysis_cache.set_many(loaded, versions)
+        aggregates.update(loaded)
+    return aggregates
+
+
+def analysis_from_aggregates(aggregates: Dict, today: Optional[date] = None) -> Dict:
+    '''
+    Computes the portfolio analysis from the portfolio aggregates.
+
+    The average interest rate is derived from the sum and the count of the interest rates,
+    so it has the full Decimal context precision rather than the precision of the database average.
+
+    Args:
+        aggregates (Dict): The portfolio aggregates, as described in `load_portfolio_aggregates`.
+        today (date): The date of the analysis, the current date by default.
+
+    Returns:
+        Dict: The analysis, as described in `get_portfolio_analysis`.
+    '''
+    if not aggregates['bonds_count'] or aggregates['nearest_maturity_date'] is None:
+        return {'message': 'Portfolio contains no bonds.'}
+    today = today or timezone.now().date()
+    total_value = Decimal(aggregates['total_value'])
+    avg_interest_rate = Decimal(aggregates['interest_rate_sum'] / aggregates['bonds_count'])
+    years = Decimal((aggregates['nearest_maturity_date'] - today).days / Decimal(365.25))
+
+    future_value = total_value * (1 + avg_interest_rate / 100) ** years
+    return {
+        'average_interest_rate': avg_interest_rate,
+        'nearest_maturity_bond': aggregates['nearest_maturity_bond'],
+        'total_value': total_value,
+        'future_value': future_value,
+    }
 
 
 def get_portfolio_analysis(portfolio: Portfolio) -> Dict:
@@ -11,6 +220,10 @@ def get_portfolio_analysis(portfolio: Portfolio) -> Dict:
     Analyzes the bonds within a portfolio and returns a dictionary containing
     various metrics and details about the portfolio's bond holdings.
 
+    The aggregates are read from `portfolio_analysis_cache` or, on a miss, loaded with two
+    queries whatever the size of the portfolio. Only the future value, which depends on the
+    current date, is recomputed on every call.
+
     Args:
         portfolio (Portfolio): The portfolio object containing bonds to be analyzed.
 
@@ -31,20 +244,51 @@ def get_portfolio_analysis(portfolio: Portfolio) -> Dict:
         The 'nearest_maturity_bond' is determined based on the maturity date closest to the current date.
         The future value is calculated assuming compound interest over the time until the nearest maturity date.
     '''
-    all_portfolio_bonds: QuerySet[Bond] = portfolio.bonds.all()
-    if all_portfolio_bonds.exists():
-        total_value = Decimal(sum(all_portfolio_bonds.values_list('bond_value', flat=True)))
-        avg_interest_rate = Decimal(sum(all_portfolio_bonds.values_list(
-            'interest_rate', flat=True)) / all_portfolio_bonds.count())
-        nearest_maturity_bond: Bond = min(all_portfolio_bonds, key=lambda bond: bond.maturity_date)
-        years = Decimal((nearest_maturity_bond.maturity_date - timezone.now().date()).days / Decimal(365.25))
-
-        future_value = total_value * (1 + avg_interest_rate / 100) ** years
-        return {
-            'average_interest_rate': avg_interest_rate,
-            'nearest_maturity_bond': BondSerializer(nearest_maturity_bond).data,
-            'total_value': total_value,
-            'future_value': future_value,
-        }
-    else:
-        return {'message': 'Portfolio contains no bonds.'}
+    return analysis_from_aggregates(get_portfolio_aggregates([portfolio.pk])[portfolio.pk])
+
+
+def get_portfolios_analysis(portfolios: QuerySet[Portfolio], today: Optional[date] = None) -> Dict[int, Dict]:
+    '''
+    Analyzes many portfolios at once. The ids of the portfolios are loaded with one query, the
+    aggregates come from `portfolio_analysis_cache` and the missing ones are loaded with two more
+    queries, so the cost doesn't depend on the number or the size of the portfolios.
+
+    Args:
+        portfolios (QuerySet[Portfolio]): The portfolios to be analyzed.
+        today (date): The date of the analysis, the current date by default.
+
+    Returns:
+        Dict[int, Dict]: The analysis of every portfolio (as described in `get_portfolio_analysis`),
+                         keyed by the portfolio id.
+    '''
+    portfolio_pks = list(portfolios.values_list('pk', flat=True))
+    aggregates = get_portfolio_aggregates(portfolio_pks)
+    today = today or timezone.now().date()
+    return {
+        pk: analysis_from_aggregates(aggregates[pk], today=today)
+        for pk in portfolio_pks
+        if pk in aggregates
+    }
+
+
+def get_portfolio_risk(bonds: QuerySet[Bond], today: Optional[date] = None) -> Dict:
+    '''
+    Computes the yield to maturity, duration and convexity of a portfolio and of each of its bonds
+    with `PortfolioAnalyticsEngine`, in one query whatever the size of the portfolio.
+
+    Args:
+        bonds (QuerySet[Bond]): The bonds of the portfolio, there must be at least one.
+        today (date): The date of the analysis, the current date by default.
+
+    Returns:
+        Dict: The portfolio measures (as described in `RiskMeasures`, weighted by the present value
+              of the bonds) and, under 'bonds', the measures of every bond. Measures that are not
+              defined for matured bonds are None.
+    '''
+    engine = PortfolioAnalyticsEngine(mode=FLOAT_MODE)
+    columns = engine.load(bonds)
+    bond_risk = engine.bond_risk(columns, today=today)
+    portfolio_risk, = engine.portfolio_risk(columns, bond_risk).as_list()
+    del portfolio_risk['id']
+    portfolio_risk['bonds'] = bond_risk.as_list()
+    return portfolio_risk
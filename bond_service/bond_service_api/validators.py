@@ -1,11 +1,22 @@
-import requests
+import logging
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from .cdcp import get_cdcp_client, CDCPError, CDCPUnavailable
+from .isin_cache import isin_cache
+from .isin_registry import get_isin_registry, is_valid_isin_checksum
+
+log = logging.getLogger(__name__)
 
 
 def validate_isin(value):
     '''
-    Validates the given ISIN (International Securities Identification Number) by querying
-    a central depository API.
+    Validates the given ISIN (International Securities Identification Number).
+
+    Malformed ISINs and ISINs with a wrong check digit are rejected locally. Well-formed
+    ISINs are looked up in the local ISIN registry (see `ISIN_REGISTRY_BACKEND`), then in
+    the ISIN cache and, if `ISIN_NETWORK_FALLBACK` is enabled, in the central depository API.
+    While the API is unavailable, the ISIN is rejected or, if `ISIN_DEFER_ON_CDCP_OUTAGE`
+    is enabled, accepted without validation.
 
     Args:
         value (str): The ISIN to validate.
@@ -14,16 +25,45 @@ def validate_isin(value):
         str: The validated ISIN if found.
 
     Raises:
-        ValidationError: If the ISIN is not found in the central depository or if there's
-                         an error in the API request.
+        ValidationError: If the ISIN is malformed, is not found in the central depository
+                         or if there's an error in the API request.
     '''
-    url = f'https://www.cdcp.cz/isbpublicjson/api/VydaneISINy?isin={value}'
-    response = requests.get(url)
-    if response.ok:
-        data = response.json()
-        if not data.get('vydaneisiny'):
-            raise ValidationError(f'ISIN {value} is not found in the central depository.')
-        else:
+    if not is_valid_isin_checksum(value):
+        raise ValidationError(f'ISIN {value} is not a valid ISIN.')
+    found = get_isin_registry().contains(value)
+    if found is None:
+        found = isin_cache.get(value)
+    if found is None and settings.ISIN_NETWORK_FALLBACK:
+        found = lookup_isin(value)
+        if found is None:
             return value
-    else:
-        raise ValidationError(f'API request error: {response.status_code}')
+        isin_cache.set(value, found)
+    if not found:
+        raise ValidationError(f'ISIN {value} is not found in the central depository.')
+    return value
+
+
+def lookup_isin(value):
+    '''
+    Queries the central depository API for the given ISIN.
+
+    Args:
+        value (str): The ISIN to look up.
+
+    Returns:
+        bool: True if the ISIN is issued, False otherwise. If the API is unavailable and
+              `ISIN_DEFER_ON_CDCP_OUTAGE` is enabled, returns None: the ISIN is accepted
+              and the result is not cached.
+
+    Raises:
+        ValidationError: If there's an error in the API request. Errors are not cached.
+    '''
+    try:
+        return get_cdcp_client().isin_exists(value)
+    except CDCPUnavailable as error:
+        if settings.ISIN_DEFER_ON_CDCP_OUTAGE:
+            log.warning('ISIN %s accepted without validation: %s', value, error)
+            return None
+        raise ValidationError(str(error))
+    except CDCPError as error:
+        raise ValidationError(str(error))
@@ -0,0 +1,106 @@
+import logging
+import time
+from typing import Dict, Hashable, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+log = logging.getLogger(__name__)
+
+
+class VersionCounters:
+    '''
+    VersionCounters: Version numbers of data, kept in a Django cache and incremented on every
+    change of the data, so cache keys and ETags derived from them change with the data.
+
+    A missing version (never set or evicted) is initialized with the current time, so it can't
+    match a version seen before. Inside a transaction the versions are incremented again on commit,
+    so a version read by a concurrent request before the commit doesn't outlive the change.
+
+    Attributes:
+        cache_alias (str): The Django cache used.
+        key_prefix (str): The prefix of the cache keys of the versions.
+    '''
+
+    def __init__(self, cache_alias: str, key_prefix: str):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, name: Hashable) -> str:
+        return f'{self.key_prefix}:{name}'
+
+    def get_many(self, names: Iterable[Hashable]) -> Dict[Hashable, int]:
+        '''
+        Returns the current version of every name. Errors of the cache backend are raised.
+        '''
+        keys = {self.make_key(name): name for name in names}
+        versions = self.cache.get_many(keys)
+        missing = keys.keys() - versions.keys()
+        if missing:
+            for key in missing:
+                self.cache.add(key, time.time_ns(), None)
+            versions.update(self.cache.get_many(missing))
+        return {keys[key]: version for key, version in versions.items()}
+
+    def increment(self, names: Iterable[Hashable]) -> None:
+        names = set(names)
+        self.increment_now(names)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self.increment_now(names))
+
+    def increment_now(self, names: Iterable[Hashable]) -> None:
+        for name in names:
+            key = self.make_key(name)
+            try:
+                try:
+                    self.cache.incr(key)
+                except ValueError:
+                    self.cache.set(key, time.time_ns(), None)
+            except Exception:
+                log.warning('Version cache is unavailable', exc_info=True)
+
+
+# The version of every portfolio, changed with the portfolio, its summary or any of its bonds,
+# and the version of all portfolios, changed with any of them
+portfolio_versions = VersionCounters(cache_alias=settings.DATA_VERSIONS_CACHE_ALIAS, key_prefix='portfolio_version')
+
+ALL_PORTFOLIOS = 'all'
+
+
+def invalidate_portfolios(portfolio_pks: Iterable[int]) -> None:
+    '''
+    Increments the versions of the changed portfolios and of all portfolios. Called by the Bond
+    and Portfolio signals (see `signals.py`) and the bulk importer.
+    '''
+    portfolio_pks = list(portfolio_pks)
+    if portfolio_pks:
+        portfolio_versions.increment([*portfolio_pks, ALL_PORTFOLIOS])
+
+
+def check_shared_caches() -> None:
+    '''
+    Raises ImproperlyConfigured if API_CONDITIONAL_GET or PORTFOLIO_ANALYSIS_CACHE is enabled while
+    the version counters or the cache it uses are kept in local memory. A write in one process would
+    not change the versions seen by the other processes, which would keep answering 304 and serving
+    cached responses and analyses.
+    '''
+    checks = [
+        ('API_CONDITIONAL_GET', settings.API_RESPONSE_CACHE_ALIAS),
+        ('PORTFOLIO_ANALYSIS_CACHE', settings.PORTFOLIO_ANALYSIS_CACHE_ALIAS),
+    ]
+    for setting, cache_alias in checks:
+        if not getattr(settings, setting):
+            continue
+        for alias in (settings.DATA_VERSIONS_CACHE_ALIAS, cache_alias):
+            if isinstance(caches[alias], LocMemCache):
+                raise ImproperlyConfigured(
+                    f'{setting} requires a cache shared by all processes, but the {alias!r} cache '
+                    f'is local memory. Set REDIS_URL or disable {setting}.'
+                )
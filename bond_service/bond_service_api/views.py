@@ -1,5 +1,18 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
 from django.contrib.auth.models import User
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework.generics import (
+    get_object_or_404 as get_row_or_404,
     GenericAPIView,
     CreateAPIView,
     ListAPIView,
@@ -7,14 +20,16 @@ from rest_framework.generics import (
     RetrieveUpdateDestroyAPIView,
 )
 from rest_framework import status
+from rest_framework.relations import ManyRelatedField
 from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
-from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from .serializers import (
     MyTokenObtainPairSerializer,
@@ -23,12 +38,38 @@ from .serializers import (
     UserSerializer,
     PortfolioSerializer,
     BondSerializer,
+    BondImportSerializer,
+    BondFilterSerializer,
+    BondMaturingSerializer,
+    FieldSelectionSerializer,
     PortfolioInvestmentAnalysisSerializer,
+    PortfolioBatchInvestmentAnalysisSerializer,
+    PortfolioCashFlowsSerializer,
+    PortfolioQuerySerializer,
 )
 from .models import Portfolio, Bond
-from .utils import get_portfolio_analysis
+from .cashflows import portfolio_cash_flows
+from .exporters import BondExporter
+from .importers import BondImporter
+from .pagination import BondCursorPagination, KeysetCursorPagination, OptionalCursorPagination
+from .parsers import CSVParser, FastJSONParser, JSONLinesParser, MessagePackParser
+from .readers import BondRowReader, PortfolioRowReader, UserRowReader, UsersListRowReader
+from .renderers import CSVRenderer, JSONLinesRenderer
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .utils import (
+    analysis_from_aggregates,
+    filter_bonds,
+    get_bonds_maturing_between,
+    get_portfolio_aggregates,
+    get_portfolio_bonds,
+    get_portfolio_risk,
+    get_portfolios_analysis,
+)
+from .versions import ALL_PORTFOLIOS, portfolio_versions
 from django.shortcuts import get_object_or_404
 
+log = logging.getLogger(__name__)
+
 
 @extend_schema_view(
     post=extend_schema(
@@ -42,12 +83,15 @@ from django.shortcuts import get_object_or_404
                     'access': {'type': 'string'},
                 },
             },
+            status.HTTP_429_TOO_MANY_REQUESTS: None,
+            status.HTTP_503_SERVICE_UNAVAILABLE: None,
         },
     ),
 )
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
 
 @extend_schema_view(
@@ -82,14 +126,228 @@ class UserRegisterView(CreateAPIView):
     permission_classes = [AllowAny]
 
 
+class SparseFieldsMixin:
+    '''
+    Narrows the responses to the fields selected with the `fields`, `exclude` and `expand`
+    parameters (see `FieldSelectionSerializer`), `expandable_fields` are only output when
+    requested. GET requests only load the columns of the selected fields, with `only()` or with
+    the `values_list` of the row reader, and skip the `select_related` of unselected relations.
+    The selection only narrows reads: a write validates, saves and returns all the fields, only
+    the unrequested expandable ones are left out.
+    '''
+    expandable_fields = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        available = list(self.get_serializer_class()().fields)
+        serializer = FieldSelectionSerializer(
+            data=request.query_params,
+            context={'available': available, 'expandable': self.expandable_fields},
+        )
+        serializer.is_valid(raise_exception=True)
+        self.selected_fields = serializer.get_selected_fields()
+        if request.method not in SAFE_METHODS:
+            # Only the expandable (read only) fields can be left out of a write
+            self.selected_fields = [
+                name for name in available if name in self.selected_fields or name not in self.expandable_fields
+            ]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', getattr(self, 'selected_fields', None))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_row_reader(self):
+        return self.row_reader_class(fields=self.selected_fields)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+        fields = self.get_serializer().fields.values()
+        sources = {field.source for field in fields}
+        related = queryset.query.select_related
+        if isinstance(related, dict):
+            queryset = queryset.select_related(None).select_related(*(name for name in related if name in sources))
+        columns = [
+            field.source for field in fields
+            if not isinstance(field, (BaseSerializer, ManyRelatedField))
+        ]
+        return queryset.only(*columns, *self.row_reader_class.extra_lookups)
+
+
+class FastReadMixin:
+    '''
+    Serves the GET list and detail responses from `values_list` rows encoded by the view's
+    `row_reader_class` (see `readers.py`) instead of the serializer. The response JSON is the
+    same, the filtering, pagination and permissions of the view are kept. The fast path can be
+    turned off with API_READ_FAST_PATH.
+    '''
+    row_reader_class = None
+
+    def get_row_reader(self):
+        return self.row_reader_class()
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_READ_FAST_PATH:
+            return super().list(request, *args, **kwargs)
+        reader = self.get_row_reader()
+        rows = reader.values(self.filter_queryset(self.get_queryset()))
+        if self.paginator is not None:
+            page = self.paginator.paginate_queryset(rows, request, view=self)
+            if page is not None:
+                return self.paginator.get_paginated_response(reader.read(page))
+        return Response(reader.read(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.API_READ_FAST_PATH:
+            return super().retrieve(request, *args, **kwargs)
+        reader = self.get_row_reader()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = reader.values(self.filter_queryset(self.get_queryset()))
+        row = get_row_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(reader.read([row])[0])
+
+
+class ConditionalGetMixin:
+    '''
+    Answers GET requests with 304 Not Modified before the response is built, when the
+    If-None-Match or If-Modified-Since header matches the validators of `get_validators`:
+    version counters (see `versions.py`) or the `updated_at` of a row, read without the main
+    query. The ETag also covers the user, the full path and the accepted media type, so another
+    user or representation never matches it. Nothing is done unless API_CONDITIONAL_GET is enabled.
+    '''
+
+    def get_validators(self) -> Tuple[Optional[list], Optional[datetime]]:
+        '''
+        Returns the values the response depends on, None when they are unknown and the response
+        must be built, and the time of the last modification, if known.
+        '''
+        raise NotImplementedError
+
+    def get_portfolio_versions(self, names: list) -> Optional[list]:
+        '''
+        Returns the versions of the portfolios (or ALL_PORTFOLIOS), None if the cache is unavailable.
+        '''
+        try:
+            versions = portfolio_versions.get_many(names)
+        except Exception:
+            log.warning('Version cache is unavailable', exc_info=True)
+            return None
+        return [versions[name] for name in names]
+
+    def get_early_response(self, request) -> Optional[HttpResponse]:
+        '''
+        Returns the response if it can be answered without building it, a 304 Not Modified here.
+        '''
+        self.etag = self.last_modified = None
+        if not settings.API_CONDITIONAL_GET:
+            return None
+        values, last_modified = self.get_validators()
+        if values is None:
+            return None
+        key = [values, request.user.pk, request.get_full_path(), request.accepted_media_type]
+        self.etag_hash = hashlib.md5(repr(key).encode()).hexdigest()
+        self.etag = quote_etag(self.etag_hash)
+        self.last_modified = last_modified and int(last_modified.timestamp())
+        return get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = self.etag
+            if self.last_modified:
+                response['Last-Modified'] = http_date(self.last_modified)
+            patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = self.get_early_response(request)
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_early_response(request)
+        if response is not None:
+            return response
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ResponseCacheMixin(ConditionalGetMixin):
+    '''
+    Caches the rendered 200 responses of GET requests under their ETag (see `ConditionalGetMixin`)
+    in the API_RESPONSE_CACHE_ALIAS cache, so repeated reads skip the main query, serialization
+    and rendering. The ETag covers the versions of the data and the user, so the entries are
+    scoped per user and a write makes the following reads use new keys, nothing is deleted.
+    Browsable API pages are not cached, and cache errors are logged and treated as a miss.
+
+    Attributes:
+        response_cache_timeout (int): How long (in seconds) a response is kept, 0 disables the
+                                      cache. API_RESPONSE_CACHE_TIMEOUT if None.
+    '''
+    response_cache_timeout = None
+
+    @property
+    def response_cache(self):
+        return caches[settings.API_RESPONSE_CACHE_ALIAS]
+
+    def get_response_cache_timeout(self) -> int:
+        if self.response_cache_timeout is None:
+            return settings.API_RESPONSE_CACHE_TIMEOUT
+        return self.response_cache_timeout
+
+    def get_early_response(self, request) -> Optional[HttpResponse]:
+        self.response_cache_key = None
+        response = super().get_early_response(request)
+        if (
+            response is not None
+            or self.etag is None
+            or not self.get_response_cache_timeout()
+            or request.accepted_media_type.startswith('text/html')
+        ):
+            return response
+        self.response_cache_key = f'response:{self.etag_hash}'
+        try:
+            cached = self.response_cache.get(self.response_cache_key)
+        except Exception:
+            log.warning('Response cache is unavailable', exc_info=True)
+            return None
+        if cached is None:
+            return None
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            getattr(self, 'response_cache_key', None)
+            and isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+        ):
+            response.add_post_render_callback(self.cache_response)
+        return response
+
+    def cache_response(self, response: Response) -> None:
+        try:
+            self.response_cache.set(
+                self.response_cache_key,
+                (response.content, response['Content-Type']),
+                self.get_response_cache_timeout(),
+            )
+        except Exception:
+            log.warning('Response cache is unavailable', exc_info=True)
+
+
 @extend_schema_view(
     get=extend_schema(
         tags=['user'],
         summary='List all users',
     ),
 )
-class UsersListView(ListAPIView):
+class UsersListView(FastReadMixin, ListAPIView):
     serializer_class = UsersListSerializer
+    row_reader_class = UsersListRowReader
     queryset = User.objects.all().order_by('pk')
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -112,15 +370,54 @@ class UsersListView(ListAPIView):
         summary='Delete user instance',
     ),
 )
-class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class UserRetrieveUpdateDestroyView(FastReadMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = UserSerializer
+    row_reader_class = UserRowReader
     queryset = User.objects.all().order_by('pk')
     permission_classes = [IsAuthenticated, IsAdminUser]
 
 
+class PortfolioBondsMixin:
+    '''
+    Prefetches the nested bonds of the serialized portfolios with one query, limited to
+    `bonds_limit` bonds per portfolio if the parameter is given. The bonds are only nested
+    with `expand=bonds`. The fast path reads them the same way with a `PortfolioRowReader`.
+    '''
+    row_reader_class = PortfolioRowReader
+    expandable_fields = ('bonds',)
+
+    def get_bonds_limit(self) -> Optional[int]:
+        serializer = PortfolioQuerySerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data.get('bonds_limit')
+
+    def prefetch_bonds(self, portfolios: List[Portfolio]) -> None:
+        bonds = get_portfolio_bonds([portfolio.pk for portfolio in portfolios], limit=self.get_bonds_limit())
+        prefetch_related_objects(portfolios, Prefetch('bonds', queryset=bonds))
+
+    def get_row_reader(self):
+        return PortfolioRowReader(bonds_limit=self.get_bonds_limit(), fields=self.selected_fields)
+
+    def with_bonds(self) -> bool:
+        return 'bonds' in self.selected_fields
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.with_bonds():
+            self.prefetch_bonds(page)
+        return page
+
+    def get_object(self):
+        portfolio = super().get_object()
+        if self.request.method != 'DELETE' and self.with_bonds():
+            self.prefetch_bonds([portfolio])
+        return portfolio
+
+
 @extend_schema_view(
     get=extend_schema(
         tags=['portfolio'],
+        parameters=[PortfolioQuerySerializer, FieldSelectionSerializer],
         summary='Get list of all portfolios',
     ),
     post=extend_schema(
@@ -128,13 +425,20 @@ class UserRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
         summary='Create portfolio',
     ),
 )
-class PortfolioListCreateView(ListCreateAPIView):
+class PortfolioListCreateView(
+    PortfolioBondsMixin, SparseFieldsMixin, ResponseCacheMixin, FastReadMixin, ListCreateAPIView
+):
     serializer_class = PortfolioSerializer
     queryset = Portfolio.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_pagination_class = KeysetCursorPagination
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by_id=self.request.user.id)
+
+    def get_validators(self):
+        return self.get_portfolio_versions([ALL_PORTFOLIOS]), None
 
     def get_queryset(self):
         '''
@@ -147,13 +451,14 @@ class PortfolioListCreateView(ListCreateAPIView):
             queryset = Portfolio.objects.all().order_by('pk')
         else:
             queryset = Portfolio.objects.filter(
-                created_by=current_user).order_by('pk')
-        return queryset
+                created_by_id=current_user.id).order_by('pk')
+        return queryset.select_related('summary')
 
 
 @extend_schema_view(
     get=extend_schema(
         tags=['portfolio'],
+        parameters=[PortfolioQuerySerializer, FieldSelectionSerializer],
         summary='Get portfolio instance',
     ),
     put=extend_schema(
@@ -169,11 +474,16 @@ class PortfolioListCreateView(ListCreateAPIView):
         summary='Delete portfolio instance',
     ),
 )
-class PortfolioRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class PortfolioRetrieveUpdateDestroyView(
+    PortfolioBondsMixin, SparseFieldsMixin, ResponseCacheMixin, FastReadMixin, RetrieveUpdateDestroyAPIView
+):
     serializer_class = PortfolioSerializer
     queryset = Portfolio.objects.all()
     permission_classes = [IsAuthenticated]
 
+    def get_validators(self):
+        return self.get_portfolio_versions([self.kwargs['pk']]), None
+
     def get_queryset(self):
         '''
         Get the current user from the request
@@ -185,8 +495,20 @@ class PortfolioRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
             queryset = Portfolio.objects.all().order_by('pk')
         else:
             queryset = Portfolio.objects.filter(
-                created_by=current_user).order_by('pk')
-        return queryset
+                created_by_id=current_user.id).order_by('pk')
+        return queryset.select_related('summary')
+
+
+class AnalysisDateMixin:
+    '''
+    Fixes the date of the portfolio analysis when the request starts, so the ETag validators and
+    the future value of the body are computed for the same day (the current date in UTC, like the
+    defaults of the analysis functions).
+    '''
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.today = timezone.now().date()
 
 
 @extend_schema_view(
@@ -202,6 +524,18 @@ class PortfolioRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
                     'nearest_maturity_bond': {'type': 'string', 'description': '', 'example': 'bond_name'},
                     'total_value': {'type': 'string', 'description': '', 'example': '100'},
                     'future_value': {'type': 'string', 'description': '', 'example': '100'},
+                    'risk': {
+                        'type': 'object',
+                        'description': "Only with include=risk, the portfolio and per-bond measures.",
+                        'properties': {
+                            'present_value': {'type': 'number', 'example': 101.2},
+                            'yield_to_maturity': {'type': 'number', 'example': 5.5},
+                            'macaulay_duration': {'type': 'number', 'example': 1.9},
+                            'modified_duration': {'type': 'number', 'example': 1.87},
+                            'convexity': {'type': 'number', 'example': 4.6},
+                            'bonds': {'type': 'array', 'items': {'type': 'object'}},
+                        },
+                    },
                 },
             },
             status.HTTP_204_NO_CONTENT: {
@@ -224,25 +558,150 @@ class PortfolioRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
 
     ),
 )
-class PortfolioInvestmentAnalysisView(GenericAPIView):
+class PortfolioInvestmentAnalysisView(AnalysisDateMixin, ResponseCacheMixin, GenericAPIView):
     serializer_class = PortfolioInvestmentAnalysisSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_portfolio_pk(self) -> int:
+        try:
+            return int(self.request.GET.get('portfolio_pk'))
+        except (TypeError, ValueError):
+            raise Http404
+
+    def get_validators(self):
+        # The future value depends on the current date
+        versions = self.get_portfolio_versions([self.get_portfolio_pk()])
+        return versions and [versions, self.today], None
+
     def get(self, request):
-        portfolio_pk = self.request.GET.get('portfolio_pk')
-        portfolio = get_object_or_404(Portfolio, pk=portfolio_pk)
+        not_modified = self.get_early_response(request)
+        if not_modified is not None:
+            return not_modified
+        portfolio_pk = self.get_portfolio_pk()
+        aggregates = get_portfolio_aggregates([portfolio_pk]).get(portfolio_pk)
+        if aggregates is None:
+            raise Http404
         user = self.request.user
-        if (portfolio.created_by == user) or (user.is_superuser):
-            data = get_portfolio_analysis(portfolio=portfolio)
+        if (aggregates['created_by_id'] == user.pk) or (user.is_superuser):
+            data = analysis_from_aggregates(aggregates, today=self.today)
+            include = self.request.GET.get('include', '').split(',')
+            if 'risk' in include and aggregates['bonds_count']:
+                bonds = Bond.objects.filter(portfolio_id=portfolio_pk)
+                data['risk'] = get_portfolio_risk(bonds=bonds, today=self.today)
             return Response(data=data, status=status.HTTP_200_OK)
         else:
             raise PermissionDenied("You do not have permission to see analysis of this portfolio.")
 
 
+@extend_schema_view(
+    get=extend_schema(
+        tags=['portfolio'],
+        parameters=[PortfolioBatchInvestmentAnalysisSerializer],
+        summary='Get analysis of many portfolios',
+        description=(
+            'Returns the analysis of every requested portfolio keyed by the portfolio id. '
+            'Without portfolio_pks all portfolios of the user (all portfolios for an admin) are analyzed. '
+            'Requested portfolios that do not exist or are not accessible are reported as not found.'
+        ),
+        responses={
+            status.HTTP_200_OK: {
+                'type': 'object',
+                'additionalProperties': {'type': 'object'},
+                'example': {
+                    '1': {
+                        'average_interest_rate': '100.5',
+                        'nearest_maturity_bond': {'emission_name': 'bond_name'},
+                        'total_value': '100',
+                        'future_value': '100',
+                    },
+                    '2': {'message': 'Portfolio contains no bonds.'},
+                    '3': {'detail': 'Not found.'},
+                },
+            },
+            status.HTTP_400_BAD_REQUEST: None,
+        },
+    ),
+)
+class PortfolioBatchInvestmentAnalysisView(AnalysisDateMixin, ResponseCacheMixin, GenericAPIView):
+    serializer_class = PortfolioBatchInvestmentAnalysisSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_validators(self):
+        versions = self.get_portfolio_versions([ALL_PORTFOLIOS])
+        return versions and [versions, self.today], None
+
+    def get(self, request):
+        not_modified = self.get_early_response(request)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        portfolio_pks = serializer.validated_data.get('portfolio_pks')
+        user = self.request.user
+        portfolios = Portfolio.objects.all() if user.is_superuser else Portfolio.objects.filter(created_by_id=user.pk)
+        if portfolio_pks is not None:
+            portfolios = portfolios.filter(pk__in=portfolio_pks)
+        data = get_portfolios_analysis(portfolios=portfolios.order_by('pk'), today=self.today)
+        for portfolio_pk in portfolio_pks or []:
+            data.setdefault(portfolio_pk, {'detail': 'Not found.'})
+        return Response(data=data, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['portfolio'],
+        parameters=[PortfolioCashFlowsSerializer],
+        summary='Stream projected portfolio cash flows',
+        description=(
+            'Streams the coupon and principal payments of all bonds in the portfolio between '
+            'start_date and end_date as JSON Lines (application/x-ndjson), ordered by date.'
+        ),
+        responses={
+            (status.HTTP_200_OK, 'application/x-ndjson'): {
+                'type': 'object',
+                'properties': {
+                    'date': {'type': 'string', 'format': 'date', 'example': '2024-08-06'},
+                    'bond_id': {'type': 'integer', 'example': 1},
+                    'portfolio_id': {'type': 'integer', 'example': 1},
+                    'kind': {'type': 'string', 'enum': ['coupon', 'principal']},
+                    'amount': {'type': 'string', 'example': '1.25'},
+                },
+            },
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_403_FORBIDDEN: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    ),
+)
+class PortfolioCashFlowsView(GenericAPIView):
+    serializer_class = PortfolioCashFlowsSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        portfolio = get_object_or_404(Portfolio, pk=serializer.validated_data['portfolio_pk'])
+        user = self.request.user
+        if not ((portfolio.created_by_id == user.pk) or (user.is_superuser)):
+            raise PermissionDenied("You do not have permission to see cash flows of this portfolio.")
+        cash_flows = portfolio_cash_flows(
+            portfolio.bonds.all(),
+            start_date=serializer.validated_data.get('start_date', timezone.now().date()),
+            end_date=serializer.validated_data.get('end_date'),
+        )
+        lines = (json.dumps(cash_flow.as_dict()) + '\n' for cash_flow in cash_flows)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
 @extend_schema_view(
     get=extend_schema(
         tags=['bond'],
         summary='Get list of all bonds',
+        description=(
+            'Lists the bonds, optionally filtered by portfolio, yields frequency, '
+            'interest rate range and maturity date range.'
+        ),
+        parameters=[BondFilterSerializer, FieldSelectionSerializer],
         responses={
             status.HTTP_200_OK: BondSerializer(many=True),
             status.HTTP_401_UNAUTHORIZED: None,
@@ -260,10 +719,13 @@ class PortfolioInvestmentAnalysisView(GenericAPIView):
         },
     ),
 )
-class BondListCreateView(ListCreateAPIView):
+class BondListCreateView(SparseFieldsMixin, ResponseCacheMixin, FastReadMixin, ListCreateAPIView):
     serializer_class = BondSerializer
+    row_reader_class = BondRowReader
     queryset = Bond.objects.all()
     permission_classes = [IsAuthenticated]
+    pagination_class = OptionalCursorPagination
+    cursor_pagination_class = BondCursorPagination
 
     def get_queryset(self):
         '''
@@ -276,24 +738,171 @@ class BondListCreateView(ListCreateAPIView):
             queryset = Bond.objects.all()
         else:
             queryset = Bond.objects.filter(
-                portfolio__created_by=current_user)
+                portfolio__created_by_id=current_user.id)
         return queryset
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = BondFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return filter_bonds(queryset, serializer.validated_data)
+
+    def get_validators(self):
+        # Every bond change increments the version of its portfolio and of all portfolios
+        return self.get_portfolio_versions([ALL_PORTFOLIOS]), None
+
     def perform_create(self, serializer):
         current_user = self.request.user
         portfolio_id = self.request.data.get('portfolio', None)
         if portfolio_id:
             portfolio = get_object_or_404(Portfolio, pk=portfolio_id)
-            if portfolio.created_by == current_user:
+            if portfolio.created_by_id == current_user.id:
                 serializer.save(portfolio=portfolio)
                 return
         raise PermissionDenied('You do not have permission to create a bond in this portfolio.')
 
 
+@extend_schema_view(
+    get=extend_schema(
+        tags=['bond'],
+        summary='Get bonds maturing between two dates',
+        description='Lists the bonds maturing between start_date and end_date (inclusive), ordered by maturity date.',
+        parameters=[BondMaturingSerializer, FieldSelectionSerializer],
+        responses={
+            status.HTTP_200_OK: BondSerializer(many=True),
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_401_UNAUTHORIZED: None,
+        },
+    ),
+)
+class BondMaturingListView(SparseFieldsMixin, ResponseCacheMixin, FastReadMixin, ListAPIView):
+    serializer_class = BondSerializer
+    row_reader_class = BondRowReader
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        '''
+        Returns the bonds of the current user (all bonds for a superuser) maturing
+        in the requested date range.
+        '''
+        serializer = BondMaturingSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        current_user = self.request.user
+        bonds = Bond.objects.all()
+        if not current_user.is_superuser:
+            bonds = bonds.filter(portfolio__created_by_id=current_user.id)
+        return get_bonds_maturing_between(bonds, **serializer.validated_data)
+
+    def get_validators(self):
+        return self.get_portfolio_versions([ALL_PORTFOLIOS]), None
+
+
+@extend_schema_view(
+    post=extend_schema(
+        tags=['bond'],
+        summary='Import bonds',
+        description=(
+            'Imports bonds from a CSV (text/csv, with a header row), JSON Lines '
+            '(application/x-ndjson), MessagePack (application/x-msgpack) or JSON array body. '
+            'Valid rows are imported, invalid rows are reported with their 1-based row number.'
+        ),
+        request={
+            'text/csv': BondImportSerializer(many=True),
+            'application/x-ndjson': BondImportSerializer(many=True),
+            'application/x-msgpack': BondImportSerializer(many=True),
+            'application/json': BondImportSerializer(many=True),
+        },
+        responses={
+            status.HTTP_200_OK: {
+                'type': 'object',
+                'properties': {
+                    'created': {'type': 'integer', 'example': 2},
+                    'failed': {'type': 'integer', 'example': 1},
+                    'errors': {
+                        'type': 'array',
+                        'items': {'type': 'object'},
+                        'example': [{'row': 3, 'errors': {'portfolio': ['This field is required.']}}],
+                    },
+                },
+            },
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_401_UNAUTHORIZED: None,
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: None,
+        },
+    ),
+)
+class BondBulkImportView(GenericAPIView):
+    serializer_class = BondImportSerializer
+    parser_classes = [CSVParser, JSONLinesParser, MessagePackParser, FastJSONParser]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        rows = request.data
+        # CSV and JSON Lines bodies are lazy iterators, their invalid rows are reported per row.
+        # A JSON or MessagePack body must be a list of objects.
+        if isinstance(rows, list):
+            if not all(isinstance(row, dict) for row in rows):
+                raise ValidationError('Expected a list of bonds.')
+        elif not isinstance(rows, Iterator):
+            raise ValidationError('Expected a list of bonds.')
+        report = BondImporter(user=request.user).run(rows)
+        return Response(data=report, status=status.HTTP_200_OK)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['bond'],
+        summary='Export bonds',
+        description=(
+            'Streams all bonds of the current user (all bonds for a superuser) ordered by id, '
+            'as JSON Lines (application/x-ndjson, the default) or CSV (text/csv), selected '
+            'with the Accept header or with format=jsonl|csv. The rows have the same fields '
+            'as the bond list and accept the same filters.'
+        ),
+        parameters=[BondFilterSerializer],
+        responses={
+            (status.HTTP_200_OK, 'application/x-ndjson'): BondSerializer(many=True),
+            (status.HTTP_200_OK, 'text/csv'): BondSerializer(many=True),
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_401_UNAUTHORIZED: None,
+        },
+    ),
+)
+class BondExportView(GenericAPIView):
+    serializer_class = BondSerializer
+    renderer_classes = [JSONLinesRenderer, CSVRenderer]
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        '''
+        Get the current user from the request
+        Filter bonds based on portfolios created by the current
+        user, to restrict access to non-creators
+        '''
+        current_user = self.request.user
+        bonds = Bond.objects.all()
+        if not current_user.is_superuser:
+            bonds = bonds.filter(portfolio__created_by_id=current_user.id)
+        serializer = BondFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return filter_bonds(bonds, serializer.validated_data)
+
+    def get(self, request):
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            BondExporter().stream(self.get_queryset(), renderer),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="bonds.{renderer.format}"'
+        return response
+
+
 @extend_schema_view(
     get=extend_schema(
         tags=['bond'],
         summary='Get bond instance',
+        parameters=[FieldSelectionSerializer],
     ),
     put=extend_schema(
         tags=['bond'],
@@ -308,8 +917,11 @@ class BondListCreateView(ListCreateAPIView):
         summary='Delete bond instance',
     ),
 )
-class BondRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class BondRetrieveUpdateDestroyView(
+    SparseFieldsMixin, ResponseCacheMixin, FastReadMixin, RetrieveUpdateDestroyAPIView
+):
     serializer_class = BondSerializer
+    row_reader_class = BondRowReader
     queryset = Bond.objects.all()
     permission_classes = [IsAuthenticated]
 
@@ -324,5 +936,13 @@ class BondRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
             queryset = Bond.objects.all()
         else:
             queryset = Bond.objects.filter(
-                portfolio__created_by=current_user)
+                portfolio__created_by_id=current_user.id)
         return queryset
+
+    def get_validators(self):
+        '''
+        The bond's `updated_at`, read with a query by primary key which also checks that the
+        bond is accessible. Missing bonds have no validators, the response is a 404.
+        '''
+        updated_at = self.get_queryset().filter(pk=self.kwargs['pk']).values_list('updated_at', flat=True).first()
+        return (None if updated_at is None else [updated_at]), updated_at
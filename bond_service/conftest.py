@@ -1,9 +1,118 @@
+import time
 import pytest
+from urllib.parse import urlencode
+from asgiref.sync import async_to_sync
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.core.cache import caches
 from bond_service_api.models import Portfolio, Bond
+from bond_service_api.cdcp import get_cdcp_client
+from bond_service_api.analysis_cache import portfolio_analysis_cache
+from bond_service_api.authentication import active_users
+from bond_service_api.isin_cache import isin_cache
+from bond_service_api.isin_registry import get_isin_registry, write_snapshot
+from bond_service_api.summaries import add_created_bonds, rebuild_portfolio_summaries
 from django.urls import reverse
 from requests import Response
+from bond_service_api.tests.cdcp_stub import CDCPStub
+from bond_service.asgi import application
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--run-benchmarks', action='store_true', default=False,
+        help='Run the tests marked as benchmark (timings and large datasets).',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    '''
+    Skips the benchmark tests unless --run-benchmarks is given, their timings depend on the machine.
+    '''
+    if config.getoption('--run-benchmarks'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='benchmark, run with --run-benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+TEST_ISINS = [
+    'CZ0003551251',
+    'CZ0008040318',
+    'CZ0008040300',
+    'CZ0003532558',
+    'CZ0009013306',
+]
+
+
+@pytest.fixture(autouse=True)
+def isin_registry(settings, tmp_path):
+    '''
+    Validates ISINs against a local snapshot of the test ISINs instead of the central depository API.
+    '''
+    snapshot_path = str(tmp_path / 'isin_snapshot.txt')
+    write_snapshot(snapshot_path, TEST_ISINS)
+    settings.ISIN_REGISTRY_SNAPSHOT_PATH = snapshot_path
+    settings.ISIN_NETWORK_FALLBACK = False
+    get_isin_registry.cache_clear()
+    yield get_isin_registry()
+    get_isin_registry.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_isin_cache():
+    isin_cache.clear()
+    isin_cache.shared.clear()
+    yield
+    isin_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_portfolio_analysis_cache(settings):
+    '''
+    Enables the portfolio analysis cache, the local memory cache is shared by the whole test run.
+    '''
+    settings.PORTFOLIO_ANALYSIS_CACHE = True
+    portfolio_analysis_cache.cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache(settings):
+    '''
+    Enables the conditional GET and the response cache, the local memory caches are shared by
+    the whole test run.
+    '''
+    settings.API_CONDITIONAL_GET = True
+    caches[settings.API_RESPONSE_CACHE_ALIAS].clear()
+    yield
+
+
+@pytest.fixture
+def stateless_auth(settings):
+    '''
+    Authenticates JWT requests with the token claims instead of the User row.
+    '''
+    settings.JWT_STATELESS_AUTH = True
+    active_users.clear()
+    yield
+    active_users.clear()
+
+
+@pytest.fixture
+def cdcp_stub(settings):
+    '''
+    Points the CDCP client at a local stub server and enables the network fallback.
+    '''
+    stub = CDCPStub(issued=['CZ0009999991']).start()
+    settings.CDCP_API_URL = stub.url
+    settings.CDCP_BACKOFF_FACTOR = 0
+    settings.ISIN_NETWORK_FALLBACK = True
+    get_cdcp_client.cache_clear()
+    yield stub
+    get_cdcp_client.cache_clear()
+    stub.stop()
 
 
 @pytest.fixture
@@ -78,6 +187,69 @@ def portfolio2(db, user2):
     return portfolio
 
 
+@pytest.fixture
+def create_bonds(db):
+    '''
+    Creates `count` bonds in each of the portfolios (a portfolio or a list) with one `bulk_create`
+    and adds them to the portfolio summaries. The bond at index i matures on 20(30 - i % 5)-01-01
+    and pays (1, 4, 12)[i % 3] times a year, the other fields are the same for all bonds unless
+    overridden.
+    '''
+    def _create_bonds(portfolios, count, **fields):
+        if isinstance(portfolios, Portfolio):
+            portfolios = [portfolios]
+        bonds = Bond.objects.bulk_create([
+            Bond(**{
+                'emission_name': f'bulk_bond_{portfolio.pk}_{index}',
+                'emission_isin': f'BULK{portfolio.pk:06d}{index:05d}',
+                'bond_value': '100',
+                'interest_rate': '10',
+                'purchase_date': '2024-07-06',
+                'maturity_date': f'20{30 - index % 5}-01-01',
+                'yields_frequency': (1, 4, 12)[index % 3],
+                'portfolio': portfolio,
+                **fields,
+            })
+            for portfolio in portfolios
+            for index in range(count)
+        ])
+        add_created_bonds(bonds)
+        return bonds
+    return _create_bonds
+
+
+@pytest.fixture
+def create_portfolios(db, create_bonds):
+    '''
+    Creates portfolios of a user with `bulk_create`, each with `bonds_count` bonds (see `create_bonds`)
+    and its summary.
+    '''
+    def _create_portfolios(user, portfolios_count, bonds_count, **bond_fields):
+        portfolios = Portfolio.objects.bulk_create([
+            Portfolio(name=f'bulk_portfolio_{user.pk}_{index}', created_by=user)
+            for index in range(portfolios_count)
+        ])
+        rebuild_portfolio_summaries([portfolio.pk for portfolio in portfolios])
+        create_bonds(portfolios, bonds_count, **bond_fields)
+        return portfolios
+    return _create_portfolios
+
+
+@pytest.fixture
+def best_time():
+    '''
+    Returns the best of `repeat` wall-clock timings (in seconds) of a function, for the benchmark tests.
+    '''
+    def _best_time(function, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+    return _best_time
+
+
 @pytest.fixture
 def obtain_access_token(client: APIClient):
     def _obtain_access_token(username, password):
@@ -109,3 +281,39 @@ def authenticate_user(api_client: APIClient, obtain_access_token):
         api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
         return
     return _authenticate_user
+
+
+@pytest.fixture
+def asgi_get():
+    '''
+    Sends a GET request to the ASGI application of the server, the way uvicorn does, and returns
+    the status, the headers and the body. The views run in another thread, so the tests need
+    `django_db(transaction=True)`.
+    '''
+    def _asgi_get(path, token, data=None):
+        messages = []
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'query_string': urlencode(data or {}).encode(),
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(application)(scope, receive, send)
+        start, *body = messages
+        headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+        assert not body[-1].get('more_body', False)
+        return start['status'], headers, b''.join(message.get('body', b'') for message in body)
+    return _asgi_get